@@ -0,0 +1,67 @@
+"""
+Memory per SKU: nested-dict basket against the columnar `Catalog`.
+
+Run from the project root:
+
+    python -m benchmarks.bench_catalog [SKUS]
+
+Both representations are built from the same generated products under
+`tracemalloc`, and the allocated bytes are divided by the number of SKUs.
+"""
+import sys
+import tracemalloc
+from shop.models.catalog import Catalog
+
+SKUS = 1_000_000
+GROUPS = 100
+
+
+def products(skus: int):
+    for number in range(skus):
+        yield f'group-{number % GROUPS}', f'product-{number}', {
+            'price': 1_000 + number,
+            'number': 10,
+            'discount': number % 5
+        }
+
+
+def build_dict(skus: int) -> dict:
+    basket = dict()
+    for group, product, details in products(skus):
+        basket.setdefault(group, dict())[product] = details
+    return basket
+
+
+def build_catalog(skus: int) -> Catalog:
+    catalog = Catalog()
+    for number in range(GROUPS):
+        catalog[f'group-{number}'] = dict()
+    for group, product, details in products(skus):
+        catalog[group][product] = details
+    return catalog
+
+
+def measure(build, skus: int) -> float:
+    tracemalloc.start()
+    basket = build(skus)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del basket
+    return size / skus
+
+
+def main() -> None:
+    skus = int(sys.argv[1]) if len(sys.argv) > 1 else SKUS
+    nested = measure(build_dict, skus)
+    columnar = measure(build_catalog, skus)
+    print(f'{skus:,} SKUs in {GROUPS} groups')
+    print(f'nested dict: {nested:8.1f} bytes/SKU')
+    print(f'catalog:     {columnar:8.1f} bytes/SKU')
+    print(
+        f'10M SKUs:    {nested * 1e7 / 2**20:,.0f} MiB'
+        f' -> {columnar * 1e7 / 2**20:,.0f} MiB'
+    )
+
+
+if __name__ == '__main__':
+    main()
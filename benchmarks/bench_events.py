@@ -0,0 +1,72 @@
+"""
+Throughput of the binary event log.
+
+Run from the project root:
+
+    python -m benchmarks.bench_events [EVENTS]
+
+EVENTS stock changes are made on a watched basket, once with the event
+log closed and once with every stock movement recorded, then the log is
+read back. A second run samples cart adds at 1 in 10.
+"""
+import os
+import sys
+import time
+import tempfile
+from shop.models.basket import change_stock
+from shop.models.events import (
+    emit,
+    open_events,
+    read_events,
+    close_events,
+    watch_basket,
+)
+
+EVENTS = 300_000
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else EVENTS
+    basket = {
+        'group': {
+            'product': {'price': 1_000, 'number': count * 2, 'discount': 0}
+        }
+    }
+    watch_basket(basket)
+    start = time.perf_counter()
+    for _ in range(count):
+        change_stock(basket, 'group', 'product', -1)
+    plain = time.perf_counter() - start
+    print(f'no log:       {count / plain:>12,.0f} stock changes/s')
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'events')
+        open_events(path)
+        start = time.perf_counter()
+        for _ in range(count):
+            change_stock(basket, 'group', 'product', -1)
+        close_events()
+        logged = time.perf_counter() - start
+        size = os.path.getsize(path)
+        print(
+            f'stock events: {count / logged:>12,.0f} stock changes/s, '
+            f'{size / count:.1f} bytes each'
+        )
+        start = time.perf_counter()
+        read = sum(1 for _ in read_events(path))
+        seconds = time.perf_counter() - start
+        print(f'read back:    {read / seconds:>12,.0f} events/s')
+
+        os.remove(path)
+        open_events(path, {'cart_add': 0.1})
+        start = time.perf_counter()
+        for _ in range(count):
+            emit('cart_add', 'product', 1)
+        close_events()
+        seconds = time.perf_counter() - start
+        kept = sum(1 for _ in read_events(path))
+        print(f'cart_add 0.1: {count / seconds:>12,.0f} emits/s, {kept:,} kept')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Cost of expiring cart holds with the timing wheel.
+
+Run from the project root:
+
+    python -m benchmarks.bench_holds [HOLDS]
+
+HOLDS cart lines (one per cart) are held with deadlines spread over the
+TTL, then the clock is moved one tick at a time. Each tick is timed
+against a full scan of every line, which is what a periodic sweep of the
+carts would cost.
+"""
+import sys
+import time
+import random
+from shop.models.holds import Holds
+from shop.helper.const import HOLD_TTL
+
+HOLDS = 1_000_000
+PRODUCTS = 1_000
+TICKS = 120
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else HOLDS
+    basket = {
+        'group': {
+            f'product-{number}': {
+                'price': 1_000,
+                'number': count,
+                'discount': 0
+            }
+            for number in range(PRODUCTS)
+        }
+    }
+    clock = [0.0]
+    book = Holds(basket, clock=lambda: clock[0])
+    carts = [dict() for _ in range(count)]
+    start = time.perf_counter()
+    for cart in carts:
+        clock[0] = random.random() * HOLD_TTL
+        book.hold(cart, 'group', f'product-{random.randrange(PRODUCTS)}', 1)
+    print(f'{count:,} holds in {time.perf_counter() - start:.2f} s')
+
+    clock[0] = HOLD_TTL
+    book.expire()
+    times = list()
+    expired = 0
+    for _ in range(TICKS):
+        clock[0] += 1
+        start = time.perf_counter()
+        expired += len(book.expire())
+        times.append(time.perf_counter() - start)
+    times.sort()
+    print(
+        f'wheel: {expired:,} expired over {TICKS} ticks, '
+        f'median tick {times[len(times) // 2] * 1e3:.3f} ms, '
+        f'worst {times[-1] * 1e3:.3f} ms'
+    )
+
+    start = time.perf_counter()
+    due = sum(
+        1 for lines in book._lines.values() for line in lines.values()
+        if line.deadline <= clock[0]
+    )
+    print(
+        f'scan:  {len(book):,} lines checked for {due} due lines '
+        f'in {(time.perf_counter() - start) * 1e3:.1f} ms per tick'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Checkout cost against the number of groups.
+
+Run from the project root:
+
+    python -m benchmarks.bench_index
+
+Prices a 5,000-line cart with `total_counter` on baskets that spread the same
+catalog over more and more groups, and times the per-line group lookups on
+their own. With the product -> group index both stay flat; the old linear
+search is timed next to them.
+"""
+import time
+from shop.models.index import forget_index
+from shop.models.group import get_group_by_product_name
+from shop.utils.funcs import total_counter
+from shop.utils.invoice import InvoiceBook
+
+LINES = 5_000
+PRODUCTS = 20_000
+GROUPS = (1, 10, 100, 1_000)
+
+
+def make_basket(groups: int) -> dict:
+    basket = dict()
+    for number in range(PRODUCTS):
+        group = f'group-{number % groups}'
+        basket.setdefault(group, dict())[f'product-{number}'] = {
+            'price': 1_000 + number,
+            'number': 10,
+            'discount': number % 5
+        }
+    return basket
+
+
+def make_shopping_list() -> dict:
+    step = PRODUCTS // LINES
+    return {f'product-{number}': 1 for number in range(0, PRODUCTS, step)}
+
+
+def scan_group(product: str, basket: dict) -> str:
+    for group in basket:
+        if product in basket[group]:
+            return group
+
+
+def scan_lookups(shopping_list: dict, basket: dict) -> None:
+    for product in shopping_list:
+        scan_group(product, basket)
+
+
+def indexed_lookups(shopping_list: dict, basket: dict) -> None:
+    for product in shopping_list:
+        get_group_by_product_name(product, basket)
+
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    shopping_list = make_shopping_list()
+    print(f'{LINES} cart lines, {PRODUCTS} products')
+    print(f'{"groups":>8} {"total ms":>10} {"lookup ms":>10} {"scan ms":>10}')
+    for groups in GROUPS:
+        basket = make_basket(groups)
+        # First call builds the index; time the steady state.
+        indexed_lookups(shopping_list, basket)
+        total = timed(total_counter, shopping_list, basket, InvoiceBook())
+        indexed = timed(indexed_lookups, shopping_list, basket)
+        scan = timed(scan_lookups, shopping_list, basket)
+        print(
+            f'{groups:>8} {total * 1000:>10.2f} '
+            f'{indexed * 1000:>10.2f} {scan * 1000:>10.2f}'
+        )
+        forget_index(basket)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Stress test for stock reservation.
+
+Run from the project root:
+
+    python -m benchmarks.bench_inventory [THREADS] [RESERVATIONS]
+
+THREADS threads each make RESERVATIONS reservations of one item, in four
+runs:
+
+- global: every reservation takes one lock shared by all products;
+- striped: every thread reserves its own products, under stripe locks;
+- contended: every thread reserves the same product, under its stripe;
+- sharded: every thread reserves the same product, made hot with shards.
+
+The shared product holds fewer items than the threads ask for, so the
+contended runs also check that nothing is oversold: the reservations that
+succeed never exceed the stock, and the stock left is the stock at the
+start minus the reservations.
+"""
+import sys
+import time
+import threading
+from shop.models.basket import change_stock
+from shop.models.inventory import (
+    stock,
+    reserve,
+    release,
+    make_hot,
+    make_cold,
+)
+
+THREADS = 64
+RESERVATIONS = 20_000
+
+
+def make_basket(threads: int, reservations: int) -> dict:
+    basket = {
+        'disjoint': {
+            f'product-{thread}': {
+                'price': 1_000,
+                'number': reservations,
+                'discount': 0
+            }
+            for thread in range(threads)
+        },
+        'shared': {
+            'hot': {
+                'price': 1_000,
+                'number': threads * reservations // 2,
+                'discount': 0
+            }
+        },
+    }
+    return basket
+
+
+def run(threads: int, work) -> tuple[float, list[int]]:
+    counts = [0] * threads
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(thread: int) -> None:
+        barrier.wait()
+        counts[thread] = work(thread)
+
+    workers = [
+        threading.Thread(target=worker, args=(thread,))
+        for thread in range(threads)
+    ]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start, counts
+
+
+def report(name: str, seconds: float, counts: list[int], tries: int) -> None:
+    done = sum(counts)
+    print(f'{name:<10} {done:>10,} reserved  {tries / seconds:>12,.0f} tries/s')  # noqa E501
+
+
+def main() -> None:
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else THREADS
+    reservations = int(sys.argv[2]) if len(sys.argv) > 2 else RESERVATIONS
+    basket = make_basket(threads, reservations)
+    print(
+        f'{threads} threads, {reservations:,} reservations each, '
+        f'switch interval {sys.getswitchinterval()} s'
+    )
+
+    lock = threading.Lock()
+
+    def global_lock(thread: int) -> int:
+        product = f'product-{thread}'
+        done = 0
+        for _ in range(reservations):
+            with lock:
+                done += change_stock(basket, 'disjoint', product, -1)
+        return done
+
+    def disjoint(thread: int) -> int:
+        product = f'product-{thread}'
+        done = 0
+        for _ in range(reservations):
+            done += reserve(basket, 'disjoint', product, 1)
+        return done
+
+    def shared(thread: int) -> int:
+        done = 0
+        for _ in range(reservations):
+            done += reserve(basket, 'shared', 'hot', 1)
+        return done
+
+    tries = threads * reservations
+    report('global', *run(threads, global_lock), tries)
+    for thread in range(threads):
+        release(basket, 'disjoint', f'product-{thread}', reservations)
+    report('striped', *run(threads, disjoint), tries)
+
+    initial = stock(basket, 'shared', 'hot')
+    for name in ('contended', 'sharded'):
+        if name == 'sharded':
+            make_hot(basket, 'shared', 'hot')
+        seconds, counts = run(threads, shared)
+        report(name, seconds, counts, tries)
+        make_cold(basket, 'shared', 'hot')
+        done = sum(counts)
+        left = stock(basket, 'shared', 'hot')
+        assert done <= initial, f'{name}: oversold {done - initial} items'
+        assert left == initial - done, f'{name}: {left} left, not {initial - done}'  # noqa E501
+        release(basket, 'shared', 'hot', done)
+    print('No item was oversold.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Journal cost: writing basket changes with group commit and replaying them.
+
+Run from the project root:
+
+    python -m benchmarks.bench_journal [CHANGES]
+
+Most changes are stock moves and the rest price or discount edits, like a
+busy shop. The journal is written into a temporary directory, then replayed
+on top of its snapshot as a restart would.
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+from shop.models.snapshot import load_snapshot
+from shop.models.basket import (
+    set_field,
+    change_stock,
+)
+from shop.models.journal import (
+    replay,
+    DurableBasket,
+)
+
+CHANGES = 1_000_000
+GROUPS = 30
+PRODUCTS = 300
+
+
+def make_basket() -> dict:
+    return {
+        f'group-{group}': {
+            f'product-{group}-{number}': {
+                'price': 1_000 + number,
+                'number': 10**9,
+                'discount': number % 5
+            }
+            for number in range(PRODUCTS)
+        }
+        for group in range(GROUPS)
+    }
+
+
+def main() -> None:
+    changes = int(sys.argv[1]) if len(sys.argv) > 1 else CHANGES
+    random.seed(1)
+    with tempfile.TemporaryDirectory() as folder:
+        durable = DurableBasket(folder, make_basket(), compact_records=changes + 1)  # noqa E501
+        basket = durable.basket
+        start = time.perf_counter()
+        for _ in range(changes):
+            group = random.randrange(GROUPS)
+            name = f'group-{group}'
+            product = f'product-{group}-{random.randrange(PRODUCTS)}'
+            if random.random() < 0.95:
+                change_stock(basket, name, product, random.choice((-1, 1)))
+            else:
+                field = random.choice(('price', 'discount'))
+                set_field(basket, name, product, field, random.randrange(100))
+        durable.close()
+        write_time = time.perf_counter() - start
+        journal = os.path.join(folder, 'journal')
+        fresh = load_snapshot(os.path.join(folder, 'snapshot.0'))
+        start = time.perf_counter()
+        count = replay(fresh, journal)
+        replay_time = time.perf_counter() - start
+        print(f'{changes:,} changes ({os.path.getsize(journal) / 2**20:,.1f} MiB)')  # noqa E501
+        print(f'write:  {changes / write_time:12,.0f} changes/s')
+        print(f'replay: {count / replay_time:12,.0f} records/s')
+        del fresh, basket, durable
+
+
+if __name__ == '__main__':
+    main()
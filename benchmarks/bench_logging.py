@@ -0,0 +1,68 @@
+"""
+Cost of logging on the shopping path.
+
+Run from the project root:
+
+    python -m benchmarks.bench_logging [CALLS]
+
+The same log line is written CALLS times, as the store used to do it
+(an f-string handed to a synchronous file handler) and through the queued
+pipeline of `conf.log`, at DEBUG and at WARNING.
+"""
+import os
+import sys
+import time
+import logging
+import tempfile
+from conf.log import (
+    setup_logging,
+    stop_logging,
+)
+
+CALLS = 200_000
+
+
+def timed(name: str, calls: int, log) -> None:
+    start = time.perf_counter()
+    for number in range(calls):
+        log(number)
+    seconds = time.perf_counter() - start
+    print(f'{name:<22} {seconds / calls * 1e9:>8,.0f} ns per call')
+
+
+def main() -> None:
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else CALLS
+    logger = logging.getLogger('shop.utils.funcs')
+    product, group = 'apple', 'fruits'
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'shop.log')
+
+        stop_logging()
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        handler = logging.FileHandler(path)
+        handler.setFormatter(logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        ))
+        root.addHandler(handler)
+        root.setLevel(logging.DEBUG)
+        timed('file, f-string', calls, lambda number: logger.info(
+            f'The "{product}" into "{group}" of Basket {number}.'
+        ))
+        root.removeHandler(handler)
+        handler.close()
+
+        for level in ('DEBUG', 'WARNING'):
+            setup_logging(path, level)
+            timed(f'queue, {level}', calls, lambda number: logger.info(
+                'The "%s" into "%s" of Basket %s.', product, group, number
+            ))
+            start = time.perf_counter()
+            stop_logging()
+            print(f'{"":<22} drained in {time.perf_counter() - start:.2f} s')
+    setup_logging()
+
+
+if __name__ == '__main__':
+    main()
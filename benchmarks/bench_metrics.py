@@ -0,0 +1,55 @@
+"""
+Overhead of the metrics on a wrapped flow.
+
+Run from the project root:
+
+    python -m benchmarks.bench_metrics [CALLS]
+
+An empty function is called CALLS times bare, wrapped in a plain
+`try`/`except` like `decortor_exceptions` used to be, and wrapped by
+`decortor_exceptions` with its latency histogram and error counters.
+"""
+import sys
+import time
+import functools
+from shop.helper.exception import ShopError
+from shop.utils.metrics import REGISTRY
+from shop.utils.help_funcs import decortor_exceptions
+
+CALLS = 500_000
+
+
+def timed(name: str, calls: int, func) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    seconds = (time.perf_counter() - start) / calls
+    print(f'{name:<12} {seconds * 1e9:>8,.0f} ns per call')
+    return seconds
+
+
+def untimed(func):
+    @functools.wraps(func)
+    def exception(*args, **kwargs):
+        try:
+            func(*args, **kwargs)
+        except ShopError as e:
+            print(e)
+    return exception
+
+
+def flow() -> None:
+    pass
+
+
+def main() -> None:
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else CALLS
+    timed('bare', calls, flow)
+    plain = timed('try/except', calls, untimed(flow))
+    metered = timed('metered', calls, decortor_exceptions(flow))
+    print(f'{"overhead":<12} {(metered - plain) * 1e9:>8,.0f} ns per call')
+    print(REGISTRY.export().count('\n'), 'metric lines exported')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Pricing a large cart: batched `price_lines` against the per-item loop.
+
+Run from the project root:
+
+    python -m benchmarks.bench_pricing [LINES]
+
+Formatting is timed separately, since `final_invoice` now prices first and
+formats afterwards.
+"""
+import sys
+import time
+import random
+from shop.utils import pricing
+
+LINES = 100_000
+
+
+def legacy_total(prices, numbers, discounts) -> int:
+    total = 0
+    for price, number, discount in zip(prices, numbers, discounts):
+        if not discount:
+            total += number * price
+        else:
+            total += (price - ((price * discount) // 100)) * number
+    return total
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else LINES
+    rng = random.Random(7)
+    prices = [rng.randrange(1_000, 500_000) for _ in range(lines)]
+    numbers = [rng.randrange(1, 20) for _ in range(lines)]
+    discounts = [rng.choice((0, 0, 5, 10, 33)) for _ in range(lines)]
+    names = [f'product-{number}' for number in range(lines)]
+
+    expected, loop_ms = timed(legacy_total, prices, numbers, discounts)
+    (totals, total), batch_ms = timed(
+        pricing.price_lines, prices, numbers, discounts
+    )
+    assert total == expected
+    _, format_ms = timed(
+        pricing.format_invoice,
+        names, numbers, prices, discounts, totals, total,
+    )
+    engine = 'numpy' if pricing.numpy is not None else 'pure python'
+    print(f'{lines:,} lines, engine: {engine}')
+    print(f'per-item loop: {loop_ms:8.2f} ms')
+    print(f'price_lines:   {batch_ms:8.2f} ms')
+    print(f'format:        {format_ms:8.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Load generator for the JSON store server.
+
+Run from the project root:
+
+    python -m benchmarks.bench_server [SESSIONS] [REQUESTS]
+
+A server is started in this process on a free port with a catalog of
+10,000 products. SESSIONS clients connect at once; each browses, searches,
+adds to its cart, prices it and checks out, REQUESTS requests in total.
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+from core.server import start_server
+from shop.models.catalog import Catalog
+
+SESSIONS = 2_000
+REQUESTS = 20
+GROUPS = 100
+PRODUCTS = 100
+
+
+def make_basket() -> Catalog:
+    return Catalog.from_dict({
+        f'group-{group}': {
+            f'product-{group}-{number}': {
+                'price': 1_000 + number,
+                'number': 1_000_000,
+                'discount': number % 5
+            }
+            for number in range(PRODUCTS)
+        }
+        for group in range(GROUPS)
+    })
+
+
+def requests(count: int):
+    for number in range(count):
+        group = random.randrange(GROUPS)
+        product = f'product-{group}-{random.randrange(PRODUCTS)}'
+        kind = number % 5
+        if kind == 0:
+            yield {'op': 'products', 'group': f'group-{group}', 'size': 10}
+        elif kind == 1:
+            yield {'op': 'product', 'product': product}
+        elif kind == 2:
+            yield {'op': 'add', 'product': product, 'number': 1}
+        elif kind == 3:
+            yield {'op': 'total'}
+        else:
+            yield {'op': 'cart'}
+    yield {'op': 'checkout'}
+
+
+async def client(port: int, count: int, latencies: list) -> int:
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    failed = 0
+    for request in requests(count):
+        start = time.perf_counter()
+        writer.write(json.dumps(request).encode() + b'\n')
+        response = json.loads(await reader.readline())
+        latencies.append(time.perf_counter() - start)
+        failed += not response['ok']
+    writer.close()
+    await writer.wait_closed()
+    return failed
+
+
+async def run(sessions: int, count: int) -> None:
+    server = await start_server(make_basket(), port=0)
+    port = server.sockets[0].getsockname()[1]
+    latencies = list()
+    start = time.perf_counter()
+    failed = await asyncio.gather(
+        *(client(port, count, latencies) for _ in range(sessions))
+    )
+    seconds = time.perf_counter() - start
+    server.close()
+    await server.wait_closed()
+    latencies.sort()
+    print(f'{sessions:,} sessions, {len(latencies):,} requests in {seconds:.2f} s')  # noqa E501
+    print(f'throughput: {len(latencies) / seconds:12,.0f} requests/s')
+    print(f'p50: {latencies[len(latencies) // 2] * 1000:.2f} ms, p99: {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms')  # noqa E501
+    print(f'failed: {sum(failed)}')
+
+
+def main() -> None:
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else SESSIONS
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else REQUESTS
+    random.seed(1)
+    asyncio.run(run(sessions, count))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Startup cost: loading a JSON dump against mapping a binary snapshot.
+
+Run from the project root:
+
+    python -m benchmarks.bench_snapshot [SKUS]
+
+Both files are written once into a temporary directory. Each load is timed
+up to the moment the basket can answer a product lookup and price it.
+"""
+import os
+import sys
+import time
+import tempfile
+from shop.models.index import lookup_group
+from shop.models.snapshot import (
+    load_json,
+    save_json,
+    load_snapshot,
+    save_snapshot,
+)
+
+SKUS = 1_000_000
+GROUPS = 100
+
+
+def make_basket(skus: int) -> dict:
+    basket = dict()
+    for number in range(skus):
+        group = f'group-{number % GROUPS}'
+        basket.setdefault(group, dict())[f'product-{number}'] = {
+            'price': 1_000 + number,
+            'number': 10,
+            'discount': number % 5
+        }
+    return basket
+
+
+def ready(load, path: str, product: str) -> float:
+    start = time.perf_counter()
+    basket = load(path)
+    group = lookup_group(product, basket)
+    basket[group][product]['price']
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    skus = int(sys.argv[1]) if len(sys.argv) > 1 else SKUS
+    basket = make_basket(skus)
+    product = f'product-{skus // 2}'
+    with tempfile.TemporaryDirectory() as folder:
+        json_path = os.path.join(folder, 'basket.json')
+        snapshot_path = os.path.join(folder, 'basket.snapshot')
+        save_json(basket, json_path)
+        save_snapshot(basket, snapshot_path)
+        del basket
+        json_time = ready(load_json, json_path, product)
+        snapshot_time = ready(load_snapshot, snapshot_path, product)
+        print(f'{skus:,} SKUs')
+        print(
+            f'json:     {json_time * 1000:10.1f} ms '
+            f'({os.path.getsize(json_path) / 2**20:,.0f} MiB)'
+        )
+        print(
+            f'snapshot: {snapshot_time * 1000:10.1f} ms '
+            f'({os.path.getsize(snapshot_path) / 2**20:,.0f} MiB)'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Cold start of the store: time to the first prompt, with a budget.
+
+Run from the project root:
+
+    python -m benchmarks.bench_startup [RUNS] [--budget MS]
+
+`python run.py` is started RUNS times on a pseudo-terminal, as a kiosk
+session would be, and timed until the main menu prompt appears; then it
+is told to exit. The bare interpreter (`python -c pass`) is timed the same
+way for reference. One more run under `-X importtime` gives the slowest
+imports. The exit status is 1 when the median time to the first prompt
+is over the budget.
+"""
+import os
+import pty
+import sys
+import time
+import argparse
+import subprocess
+
+RUNS = 10
+BUDGET_MS = 100.0
+PROMPT = b'Enter your command'
+TOP_IMPORTS = 15
+
+
+def time_to_prompt() -> float:
+    master, slave = pty.openpty()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, 'run.py'],
+        stdin=slave, stdout=slave, stderr=slave, close_fds=True,
+    )
+    os.close(slave)
+    seen = b''
+    try:
+        while PROMPT not in seen:
+            chunk = os.read(master, 4096)
+            if not chunk:
+                raise RuntimeError('run.py exited before its first prompt.')
+            seen = seen[-len(PROMPT):] + chunk
+        seconds = time.perf_counter() - start
+        os.write(master, b'exit\n')
+        process.wait(timeout=10)
+    finally:
+        if process.poll() is None:
+            process.kill()
+        os.close(master)
+    return seconds
+
+
+def time_interpreter() -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'], check=True)
+    return time.perf_counter() - start
+
+
+def import_times() -> list[tuple[int, int, str]]:
+    """Return (cumulative us, self us, module) of every import of run.py."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', 'run.py', '--script', '-'],
+        input='exit\n', capture_output=True, text=True, check=True,
+    )
+    times = list()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        own, cumulative, module = line[len('import time:'):].split('|')
+        times.append((int(cumulative), int(own), module.rstrip()))
+    return times
+
+
+def median(values: list[float]) -> float:
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Time the cold start.')
+    parser.add_argument('runs', type=int, nargs='?', default=RUNS)
+    parser.add_argument('--budget', type=float, default=BUDGET_MS)
+    args = parser.parse_args()
+
+    interpreter = median([time_interpreter() for _ in range(args.runs)])
+    prompt = median([time_to_prompt() for _ in range(args.runs)])
+    print(f'python -c pass:        {interpreter * 1000:8.1f} ms')
+    print(f'run.py to first prompt: {prompt * 1000:7.1f} ms (median of {args.runs})')  # noqa E501
+
+    times = import_times()
+    print(f'\nslowest imports ({len(times)} modules, cumulative/self us):')
+    for cumulative, own, module in sorted(times, reverse=True)[:TOP_IMPORTS]:
+        print(f'{cumulative:>9,} {own:>9,}  {module}')
+
+    if prompt * 1000 > args.budget:
+        print(f'\nOVER BUDGET: {prompt * 1000:.1f} ms > {args.budget:.0f} ms')
+        sys.exit(1)
+    print(f'\nwithin the {args.budget:.0f} ms budget')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Seeded generators of baskets and shopping lists for the benchmarks.
+
+The same seed always gives the same catalog, so two runs of the suite,
+on two commits, time exactly the same data.
+"""
+import random
+from shop.models.catalog import Catalog
+
+# Baskets above this many SKUs are built as a columnar `Catalog`; nested
+# dicts would need about 1 KB per SKU.
+COLUMNAR_SKUS = 1_000_000
+
+WORDS = (
+    'apple', 'bread', 'butter', 'cheese', 'coffee', 'flour', 'honey',
+    'juice', 'lemon', 'milk', 'olive', 'pasta', 'pepper', 'rice', 'salt',
+    'soap', 'sugar', 'tea', 'tomato', 'water', 'yogurt', 'onion', 'garlic',
+    'cereal', 'cookie', 'chicken', 'salmon', 'carrot', 'potato', 'banana',
+)
+KINDS = ('fresh', 'organic', 'light', 'large', 'small', 'classic', 'spicy')
+
+
+def product_names(skus: int, seed: int = 0):
+    """
+    Yield `skus` distinct product names such as `organic-honey-42`.
+
+    Args:
+        skus (int): How many names to yield.
+        seed (int): The random seed.
+
+    Yields:
+        str: A product name.
+    """
+    rng = random.Random(seed)
+    for number in range(skus):
+        yield f'{rng.choice(KINDS)}-{rng.choice(WORDS)}-{number}'
+
+
+def make_basket(
+        skus: int,
+        groups: int,
+        seed: int = 0,
+        columnar: bool | None = None
+) -> dict:
+    """
+    Build a basket of `skus` products spread over `groups` groups.
+
+    Products go round-robin over the groups, so every group holds about the same number. Prices, stock and discounts are drawn from `seed`. # noqa E501
+
+    Args:
+        skus (int): The number of products, from 10 to 10M.
+        groups (int): The number of groups, from 1 to 1,000.
+        seed (int): The random seed.
+        columnar (bool | None): Build a `Catalog` instead of nested dicts; by default only above `COLUMNAR_SKUS`. # noqa E501
+
+    Returns:
+        dict: A basket shaped like `shop.helper.type_hint.Basket`.
+    """
+    if columnar is None:
+        columnar = skus > COLUMNAR_SKUS
+    rng = random.Random(seed)
+    names = [f'group-{number}' for number in range(groups)]
+    basket = Catalog() if columnar else dict()
+    for name in names:
+        basket[name] = dict()
+    for number, product in enumerate(product_names(skus, seed)):
+        basket[names[number % groups]][product] = {
+            'price': rng.randrange(1_000, 500_000),
+            'number': rng.randrange(1, 1_000),
+            'discount': rng.choice((0, 0, 0, 5, 10, 25)),
+        }
+    return basket
+
+
+def make_shopping_list(basket: dict, lines: int, seed: int = 0) -> dict:
+    """
+    Pick `lines` different products of a basket with a number of each.
+
+    Args:
+        basket (dict): A basket from `make_basket`.
+        lines (int): The number of lines; at most every product once.
+        seed (int): The random seed.
+
+    Returns:
+        dict: A shopping list of product -> number.
+    """
+    rng = random.Random(seed)
+    products = [product for items in basket.values() for product in items]
+    chosen = rng.sample(products, min(lines, len(products)))
+    return {product: rng.randrange(1, 10) for product in chosen}
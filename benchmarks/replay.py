@@ -0,0 +1,242 @@
+"""
+Replay recorded operator sessions as concurrent load on one basket.
+
+Record sessions with `python run.py --record session.jsonl`, then run
+from the project root:
+
+    python -m benchmarks.replay SESSION [SESSION ...] [--sessions 100]
+                                [--speed 10] [--output run.json]
+
+`--sessions` simulated operators each replay one of the files, round
+robin, through `core.app.main` against one shared basket, waiting the
+recorded think time between answers divided by `--speed` (0 replays flat
+out). As in the JSON server, one command runs to completion before
+another session's command starts; a session only steps aside while it
+"thinks". The latency of a command is the time from its answer to the
+next prompt, without waiting for a turn.
+
+The same sessions are then replayed one after another on a fresh copy of
+the basket. Every product whose final stock differs between the two runs
+is reported as a divergence and the exit status is 1.
+"""
+import io
+import sys
+import json
+import time
+import argparse
+import threading
+import contextlib
+from core import app
+from shop.helper.const import (
+    BACK_COMMANDS,
+    EXIT_COMMANDS,
+    ADMIN_COMMANDS,
+    STORE_COMMANDS,
+)
+from shop.utils.headless import EndOfScript
+from shop.utils.recorder import read_session
+from shop.utils.help_funcs import set_headless
+
+SESSIONS = 100
+SPEED = 10.0
+# Answers reported under their own name; anything else (names, numbers,
+# prices) is reported as `other`.
+COMMANDS = frozenset(
+    ('admin', 'store', 'edit')
+    + STORE_COMMANDS + ADMIN_COMMANDS + BACK_COMMANDS + EXIT_COMMANDS
+)
+
+
+class Player:
+    """One simulated operator replaying a recorded session."""
+
+    def __init__(self, records: list[dict]) -> None:
+        self.records = records
+        self.step = 0
+        self.errors = 0
+        self.latencies: dict[str, list[float]] = dict()
+        self._answered = None
+        self._command = None
+
+    def measured(self) -> None:
+        """Charge the time since the last answer to its command."""
+        if self._answered is not None:
+            latency = time.perf_counter() - self._answered
+            self.latencies.setdefault(self._command, list()).append(latency)
+            self._answered = None
+
+    def answered(self, answer: str) -> None:
+        command = answer.strip().casefold()
+        self._command = command if command in COMMANDS else 'other'
+        self._answered = time.perf_counter()
+
+
+class Replay:
+    """
+    Plays many `Player`s against one basket, one command at a time.
+
+    It stands in for a `shop.utils.headless.Headless` session: `ask` finds the player of the calling thread, lets the other players run while it waits out the recorded think time, and answers with the next recorded input. # noqa E501
+    """
+
+    def __init__(self, basket, players: list[Player], speed: float) -> None:
+        self.basket = basket
+        self.players = players
+        self.speed = speed
+        self.screen = io.StringIO()
+        self._turn = threading.Lock()
+        self._local = threading.local()
+
+    def ask(self, message: str) -> str:
+        """Answer a prompt with the next recorded input of this thread's player."""  # noqa E501
+        player = self._local.player
+        player.measured()
+        self._check_errors(player)
+        if player.step >= len(player.records):
+            raise EndOfScript
+        record = player.records[player.step]
+        previous = player.records[player.step - 1]['time'] if player.step else record['time']  # noqa E501
+        player.step += 1
+        self._turn.release()
+        try:
+            if self.speed > 0:
+                time.sleep(max(0.0, record['time'] - previous) / self.speed)
+        finally:
+            self._turn.acquire()
+        player.answered(record['input'])
+        return record['input']
+
+    def _check_errors(self, player: Player) -> None:
+        text = self.screen.getvalue()
+        if text:
+            player.errors += text.count('Error:')
+            self.screen.seek(0)
+            self.screen.truncate()
+
+    def _play(self, player: Player) -> None:
+        self._local.player = player
+        with self._turn:
+            try:
+                app.main(self.basket)
+            except EndOfScript:
+                pass
+            finally:
+                player.measured()
+                self._check_errors(player)
+
+    def run(self) -> float:
+        """Play every player to the end; return the wall time in seconds."""
+        threads = [
+            threading.Thread(target=self._play, args=(player,), daemon=True)
+            for player in self.players
+        ]
+        set_headless(self)
+        start = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(self.screen):
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+        finally:
+            set_headless(None)
+        return time.perf_counter() - start
+
+
+def copy_basket(basket) -> dict:
+    return {
+        group: {product: dict(details) for product, details in items.items()}
+        for group, items in basket.items()
+    }
+
+
+def stock_levels(basket) -> dict[str, int]:
+    return {
+        f'{group}/{product}': details['number']
+        for group, items in basket.items()
+        for product, details in items.items()
+    }
+
+
+def percentile(ordered: list[float], share: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def report(players: list[Player], seconds: float) -> dict:
+    latencies: dict[str, list[float]] = dict()
+    for player in players:
+        for command, values in player.latencies.items():
+            latencies.setdefault(command, list()).extend(values)
+    commands = dict()
+    for command, values in sorted(latencies.items()):
+        values.sort()
+        commands[command] = {
+            'count': len(values),
+            'p50_ms': round(percentile(values, 0.50) * 1000, 3),
+            'p99_ms': round(percentile(values, 0.99) * 1000, 3),
+            'max_ms': round(values[-1] * 1000, 3),
+        }
+    total = sum(command['count'] for command in commands.values())
+    return {
+        'sessions': len(players),
+        'commands': total,
+        'errors': sum(player.errors for player in players),
+        'seconds': round(seconds, 3),
+        'commands_per_sec': round(total / seconds, 1) if seconds else None,
+        'latency': commands,
+    }
+
+
+def divergence(expected: dict[str, int], actual: dict[str, int]) -> dict:
+    return {
+        product: {'serial': expected.get(product), 'replay': actual.get(product)}  # noqa E501
+        for product in sorted(expected.keys() | actual.keys())
+        if expected.get(product) != actual.get(product)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Replay recorded sessions.')
+    parser.add_argument('files', nargs='+', metavar='SESSION')
+    parser.add_argument('--sessions', type=int, default=SESSIONS)
+    parser.add_argument('--speed', type=float, default=SPEED)
+    parser.add_argument('--output', help='write the JSON report here')
+    args = parser.parse_args()
+
+    recorded = [read_session(path) for path in args.files]
+    scripts = [
+        recorded[number % len(recorded)] for number in range(args.sessions)
+    ]
+    loaded, durable = app.load_basket()
+    try:
+        start = copy_basket(loaded)
+    finally:
+        if durable is not None:
+            durable.close()
+
+    players = [Player(records) for records in scripts]
+    shared = copy_basket(start)
+    result = report(players, Replay(shared, players, args.speed).run())
+
+    serial = copy_basket(start)
+    for records in scripts:
+        Replay(serial, [Player(records)], 0).run()
+    result['divergence'] = divergence(stock_levels(serial), stock_levels(shared))  # noqa E501
+
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+    for product, levels in result['divergence'].items():
+        print(
+            f'DIVERGENCE {product}: serial {levels["serial"]}, '
+            f'replay {levels["replay"]}',
+            file=sys.stderr,
+        )
+    if result['divergence']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
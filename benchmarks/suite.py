@@ -0,0 +1,280 @@
+"""
+Benchmark suite for the pure logic of the store.
+
+Run from the project root:
+
+    python -m benchmarks.suite [--skus 10 1000 100000] [--groups 1 10 100]
+                               [--lines 50] [--seconds 0.5] [--seed 0]
+                               [--output run.json] [--baseline base.json]
+                               [--threshold 0.1]
+
+For every basket size (`--skus` x `--groups`, from `benchmarks.generators`)
+each case is called for `--seconds`, timing every call on its own. The
+result is one JSON document with ops/sec, p50 and p99 latency and the peak
+memory allocated by a call, per case and size. `input()` is never reached:
+prompts end the run with `EndOfScript` and printed output is thrown away.
+
+With `--baseline`, the run is compared against an earlier `--output` file
+and a case whose ops/sec fell, or whose p99 rose, by more than
+`--threshold` is reported; the exit status is then 1. Set
+SHOP_LOG_LEVEL=WARNING to keep the lookups' INFO records out of the timing.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import contextlib
+import tracemalloc
+from shop.models.group import (
+    check_valid_group,
+    get_group_by_product_name,
+)
+from shop.models.product import get_of_product
+from shop.utils.funcs import (
+    total_counter,
+    final_invoice,
+    search_in_list,
+)
+from shop.utils.invoice import InvoiceBook
+from shop.utils.headless import Headless
+from shop.utils.help_funcs import set_headless
+from benchmarks.generators import (
+    WORDS,
+    make_basket,
+    make_shopping_list,
+)
+
+SKUS = (10, 1_000, 100_000)
+GROUPS = (1, 10, 100)
+LINES = 50
+SECONDS = 0.5
+THRESHOLD = 0.1
+# Calls made under tracemalloc to find the peak memory of a case.
+MEMORY_CALLS = 20
+
+
+def lookup_case(basket: dict, shopping_list: dict, rng: random.Random):
+    products = list(shopping_list)
+
+    def run() -> None:
+        get_group_by_product_name(rng.choice(products), basket)
+    return run
+
+
+def checkout_case(basket: dict, shopping_list: dict, rng: random.Random):
+    def run() -> None:
+        invoice = InvoiceBook()
+        total_counter(shopping_list, basket, invoice)
+        final_invoice(invoice, 0)
+    return run
+
+
+def search_case(basket: dict, shopping_list: dict, rng: random.Random):
+    def run() -> None:
+        search_in_list(shopping_list, rng.choice(WORDS))
+    return run
+
+
+def product_case(basket: dict, shopping_list: dict, rng: random.Random):
+    groups = list(basket)
+
+    def run() -> None:
+        group = rng.choice(groups)
+        get_of_product(rng.randint(1, len(basket[group]) + 1), basket, group)
+    return run
+
+
+def group_case(basket: dict, shopping_list: dict, rng: random.Random):
+    choices = [str(number) for number in range(1, len(basket) + 2)]
+    choices += list(basket) + ['no-such-group']
+
+    def run() -> None:
+        check_valid_group(rng.choice(choices), basket)
+    return run
+
+
+# Case name -> factory(basket, shopping_list, rng) returning the call to time.
+CASES = {
+    'get_group_by_product_name': lookup_case,
+    'total_counter+final_invoice': checkout_case,
+    'search_in_list': search_case,
+    'get_of_product': product_case,
+    'check_valid_group': group_case,
+}
+
+
+def percentile(ordered: list[int], share: float) -> int:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def measure(run, seconds: float) -> dict:
+    """
+    Time `run` again and again for `seconds`, then once more under tracemalloc. # noqa E501
+
+    Args:
+        run: The call to time.
+        seconds (float): How long to keep calling it.
+
+    Returns:
+        dict: ops_per_sec, p50_ns, p99_ns, calls and peak_bytes.
+    """
+    clock = time.perf_counter_ns
+    samples = list()
+    deadline = clock() + int(seconds * 1e9)
+    started = clock()
+    while True:
+        start = clock()
+        run()
+        end = clock()
+        samples.append(end - start)
+        if end >= deadline:
+            break
+    elapsed = clock() - started
+    samples.sort()
+
+    tracemalloc.start()
+    for _ in range(MEMORY_CALLS):
+        run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'ops_per_sec': round(len(samples) / (elapsed / 1e9), 1),
+        'p50_ns': percentile(samples, 0.50),
+        'p99_ns': percentile(samples, 0.99),
+        'calls': len(samples),
+        'peak_bytes': peak,
+    }
+
+
+def clock_overhead() -> int:
+    clock = time.perf_counter_ns
+    samples = sorted(-clock() + clock() for _ in range(10_001))
+    return percentile(samples, 0.50)
+
+
+def run_suite(
+        skus=SKUS,
+        groups=GROUPS,
+        lines: int = LINES,
+        seconds: float = SECONDS,
+        seed: int = 0,
+        cases=None
+) -> dict:
+    """
+    Run every case on every basket size.
+
+    Args:
+        skus: The basket sizes, in products.
+        groups: The numbers of groups.
+        lines (int): The lines of the shopping list.
+        seconds (float): The time spent on each case and size.
+        seed (int): The seed of the generated data.
+        cases: The names of the cases to run; all of `CASES` by default.
+
+    Returns:
+        dict: `meta` about the run and `results` keyed `case/SKUSxGROUPS`.
+    """
+    results = dict()
+    with open(os.devnull, 'w') as devnull:
+        set_headless(Headless((), devnull))
+        try:
+            for size in skus:
+                for count in groups:
+                    basket = make_basket(size, count, seed)
+                    shopping_list = make_shopping_list(basket, lines, seed)
+                    for name in cases or CASES:
+                        run = CASES[name](
+                            basket, shopping_list, random.Random(seed)
+                        )
+                        with contextlib.redirect_stdout(devnull):
+                            result = measure(run, seconds)
+                        key = f'{name}/{size}x{count}'
+                        results[key] = result
+                        print(
+                            f'{key:<48} {result["ops_per_sec"]:>14,.0f} ops/s'
+                            f' p50 {result["p50_ns"]:>10,} ns'
+                            f' p99 {result["p99_ns"]:>10,} ns',
+                            file=sys.stderr,
+                        )
+                    del basket, shopping_list
+        finally:
+            set_headless(None)
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'seed': seed,
+            'lines': lines,
+            'seconds': seconds,
+            'clock_ns': clock_overhead(),
+        },
+        'results': results,
+    }
+
+
+def compare(run: dict, baseline: dict, threshold: float = THRESHOLD) -> list[str]:  # noqa E501
+    """
+    List the cases of `run` that regressed against `baseline`.
+
+    Args:
+        run (dict): A result of `run_suite`.
+        baseline (dict): An earlier result of `run_suite`.
+        threshold (float): The share a number may get worse by, 0.1 for 10%. # noqa E501
+
+    Returns:
+        list[str]: One message per regression; cases missing from either side are skipped. # noqa E501
+    """
+    regressions = list()
+    for key, result in run['results'].items():
+        base = baseline['results'].get(key)
+        if base is None:
+            continue
+        if result['ops_per_sec'] < base['ops_per_sec'] * (1 - threshold):
+            regressions.append(
+                f'{key}: {result["ops_per_sec"]:,.0f} ops/s, '
+                f'baseline {base["ops_per_sec"]:,.0f}'
+            )
+        if result['p99_ns'] > base['p99_ns'] * (1 + threshold):
+            regressions.append(
+                f'{key}: p99 {result["p99_ns"]:,} ns, '
+                f'baseline {base["p99_ns"]:,}'
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the store logic.')
+    parser.add_argument('--skus', type=int, nargs='+', default=SKUS)
+    parser.add_argument('--groups', type=int, nargs='+', default=GROUPS)
+    parser.add_argument('--lines', type=int, default=LINES)
+    parser.add_argument('--seconds', type=float, default=SECONDS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--case', action='append', choices=list(CASES))
+    parser.add_argument('--output', help='write the JSON result here')
+    parser.add_argument('--baseline', help='compare against this result')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    run = run_suite(
+        args.skus, args.groups, args.lines, args.seconds, args.seed, args.case
+    )
+    text = json.dumps(run, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(run, json.load(file), args.threshold)
+        for message in regressions:
+            print(f'REGRESSION {message}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,111 @@
+import os
+import queue
+import atexit
 import logging
-
-logging.basicConfig(
-    filename='shop.log',
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    filemode='a'
+from logging.handlers import (
+    QueueHandler,
+    QueueListener,
+    RotatingFileHandler,
 )
+
+LOG_FILE = 'shop.log'
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_LEVEL = 'DEBUG'
+# Rotate `shop.log` at 5 MB and keep three old files.
+MAX_BYTES = 5 * 1024 * 1024
+BACKUPS = 3
+
+_listener: QueueListener | None = None
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Put records on the queue without formatting them.
+
+    The stock `QueueHandler` merges the message and its arguments in the calling thread. Here the record is queued as it is and the listener thread does all the formatting; only a traceback is rendered up front, because it can not outlive the `except` block. # noqa E501
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(
+                    record.exc_info
+                )
+            record.exc_info = None
+        return record
+
+
+def parse_levels(text: str) -> dict[str, str]:
+    """
+    Read per-module levels such as `shop.models.search=INFO,core=WARNING`.
+
+    Args:
+        text (str): Comma separated `logger=LEVEL` pairs.
+
+    Returns:
+        dict[str, str]: The level of each logger.
+    """
+    levels = dict()
+    for pair in text.split(','):
+        name, _, level = pair.partition('=')
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(
+        path: str = LOG_FILE,
+        level: str | None = None,
+        levels: dict[str, str] | None = None,
+        max_bytes: int = MAX_BYTES,
+        backups: int = BACKUPS
+) -> None:
+    """
+    Send every log record through a queue to a rotating file.
+
+    Callers only append the record to the queue; a background thread formats it and writes the file. `SHOP_LOG_LEVEL` sets the root level and `SHOP_LOG_LEVELS` the level of single modules, e.g. `SHOP_LOG_LEVEL=WARNING SHOP_LOG_LEVELS=core.server=INFO`. Calling it again replaces the previous setup. # noqa E501
+
+    Args:
+        path (str): The log file.
+        level (str | None): The root level; `SHOP_LOG_LEVEL` or DEBUG by default. # noqa E501
+        levels (dict[str, str] | None): Levels of single loggers; `SHOP_LOG_LEVELS` by default. # noqa E501
+        max_bytes (int): The size at which the file is rotated.
+        backups (int): How many rotated files are kept.
+
+    Returns:
+        None
+    """
+    global _listener
+    stop_logging()
+    if level is None:
+        level = os.environ.get('SHOP_LOG_LEVEL', LOG_LEVEL)
+    if levels is None:
+        levels = parse_levels(os.environ.get('SHOP_LOG_LEVELS', ''))
+    handler = RotatingFileHandler(
+        path, maxBytes=max_bytes, backupCount=backups, delay=True
+    )
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    records = queue.SimpleQueue()
+    root = logging.getLogger()
+    for old in root.handlers[:]:
+        root.removeHandler(old)
+    root.addHandler(DeferredQueueHandler(records))
+    root.setLevel(level.upper())
+    for name, module_level in levels.items():
+        logging.getLogger(name).setLevel(module_level)
+    _listener = QueueListener(records, handler)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Write the queued records and stop the background writer."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
+setup_logging()
@@ -1 +1,9 @@
-from .app import main
+from shop.helper.lazy import lazy_exports
+
+# Submodule -> the names it exports, imported on first use.
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    'app': (
+        'main',
+        'load_basket',
+    ),
+})
@@ -1,14 +1,26 @@
+import os
+import atexit
 import logging
 from conf.log import *
-from shop.models.admin import admin_menu
-from shop.models.store import store_menu
-from shop.helper.const import EXIT_COMMANDS
+from shop import models
+from shop.models.catalog import Catalog
+from shop.utils.metrics import write_metrics
+from shop.utils.profiling import (
+    arm,
+    PROFILE_DIR,
+    parse_profiles,
+)
+from shop.helper.const import (
+    EXIT_COMMANDS,
+    SNAPSHOT_FILE,
+)
 from shop.helper.type_hint import (
     Total,
     Basket,
     ShoppingList,
 )
 from shop.utils.help_funcs import (
+    ask,
     title,
     show_help,
     clear_screen,
@@ -17,8 +29,18 @@ from shop.utils.help_funcs import (
 logger = logging.getLogger(__name__)
 
 
-def main():
-    basket: Basket = {
+def load_basket() -> tuple[Basket, 'models.DurableBasket | None']:
+    """
+    Build the basket the application works on.
+
+    Storage modules are imported through the lazy `shop.models` package, so only the one in use is loaded. # noqa E501
+
+    The built-in basket is used unless `SHOP_JOURNAL`, `SHOP_DATABASE` or a saved snapshot says otherwise. With `SHOP_EVENTS` its changes are also written to a binary event log, with `SHOP_METRICS` the metrics are written to that file on exit, and `SHOP_PROFILE` arms command profiles. # noqa E501
+
+    Returns:
+        tuple[Basket, DurableBasket | None]: The basket and, for a journaled basket, the `DurableBasket` to close on exit. # noqa E501
+    """
+    basket: Basket = Catalog.from_dict({
         'fruits': {
             'apple': {
                 'price': 15_000,
@@ -70,19 +92,70 @@ def main():
                 'discount': 0
             },
         }
-    }
-    # basket: Basket = dict()
+    })
+    # basket: Basket = Catalog()
+    database = os.environ.get('SHOP_DATABASE')
+    journal = os.environ.get('SHOP_JOURNAL')
+    durable = None
+    if journal:
+        durable = models.DurableBasket(journal, basket)
+        basket = durable.basket
+        logger.info('The basket is journaled in "%s".', journal)
+    elif database:
+        store = models.SQLiteBasket(database)
+        if not store:
+            for group in basket:
+                store[group] = basket[group]
+        basket = store
+        logger.info('The basket is stored in "%s".', database)
+    elif os.path.exists(SNAPSHOT_FILE):
+        basket = models.load_snapshot(SNAPSHOT_FILE)
+        logger.info('The basket is loaded from "%s".', SNAPSHOT_FILE)
+    events = os.environ.get('SHOP_EVENTS')
+    if events:
+        models.open_events(events, models.parse_rates(os.environ.get('SHOP_EVENT_RATES', '')))  # noqa E501
+        models.watch_basket(basket)
+    metrics = os.environ.get('SHOP_METRICS')
+    if metrics:
+        atexit.register(write_metrics, metrics)
+    directory = os.environ.get('SHOP_PROFILE_DIR', PROFILE_DIR)
+    for name, count in parse_profiles(os.environ.get('SHOP_PROFILE', '')).items():  # noqa E501
+        arm(name, count, directory)
+    return basket, durable
+
+
+def main(basket: Basket | None = None):
+    """
+    Run the main menu until the user exits.
+
+    Args:
+        basket (Basket | None): The basket to work on; `load_basket` builds one by default. # noqa E501
+
+    Returns:
+        None
+    """
+    durable = None
+    if basket is None:
+        basket, durable = load_basket()
     shopping_list: ShoppingList = dict()
     total: Total = 0
-    while True:
-        message = 'Enter your command "Admin" or "Store": '
-        clear_screen()
-        print(title('Main Menu'))
-        show_help()
-        command = input(message).casefold()
-        if command in EXIT_COMMANDS:
-            break
-        elif command == 'admin':
-            admin_menu(basket)
-        elif command == 'store':
-            store_menu(basket, shopping_list, total)
+    try:
+        while True:
+            message = 'Enter your command "Admin" or "Store": '
+            clear_screen()
+            print(title('Main Menu'))
+            show_help()
+            command = ask(message).casefold()
+            if command in EXIT_COMMANDS:
+                break
+            elif command == 'admin':
+                models.admin_menu(basket)
+            elif command == 'store':
+                models.store_menu(basket, shopping_list, total)
+            elif command.startswith('profile '):
+                # Hidden: `profile store:total 3` profiles the next 3 runs.
+                name, _, count = command[8:].strip().partition(' ')
+                arm(name, int(count) if count.isnumeric() else 1)
+    finally:
+        if durable is not None:
+            durable.close()
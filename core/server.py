@@ -0,0 +1,501 @@
+import json
+import asyncio
+import logging
+import itertools
+from shop.utils.pager import Pager
+from shop.utils.metrics import (
+    Timer,
+    gauge,
+    counter,
+    histogram,
+    REGISTRY,
+)
+from shop.utils.invoice import InvoiceBook
+from shop.utils.pricing import net_lines
+from shop.models.index import lookup_group
+from shop.models.events import emit
+from shop.models.search import search_products
+from shop.models.versions import (
+    pin,
+    net_price,
+)
+from shop.models.importer import validate_record
+from shop.models.holds import (
+    TICK,
+    holds,
+)
+from shop.models.inventory import stock
+from shop.models.catalog import FIELDS
+from shop.models.basket import (
+    set_field,
+    insert_group,
+    remove_group,
+    rename_group,
+    insert_product,
+    rename_product,
+)
+from shop.helper.exception import (
+    ShopError,
+    NotNumber,
+    GroupNameError,
+    ProductNameError,
+    ProductDoesExist,
+    GroupDoesNotExist,
+    ProductDoesNotExist,
+)
+from shop.helper.const import (
+    HOST,
+    PORT,
+    PAGE_SIZE,
+    MAX_NUMBER,
+    BACK_COMMANDS,
+    WRONG_COMMANDS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Longest request line; a client sending more is cut off.
+LINE_LIMIT = 1 << 20
+
+_sessions = itertools.count(1)
+SESSIONS = gauge('shop_sessions', 'Open server sessions.').labels()
+REQUESTS = histogram(
+    'shop_request_seconds', 'Time spent answering a server request.', ('op',)
+)
+FAILURES = counter(
+    'shop_request_errors_total',
+    'Server requests that failed, by op and exception class.',
+    ('op', 'error'),
+)
+# Expiry tasks of the running servers; the loop only keeps weak references.
+_expiry: set[asyncio.Task] = set()
+
+
+class Session:
+    """
+    One connection: its own cart on top of the shared basket.
+
+    The cart holds reserved stock. It is handed back to the basket when a line expires or the connection closes without a `checkout`. # noqa E501
+    """
+
+    __slots__ = ('id', 'basket', 'cart')
+
+    def __init__(self, basket: dict) -> None:
+        self.id = next(_sessions)
+        self.basket = basket
+        self.cart: dict[str, int] = dict()
+        SESSIONS.inc()
+
+    def release(self) -> None:
+        """Put everything still in the cart back into stock."""
+        holds(self.basket).abandon(self.cart)
+        SESSIONS.dec()
+
+
+def _text(request: dict, key: str, error: type[ShopError]) -> str:
+    value = request.get(key)
+    if not isinstance(value, str):
+        raise error(f'"{key}" must be a string.')
+    value = value.strip().casefold()
+    if value in WRONG_COMMANDS or value in BACK_COMMANDS or value.isnumeric():
+        raise error(f'Cannot use "{value}" as a name.')
+    return value
+
+
+def _count(request: dict, key: str, default: int | None = None) -> int:
+    value = request.get(key, default)
+    if type(value) is not int or not 0 <= value <= MAX_NUMBER:
+        raise NotNumber(f'"{key}" must be a positive int up to {MAX_NUMBER}.')  # noqa E501
+    return value
+
+
+def _group(session: Session, request: dict) -> str:
+    group = _text(request, 'group', GroupNameError)
+    if group not in session.basket:
+        raise GroupDoesNotExist(f'The `{group}` is not in groups.')
+    return group
+
+
+def _product(session: Session, request: dict) -> tuple[str, str]:
+    product = _text(request, 'product', ProductNameError)
+    if 'group' in request:
+        group = _group(session, request)
+        if product not in session.basket[group]:
+            raise ProductDoesNotExist(f'The {product} not exist in {group}.')
+        return group, product
+    group = lookup_group(product, session.basket)
+    if group is None:
+        raise ProductDoesNotExist(f'The {product} not exist in basket.')
+    return group, product
+
+
+def _pager(request: dict) -> Pager:
+    pager = Pager(max(1, _count(request, 'size', PAGE_SIZE)))
+    pager.start = max(0, _count(request, 'page', 1) - 1) * pager.size
+    word = request.get('filter')
+    if isinstance(word, str):
+        pager.word = word.casefold()
+    return pager
+
+
+def _details(basket: dict, group: str, product: str) -> dict:
+    details = basket[group][product]
+    result = {field: details[field] for field in FIELDS}
+    result['net'] = net_price(basket, group, product)
+    return result
+
+
+def op_groups(session: Session, request: dict):
+    pager = _pager(request)
+    basket = session.basket
+    return {
+        'total': len(basket),
+        'groups': [group for _, group in pager.entries(basket)],
+    }
+
+
+def op_products(session: Session, request: dict):
+    pager = _pager(request)
+    group = _group(session, request)
+    items = session.basket[group]
+    return {
+        'total': len(items),
+        'products': [
+            {'position': position, 'product': product, **_details(session.basket, group, product)}  # noqa E501
+            for position, product in pager.entries(items)
+        ],
+    }
+
+
+def op_product(session: Session, request: dict):
+    group, product = _product(session, request)
+    return {
+        'group': group,
+        'product': product,
+        **_details(session.basket, group, product),
+    }
+
+
+def op_search(session: Session, request: dict):
+    word = request.get('word')
+    if not isinstance(word, str) or not word.strip():
+        raise ProductNameError('"word" must be a string.')
+    limit = max(1, _count(request, 'limit', 10))
+    return [
+        {'product': product, 'group': group, 'score': round(score, 3)}
+        for product, group, score in search_products(session.basket, word, limit)  # noqa E501
+    ]
+
+
+def op_cart(session: Session, request: dict):
+    return session.cart
+
+
+def op_add(session: Session, request: dict):
+    group, product = _product(session, request)
+    number = _count(request, 'number')
+    if not number:
+        raise NotNumber('"number" must be at least 1.')
+    if not holds(session.basket).hold(session.cart, group, product, number):
+        left = stock(session.basket, group, product)
+        raise ProductDoesNotExist(
+            f'Sorry, the "{product}" product has only "{left}" items in stock.'  # noqa E501
+        )
+    return {
+        'cart': session.cart[product],
+        'stock': stock(session.basket, group, product),
+    }
+
+
+def op_remove(session: Session, request: dict):
+    product = _text(request, 'product', ProductNameError)
+    if product not in session.cart:
+        raise ProductDoesNotExist(f'The {product} is not in shopping list.')
+    number = _count(request, 'number', session.cart[product])
+    if number > session.cart[product]:
+        raise ProductDoesNotExist(
+            'The number of requests to delete is greater than the number available.'  # noqa E501
+        )
+    holds(session.basket).drop(session.cart, product, number)
+    return {'cart': session.cart.get(product, 0)}
+
+
+def _invoice(session: Session) -> tuple[dict, list]:
+    # The invoice, and the cart lines left out of it because their product
+    # was gone at the pinned version.
+    invoice = InvoiceBook()
+    skipped = list()
+    with pin(session.basket) as snapshot:
+        priced = list()
+        groups = dict()
+        for product, key, number in holds(session.basket).lines(session.cart):
+            if key is None:
+                record = snapshot.find(product)
+            else:
+                record = snapshot.record(key)
+            if record is None:
+                skipped.append((product, key, number))
+                continue
+            priced.append((product, number, record))
+            groups.setdefault(product, set()).add(record[0])
+    for product, number, (group, price, discount, net) in priced:
+        if len(groups[product]) > 1:
+            product = f'{product} ({group})'
+        invoice.add(product, number, price, discount, net)
+    names, numbers, prices, discounts, nets = invoice.columns()
+    lines, total = net_lines(nets, numbers)
+    return {
+        'lines': [
+            {
+                'product': name,
+                'number': number,
+                'price': price,
+                'discount': discount,
+                'total': line,
+            }
+            for name, number, price, discount, line in zip(
+                names, numbers, prices, discounts, lines
+            )
+        ],
+        'total': total,
+    }, skipped
+
+
+def op_total(session: Session, request: dict):
+    return _invoice(session)[0]
+
+
+def op_checkout(session: Session, request: dict):
+    invoice, skipped = _invoice(session)
+    book = holds(session.basket)
+    for product, key, number in skipped:
+        logger.warning('Session %s: "%s" is gone; left out of checkout.', session.id, product)  # noqa E501
+        book.drop(session.cart, product, number, key)
+    book.confirm(session.cart)
+    emit(
+        'checkout',
+        len(invoice['lines']),
+        sum(line['number'] for line in invoice['lines']),
+        invoice['total']
+    )
+    session.cart.clear()
+    logger.info('Session %s checked out %d.', session.id, invoice["total"])
+    return invoice
+
+
+def op_metrics(session: Session, request: dict):
+    return REGISTRY.export()
+
+
+def op_add_group(session: Session, request: dict):
+    group = _text(request, 'group', GroupNameError)
+    if group in session.basket:
+        raise GroupNameError(f'The `{group}` group already exists.')
+    insert_group(session.basket, group)
+    return {'group': group}
+
+
+def op_add_product(session: Session, request: dict):
+    group, product, details = validate_record(request)
+    if group not in session.basket:
+        raise GroupDoesNotExist(f'The `{group}` is not in groups.')
+    if product in session.basket[group]:
+        raise ProductDoesExist(f'This {product} is exist in {group} group.')
+    insert_product(session.basket, group, product, details)
+    return {'group': group, 'product': product, **details}
+
+
+def op_rename_group(session: Session, request: dict):
+    group = _group(session, request)
+    new_group = _text(request, 'new_group', GroupNameError)
+    if new_group != group and new_group in session.basket:
+        raise GroupNameError(f'The `{new_group}` group already exists.')
+    rename_group(session.basket, group, new_group)
+    return {'group': new_group}
+
+
+def op_rename_product(session: Session, request: dict):
+    group, product = _product(session, request)
+    new_product = _text(request, 'new_product', ProductNameError)
+    if new_product != product and new_product in session.basket[group]:
+        raise ProductDoesExist(
+            f'This {new_product} is exist in {group} group.'
+        )
+    rename_product(session.basket, group, product, new_product)
+    return {'group': group, 'product': new_product}
+
+
+def op_set_field(session: Session, request: dict):
+    group, product = _product(session, request)
+    field = request.get('field')
+    if field not in FIELDS:
+        raise ProductDoesNotExist(f'"field" must be one of {FIELDS}.')
+    value = _count(request, 'value')
+    if field == 'price' and not value:
+        raise NotNumber('The price cannot be zero.')
+    if field == 'discount' and not 1 <= value <= 100:
+        raise NotNumber(
+            'The discount percentage must be a number between 1 and 100.'
+        )
+    set_field(session.basket, group, product, field, value)
+    return {'group': group, 'product': product, field: value}
+
+
+def op_remove_group(session: Session, request: dict):
+    group = _group(session, request)
+    remove_group(session.basket, group)
+    return {'group': group}
+
+
+OPERATIONS = {
+    'groups': op_groups,
+    'products': op_products,
+    'product': op_product,
+    'search': op_search,
+    'cart': op_cart,
+    'add': op_add,
+    'remove': op_remove,
+    'total': op_total,
+    'checkout': op_checkout,
+    'metrics': op_metrics,
+    'add_group': op_add_group,
+    'add_product': op_add_product,
+    'rename_group': op_rename_group,
+    'rename_product': op_rename_product,
+    'set_field': op_set_field,
+    'remove_group': op_remove_group,
+}
+
+
+def handle_request(session: Session, line: bytes) -> dict:
+    """
+    Run one request line and build its response.
+
+    A request is a JSON object with an `op` (a key of `OPERATIONS`) and its arguments, plus an optional `id` that is echoed back. The response holds `ok` and either `result` or `error`. # noqa E501
+
+    Args:
+        session (Session): The connection the request came from.
+        line (bytes): The request line.
+
+    Returns:
+        dict: The response.
+    """
+    try:
+        request = json.loads(line)
+    except ValueError as error:
+        return {'ok': False, 'error': f'Broken JSON: {error}'}
+    if not isinstance(request, dict):
+        return {'ok': False, 'error': 'The request must be a JSON object.'}
+    response = {'id': request.get('id')}
+    op = request.get('op')
+    operation = OPERATIONS.get(op) if isinstance(op, str) else None
+    if operation is None:
+        response.update(ok=False, error=f'Unknown op {op!r}.')
+        return response
+    try:
+        with Timer(REQUESTS.labels(op)):
+            response.update(ok=True, result=operation(session, request))
+    except (ShopError, KeyError) as error:
+        logger.warning('Session %s: %s', session.id, error)
+        FAILURES.labels(op, type(error).__name__).inc()
+        response.update(ok=False, error=str(error))
+    except Exception as error:
+        # A bug or an input no check caught must not drop the session.
+        logger.exception('Session %s: %s failed.', session.id, op)
+        FAILURES.labels(op, type(error).__name__).inc()
+        response.update(ok=False, error=f'Internal error: {type(error).__name__}.')  # noqa E501
+    return response
+
+
+async def serve_connection(
+        basket: dict,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter
+) -> None:
+    """
+    Answer the requests of one connection, one line at a time.
+
+    Every operation works on in-memory structures and never awaits, so it runs to completion on the event loop: readers never wait for a lock and no other session sees a half-done change. # noqa E501
+    """
+    session = Session(basket)
+    logger.info('Session %s opened.', session.id)
+    try:
+        while line := await reader.readline():
+            if not line.strip():
+                continue
+            response = handle_request(session, line)
+            writer.write(json.dumps(response).encode() + b'\n')
+            await writer.drain()
+    except (ConnectionError, asyncio.LimitOverrunError, ValueError) as error:
+        logger.warning('Session %s dropped: %s', session.id, error)
+    finally:
+        session.release()
+        writer.close()
+        logger.info('Session %s closed.', session.id)
+
+
+async def expire_holds(basket: dict, server: asyncio.Server) -> None:
+    """
+    Put back the stock of expired cart lines once per tick while `server` runs. # noqa E501
+
+    Args:
+        basket (dict): The basket every session shares.
+        server (asyncio.Server): The server whose sessions hold the stock.
+
+    Returns:
+        None
+    """
+    book = holds(basket)
+    while server.is_serving():
+        await asyncio.sleep(TICK)
+        book.expire()
+
+
+async def start_server(
+        basket: dict,
+        host: str = HOST,
+        port: int = PORT
+) -> asyncio.Server:
+    """
+    Start serving the line-delimited JSON protocol for a basket.
+
+    Args:
+        basket (dict): The basket every session shares.
+        host (str): The address to listen on.
+        port (int): The TCP port; 0 picks a free one.
+
+    Returns:
+        asyncio.Server: The running server.
+    """
+    server = await asyncio.start_server(
+        lambda reader, writer: serve_connection(basket, reader, writer),
+        host, port, limit=LINE_LIMIT, backlog=4096,
+    )
+    task = asyncio.get_running_loop().create_task(expire_holds(basket, server))
+    _expiry.add(task)
+    task.add_done_callback(_expiry.discard)
+    logger.info('Serving on %s:%s.', host, server.sockets[0].getsockname()[1])
+    return server
+
+
+def serve(basket: dict, host: str = HOST, port: int = PORT) -> None:
+    """
+    Serve a basket until interrupted.
+
+    Args:
+        basket (dict): The basket every session shares.
+        host (str): The address to listen on.
+        port (int): The TCP port.
+
+    Returns:
+        None
+    """
+    async def run() -> None:
+        server = await start_server(basket, host, port)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        logger.info('Server stopped.')
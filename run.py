@@ -1,4 +1,61 @@
-from core import main
+import sys
+import argparse
+import functools
+from core import (
+    main,
+    load_basket,
+)
+from shop.helper.const import (
+    HOST,
+    PORT,
+)
+from shop.utils.screen import run_screen
+from shop.utils.headless import run_headless
+from shop.utils.recorder import record_session
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='Shopping list.')
+    parser.add_argument(
+        '--script',
+        metavar='FILE',
+        help='run headless, reading one answer per line from FILE ("-" for stdin)',  # noqa E501
+    )
+    parser.add_argument(
+        '--plain',
+        action='store_true',
+        help='clear the terminal for every screen instead of redrawing changed lines',  # noqa E501
+    )
+    parser.add_argument(
+        '--record',
+        metavar='FILE',
+        help='record every answer with its timestamp to FILE, for benchmarks.replay',  # noqa E501
+    )
+    parser.add_argument(
+        '--serve',
+        metavar='[HOST:]PORT',
+        nargs='?',
+        const=f'{HOST}:{PORT}',
+        help=f'serve the store as line-delimited JSON over TCP (default {HOST}:{PORT})',  # noqa E501
+    )
+    args = parser.parse_args()
+    entry = main
+    if args.record:
+        entry = functools.partial(record_session, main, args.record)
+    if args.serve:
+        from core.server import serve
+        host, _, port = args.serve.rpartition(':')
+        basket, durable = load_basket()
+        try:
+            serve(basket, host or HOST, int(port))
+        finally:
+            if durable is not None:
+                durable.close()
+    elif args.script == '-':
+        run_headless(entry, sys.stdin)
+    elif args.script:
+        with open(args.script) as commands:
+            run_headless(entry, commands)
+    elif sys.stdout.isatty() and not args.plain:
+        run_screen(entry)
+    else:
+        entry()
@@ -1,26 +1,35 @@
-from .const import (
-    NO,
-    YES,
-    EXIT_COMMANDS,
-    BACK_COMMANDS,
-    CLEAR_COMMANDS,
-    WRONG_COMMANDS,
-)
-from .type_hint import (
-    Price,
-    Total,
-    Group,
-    Number,
-    Basket,
-    Invoice,
-    Product,
-    ShoppingList,
-)
-from .exception import (
-    NotNumber,
-    GroupNameError,
-    ProductDoesExist,
-    ProductNameError,
-    GroupDoesNotExist,
-    ProductDoesNotExist,
-)
+from shop.helper.lazy import lazy_exports
+
+# Submodule -> the names it exports, imported on first use.
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    'const': (
+        'NO',
+        'YES',
+        'PAGE_SIZE',
+        'EXIT_COMMANDS',
+        'NEXT_COMMANDS',
+        'BACK_COMMANDS',
+        'CLEAR_COMMANDS',
+        'SNAPSHOT_FILE',
+        'WRONG_COMMANDS',
+        'PREVIOUS_COMMANDS',
+    ),
+    'type_hint': (
+        'Price',
+        'Total',
+        'Group',
+        'Number',
+        'Basket',
+        'Invoice',
+        'Product',
+        'ShoppingList',
+    ),
+    'exception': (
+        'NotNumber',
+        'GroupNameError',
+        'ProductDoesExist',
+        'ProductNameError',
+        'GroupDoesNotExist',
+        'ProductDoesNotExist',
+    ),
+})
@@ -34,3 +34,46 @@ NO = (
     'no',
     'na'
 )
+SNAPSHOT_FILE = 'shop.snapshot'
+PAGE_SIZE = 20
+# Largest price, stock or discount: the columns are 64-bit signed ints.
+MAX_NUMBER = (1 << 63) - 1
+NEXT_COMMANDS = (
+    '>',
+    'next'
+)
+PREVIOUS_COMMANDS = (
+    '<',
+    'prev'
+)
+# Default address of `python run.py --serve`.
+HOST = '127.0.0.1'
+PORT = 8765
+# Seconds a cart line holds its stock before it goes back to the basket.
+HOLD_TTL = 15 * 60
+# Menu commands timed under their own name; anything else is `other`.
+STORE_COMMANDS = (
+    'add',
+    'show',
+    'find',
+    'total',
+    'delete',
+    'search'
+)
+ADMIN_COMMANDS = (
+    'save',
+    'group',
+    'import',
+    'product'
+)
+GROUP_COMMANDS = (
+    'add',
+    'edit',
+    'show',
+    'delete'
+)
+PRODUCT_COMMANDS = (
+    'add',
+    'edit',
+    'show'
+)
@@ -0,0 +1,45 @@
+import sys
+import types
+import importlib
+
+
+class _LazyPackage(types.ModuleType):
+    def __setattr__(self, name: str, value) -> None:
+        # `shop.models.holds` is both a submodule and the function it
+        # exports; loading the submodule must not hide the function.
+        exported = vars(self).get('__all__', ())
+        if isinstance(value, types.ModuleType) and name in exported:
+            return
+        super().__setattr__(name, value)
+
+
+def lazy_exports(package: str, exports: dict[str, tuple[str, ...]]):
+    """
+    Make the names a package re-exports load their submodule on first use.
+
+    Use it as `__getattr__, __dir__, __all__ = lazy_exports(__name__, {...})` in the `__init__.py`; importing the package then loads none of its submodules, and `from package import name` imports only the one that defines `name`. # noqa E501
+
+    Args:
+        package (str): The `__name__` of the package.
+        exports (dict[str, tuple[str, ...]]): Submodule -> the names it exports. # noqa E501
+
+    Returns:
+        tuple: The `__getattr__` and `__dir__` functions and the `__all__` list of the package. # noqa E501
+    """
+    modules = {
+        name: module for module, names in exports.items() for name in names
+    }
+    sys.modules[package].__class__ = _LazyPackage
+
+    def __getattr__(name: str):
+        module = modules.get(name)
+        if module is None:
+            raise AttributeError(f'module {package!r} has no attribute {name!r}')  # noqa E501
+        value = getattr(importlib.import_module(f'.{module}', package), name)
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted(set(vars(sys.modules[package])) | set(modules))
+
+    return __getattr__, __dir__, list(modules)
@@ -2,7 +2,7 @@ from typing import NewType
 
 Total = NewType('Total', int())
 ShoppingList = NewType('ShoppingList', dict)
-Invoice = NewType('Invoice', list)
+Invoice = NewType('Invoice', dict)
 Number = NewType('Number', int)
 Price = NewType('Price', int)
 Product = NewType('Product', dict({str: Number, str: Price}))
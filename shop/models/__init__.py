@@ -1,30 +1,146 @@
-from .store import store_menu
-from .admin import admin_menu
-from .product import (
-    check_exist,
-    edited_name,
-    product_menu,
-    show_product,
-    added_product,
-    empty_products,
-    get_of_product,
-    edited_product,
-    get_product_name,
-    get_price_number,
-    show_product_group,
-    get_product_choices,
-    edited_price_number,
-    get_product_by_index,
-)
-from .group import (
-    add_group,
-    get_group,
-    group_menu,
-    show_group,
-    edited_group,
-    get_of_group,
-    deleted_group,
-    empty_group_menu,
-    check_valid_group,
-    get_group_by_product_name,
-)
+from shop.helper.lazy import lazy_exports
+
+# Submodule -> the names it exports, imported on first use.
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    'store': (
+        'store_menu',
+    ),
+    'admin': (
+        'admin_menu',
+        'import_file',
+    ),
+    'product': (
+        'check_exist',
+        'edited_name',
+        'product_menu',
+        'product_rows',
+        'show_product',
+        'whole_number',
+        'added_product',
+        'empty_products',
+        'get_of_product',
+        'edited_product',
+        'get_product_name',
+        'get_price_number',
+        'show_product_group',
+        'get_product_choices',
+        'edited_price_number',
+        'get_product_by_index',
+    ),
+    'group': (
+        'add_group',
+        'get_group',
+        'group_menu',
+        'show_group',
+        'edited_group',
+        'get_of_group',
+        'deleted_group',
+        'empty_group_menu',
+        'check_valid_group',
+        'get_group_by_product_name',
+    ),
+    'basket': (
+        'guard',
+        'observe',
+        'unguard',
+        'set_field',
+        'unobserve',
+        'change_stock',
+        'insert_group',
+        'remove_group',
+        'rename_group',
+        'insert_product',
+        'rename_product',
+    ),
+    'index': (
+        'build_index',
+        'forget_index',
+        'lookup_group',
+        'product_index',
+    ),
+    'position': (
+        'item_at',
+        'positions',
+        'rename_key',
+        'position_of',
+        'track_insert',
+        'track_remove',
+        'PositionIndex',
+        'forget_positions',
+    ),
+    'catalog': (
+        'Catalog',
+        'ProductRow',
+        'CatalogGroup',
+    ),
+    'snapshot': (
+        'load_json',
+        'save_json',
+        'MappedBasket',
+        'load_snapshot',
+        'save_snapshot',
+    ),
+    'sqlite_store': (
+        'SQLiteRow',
+        'SQLiteGroup',
+        'SQLiteBasket',
+        'ConnectionPool',
+    ),
+    'journal': (
+        'encode',
+        'replay',
+        'Journal',
+        'DurableBasket',
+    ),
+    'importer': (
+        'batches',
+        'Rejections',
+        'apply_batch',
+        'read_records',
+        'import_catalog',
+        'validate_record',
+        'validate_records',
+    ),
+    'search': (
+        'trigrams',
+        'forget_search',
+        'search_index',
+        'TrigramIndex',
+        'search_products',
+    ),
+    'inventory': (
+        'stock',
+        'stripe',
+        'reserve',
+        'release',
+        'make_hot',
+        'flush_hot',
+        'make_cold',
+        'ShardedStock',
+    ),
+    'holds': (
+        'Line',
+        'holds',
+        'Holds',
+        'TimingWheel',
+        'forget_holds',
+    ),
+    'versions': (
+        'pin',
+        'net_price',
+        'Snapshot',
+        'forget_versions',
+        'CatalogVersions',
+        'catalog_versions',
+    ),
+    'events': (
+        'emit',
+        'EventLog',
+        'parse_rates',
+        'open_events',
+        'read_events',
+        'close_events',
+        'watch_basket',
+        'unwatch_basket',
+    ),
+})
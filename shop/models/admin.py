@@ -1,36 +1,96 @@
+import os
+import csv
+import logging
 from shop.models.product import product_menu
-from shop.helper.const import BACK_COMMANDS
+from shop.models.importer import import_catalog
+from shop.models.snapshot import save_snapshot
+from shop.utils.metrics import time_command
+from shop.helper.const import (
+    BACK_COMMANDS,
+    ADMIN_COMMANDS,
+    SNAPSHOT_FILE,
+)
 from shop.models.group import (
     empty_group_menu,
     group_menu
 )
 from shop.utils.help_funcs import (
+    ask,
+    keep,
     title,
     help_admin,
+    show_error,
     clear_screen,
     help_admin_group,
+    decortor_exceptions,
 )
 
+logger = logging.getLogger(__name__)
+
+
+@decortor_exceptions
+def import_file(basket: dict) -> None:
+    """
+    Ask for a CSV or JSONL file and import its products into the basket.
+
+    A file that cannot be read or decoded stops the import with an error; the batches applied before it stay in the basket. # noqa E501
+
+    Args:
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+
+    Returns:
+        None
+    """
+    path = ask('Enter the CSV or JSONL file to import: ').strip()
+    if path.casefold() in BACK_COMMANDS:
+        return
+    if not os.path.isfile(path):
+        print(f'The file `{path}` does not exist.')
+        logger.warning('The import file "%s" does not exist.', path)
+        keep()
+        return
+    try:
+        added, rejected = import_catalog(basket, path)
+    except (OSError, UnicodeDecodeError, csv.Error) as error:
+        logger.warning('The import of "%s" failed: %s', path, error)
+        show_error(f'Cannot import `{path}`: {error}')
+        return
+    print(f'{added} products imported, {len(rejected)} lines rejected.')
+    for line_number, message in rejected:
+        print(f'\tline {line_number}: {message}')
+    keep()
+
 
 def admin_menu(basket: dict[dict[str]]) -> None:
-    messege = 'Enter your command "Group" or "Product" or "Back": '
-    messege_1 = 'Enter your command "Group" or "Back": '
+    messege = 'Enter your command "Group" or "Product" or "Import" or "Save" or "Back": '  # noqa E501
+    messege_1 = 'Enter your command "Group" or "Import" or "Back": '
     while True:
         clear_screen()
         print(title('Admin Menu'))
         if basket:
             help_admin_group()
-            command = input(messege).casefold()
-            if command in BACK_COMMANDS:
-                break
-            elif command == 'group':
-                group_menu(basket)
-            elif command == 'product':
-                product_menu(basket)
+            command = ask(messege).casefold()
+            with time_command('admin', command, ADMIN_COMMANDS):
+                if command in BACK_COMMANDS:
+                    break
+                elif command == 'group':
+                    group_menu(basket)
+                elif command == 'product':
+                    product_menu(basket)
+                elif command == 'import':
+                    import_file(basket)
+                elif command == 'save':
+                    save_snapshot(basket, SNAPSHOT_FILE)
+                    print(f'The basket is saved to `{SNAPSHOT_FILE}`.')
+                    logger.info('The basket is saved to "%s".', SNAPSHOT_FILE)
+                    keep()
         else:
             help_admin()
-            command = input(messege_1).casefold()
-            if command in BACK_COMMANDS:
-                break
-            elif command == 'group':
-                empty_group_menu(basket)
+            command = ask(messege_1).casefold()
+            with time_command('admin', command, ADMIN_COMMANDS):
+                if command in BACK_COMMANDS:
+                    break
+                elif command == 'group':
+                    empty_group_menu(basket)
+                elif command == 'import':
+                    import_file(basket)
@@ -0,0 +1,283 @@
+import logging
+from shop.models.index import (
+    index_product,
+    unindex_group,
+    reindex_group,
+    unindex_product,
+)
+from shop.models.position import (
+    rename_key,
+    track_insert,
+    track_remove,
+    forget_positions,
+)
+
+logger = logging.getLogger(__name__)
+
+# id(basket) -> (basket, [callback, ...]), same scheme as shop.models.index
+_observers: dict[int, tuple[dict, list]] = dict()
+_guards: dict[int, tuple[dict, list]] = dict()
+
+
+def _watch(registry: dict, basket: dict, callback) -> None:
+    entry = registry.get(id(basket))
+    if entry is None or entry[0] is not basket:
+        entry = (basket, list())
+        registry[id(basket)] = entry
+    entry[1].append(callback)
+
+
+def _unwatch(registry: dict, basket: dict, callback) -> None:
+    entry = registry.get(id(basket))
+    if entry is not None and entry[0] is basket and callback in entry[1]:
+        entry[1].remove(callback)
+        if not entry[1]:
+            del registry[id(basket)]
+
+
+def observe(basket: dict, callback) -> None:
+    """
+    Call `callback(event, *args)` after every change made through this module. # noqa E501
+
+    Events are `group`, `product`, `rename_product`, `rename_group`, `remove_group`, `stock` and `field`, with the same arguments as the helper that made the change. # noqa E501
+
+    Args:
+        basket (dict): The basket to watch.
+        callback: The function to call.
+
+    Returns:
+        None
+    """
+    _watch(_observers, basket, callback)
+
+
+def unobserve(basket: dict, callback) -> None:
+    """
+    Stop calling `callback` for changes of `basket`.
+
+    Args:
+        basket (dict): The watched basket.
+        callback: The function passed to `observe`.
+
+    Returns:
+        None
+    """
+    _unwatch(_observers, basket, callback)
+
+
+def guard(basket: dict, callback) -> None:
+    """
+    Call `callback(event, *args)` before every change made through this module. # noqa E501
+
+    The events are those of `observe`. An exception raised by the callback cancels the change, so nothing is applied and no observer is called. # noqa E501
+
+    Args:
+        basket (dict): The basket to watch.
+        callback: The function to call.
+
+    Returns:
+        None
+    """
+    _watch(_guards, basket, callback)
+
+
+def unguard(basket: dict, callback) -> None:
+    """
+    Stop calling `callback` before changes of `basket`.
+
+    Args:
+        basket (dict): The watched basket.
+        callback: The function passed to `guard`.
+
+    Returns:
+        None
+    """
+    _unwatch(_guards, basket, callback)
+
+
+def _check(basket: dict, *event) -> None:
+    entry = _guards.get(id(basket))
+    if entry is not None and entry[0] is basket:
+        for callback in entry[1]:
+            callback(*event)
+
+
+def _notify(basket: dict, *event) -> None:
+    entry = _observers.get(id(basket))
+    if entry is not None and entry[0] is basket:
+        for callback in entry[1]:
+            callback(*event)
+
+
+def insert_group(basket: dict, group: str) -> None:
+    """
+    Add an empty group to the basket.
+
+    An existing group with the same name is replaced, as before.
+
+    Args:
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+        group (str): The name of the new group.
+
+    Returns:
+        None
+    """
+    _check(basket, 'group', group)
+    if group in basket:
+        unindex_group(basket, group)
+        forget_positions(basket[group])
+    basket[group] = dict()
+    track_insert(basket, group)
+    _notify(basket, 'group', group)
+
+
+def insert_product(
+        basket: dict,
+        group: str,
+        product: str,
+        details: dict
+) -> None:
+    """
+    Add a product with its details to a group of the basket.
+
+    Args:
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+        group (str): The group that receives the product.
+        product (str): The product name.
+        details (dict): The product details with `price`, `number` and `discount` keys. # noqa E501
+
+    Returns:
+        None
+    """
+    _check(basket, 'product', group, product, details)
+    basket[group][product] = details
+    index_product(basket, product, group)
+    track_insert(basket[group], product)
+    _notify(basket, 'product', group, product, details)
+
+
+def rename_product(
+        basket: dict,
+        group: str,
+        product: str,
+        new_product: str
+) -> None:
+    """
+    Rename a product inside its group, keeping its position.
+
+    Args:
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+        group (str): The group holding the product.
+        product (str): The current product name.
+        new_product (str): The new product name.
+
+    Returns:
+        None
+    """
+    _check(basket, 'rename_product', group, product, new_product)
+    if new_product in basket[group] and new_product != product:
+        unindex_product(basket, new_product, group)
+    rename_key(basket[group], product, new_product)
+    unindex_product(basket, product, group)
+    index_product(basket, new_product, group)
+    _notify(basket, 'rename_product', group, product, new_product)
+
+
+def rename_group(basket: dict, group: str, new_group: str) -> None:
+    """
+    Rename a group of the basket, keeping its position.
+
+    An existing group called `new_group` is replaced, as before.
+
+    Args:
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+        group (str): The current group name.
+        new_group (str): The new group name.
+
+    Returns:
+        None
+    """
+    if new_group == group:
+        return
+    _check(basket, 'rename_group', group, new_group)
+    if new_group in basket:
+        unindex_group(basket, new_group)
+        forget_positions(basket[new_group])
+    rename_key(basket, group, new_group)
+    reindex_group(basket, group, new_group)
+    _notify(basket, 'rename_group', group, new_group)
+
+
+def remove_group(basket: dict, group: str) -> dict:
+    """
+    Remove a group and all of its products from the basket.
+
+    Args:
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+        group (str): The group to remove.
+
+    Returns:
+        dict: The removed group.
+    """
+    _check(basket, 'remove_group', group)
+    unindex_group(basket, group)
+    items = basket.pop(group)
+    track_remove(basket, group)
+    forget_positions(items)
+    _notify(basket, 'remove_group', group)
+    return items
+
+
+def change_stock(basket: dict, group: str, product: str, delta: int) -> bool:
+    """
+    Add `delta` to the stock of a product, never going below zero.
+
+    Baskets with their own `adjust_stock` (the SQLite store) apply the change as one conditional update. # noqa E501
+
+    Args:
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+        group (str): The group holding the product.
+        product (str): The product name.
+        delta (int): The change; negative to take stock out.
+
+    Returns:
+        bool: True if the stock was changed.
+    """
+    _check(basket, 'stock', group, product, delta)
+    adjust_stock = getattr(basket, 'adjust_stock', None)
+    if adjust_stock is not None:
+        if not adjust_stock(group, product, delta):
+            return False
+    else:
+        details = basket[group][product]
+        number = details['number'] + delta
+        if number < 0:
+            return False
+        details['number'] = number
+    _notify(basket, 'stock', group, product, delta)
+    return True
+
+
+def set_field(
+        basket: dict,
+        group: str,
+        product: str,
+        field: str,
+        value: int
+) -> None:
+    """
+    Set the price, number or discount of a product.
+
+    Args:
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+        group (str): The group holding the product.
+        product (str): The product name.
+        field (str): `price`, `number` or `discount`.
+        value (int): The new value.
+
+    Returns:
+        None
+    """
+    _check(basket, 'field', group, product, field, value)
+    basket[group][product][field] = value
+    _notify(basket, 'field', group, product, field, value)
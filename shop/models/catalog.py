@@ -0,0 +1,420 @@
+import logging
+from array import array
+from collections.abc import MutableMapping
+from shop.helper.const import MAX_NUMBER
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('price', 'number', 'discount')
+
+_EMPTY = 0
+_DELETED = -1
+
+
+class ProductRow(MutableMapping):
+    """
+    Dict-like view of one product row of a `Catalog`.
+
+    `row['price']`, `row['number']` and `row['discount']` read and write the catalog columns, so the code written for the nested-dict basket keeps working. # noqa E501
+    """
+
+    __slots__ = ('_catalog', 'id')
+
+    def __init__(self, catalog: 'Catalog', row: int) -> None:
+        self._catalog = catalog
+        self.id = row
+
+    def __getitem__(self, field: str) -> int:
+        if field not in FIELDS:
+            raise KeyError(field)
+        return getattr(self._catalog, field)[self.id]
+
+    def __setitem__(self, field: str, value: int) -> None:
+        if field not in FIELDS:
+            raise KeyError(field)
+        getattr(self._catalog, field)[self.id] = value
+
+    def __delitem__(self, field: str) -> None:
+        raise TypeError('Catalog rows have fixed fields.')
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self) -> int:
+        return len(FIELDS)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class CatalogGroup(MutableMapping):
+    """
+    Dict-like view of one group of a `Catalog`: product name -> `ProductRow`.
+
+    The group only stores the row ids of its products, in display order. A removed product leaves a hole (-1) in `rows`; a Fenwick tree over the slots counts the live rows, so the position of a product and the product at a position are both O(log n), as in `shop.models.position.PositionIndex`. # noqa E501
+    """
+
+    __slots__ = ('_catalog', 'id', 'name', 'rows', '_tree', '_live')
+
+    def __init__(self, catalog: 'Catalog', group_id: int, name: str) -> None:
+        self._catalog = catalog
+        self.id = group_id
+        self.name = name
+        self.rows = array('i')
+        self._tree = array('i', [0])
+        self._live = 0
+
+    def __getitem__(self, product: str) -> ProductRow:
+        row = self._catalog.find(product, self.id)
+        if row < 0:
+            raise KeyError(product)
+        return ProductRow(self._catalog, row)
+
+    def __setitem__(self, product: str, details) -> None:
+        values = [details.get(field, 0) for field in FIELDS]
+        for field, value in zip(FIELDS, values):
+            if not 0 <= value <= MAX_NUMBER:
+                raise ValueError(f'The {field} {value} is out of range.')
+        catalog = self._catalog
+        row = catalog.find(product, self.id)
+        if row < 0:
+            row = catalog.add_row(self, product)
+        for field, value in zip(FIELDS, values):
+            getattr(catalog, field)[row] = value
+
+    def __delitem__(self, product: str) -> None:
+        row = self._catalog.find(product, self.id)
+        if row < 0:
+            raise KeyError(product)
+        self._catalog.drop_row(row)
+        self.discard(row)
+
+    def __contains__(self, product) -> bool:
+        return self._catalog.find(product, self.id) >= 0
+
+    def __iter__(self):
+        name = self._catalog.name
+        return (name(row) for row in self.rows if row >= 0)
+
+    def __len__(self) -> int:
+        return self._live
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+    def _prefix(self, slot: int) -> int:
+        tree = self._tree
+        total = 0
+        while slot > 0:
+            total += tree[slot]
+            slot &= slot - 1
+        return total
+
+    def append(self, row: int) -> None:
+        """Add a row id at the last position."""
+        slot = len(self.rows) + 1
+        self.rows.append(row)
+        self._catalog.slot[row] = slot
+        low = slot - (slot & -slot)
+        self._tree.append(1 + self._prefix(slot - 1) - self._prefix(low))
+        self._live += 1
+
+    def discard(self, row: int) -> None:
+        """Remove a row id; the rows after it move up one position."""
+        slot = self._catalog.slot[row]
+        self.rows[slot - 1] = -1
+        tree = self._tree
+        size = len(tree)
+        while slot < size:
+            tree[slot] -= 1
+            slot += slot & -slot
+        self._live -= 1
+        holes = len(self.rows) - self._live
+        if holes > 32 and holes > self._live:
+            rows = [row for row in self.rows if row >= 0]
+            self._reset()
+            for row in rows:
+                self.append(row)
+
+    def _reset(self) -> None:
+        self.rows = array('i')
+        self._tree = array('i', [0])
+        self._live = 0
+
+    def clear(self) -> None:
+        for row in self.rows:
+            if row >= 0:
+                self._catalog.drop_row(row)
+        self._reset()
+
+    def select(self, number: int) -> str | None:
+        """Return the product at 1-based position `number`, or None."""
+        if not 1 <= number <= self._live:
+            return None
+        tree = self._tree
+        size = len(tree) - 1
+        slot = 0
+        step = 1 << size.bit_length()
+        while step:
+            following = slot + step
+            if following <= size and tree[following] < number:
+                slot = following
+                number -= tree[following]
+            step >>= 1
+        return self._catalog.name(self.rows[slot])
+
+    def position(self, product: str) -> int:
+        """Return the 1-based position of `product`, or 0 if it is missing."""
+        row = self._catalog.find(product, self.id)
+        if row < 0:
+            return 0
+        return self._prefix(self._catalog.slot[row])
+
+    def rename(self, product: str, new_product: str) -> None:
+        """Rename a product in place; an existing `new_product` is replaced."""
+        catalog = self._catalog
+        row = catalog.find(product, self.id)
+        if row < 0:
+            raise KeyError(product)
+        if new_product in self:
+            del self[new_product]
+        catalog.rename_row(row, new_product)
+
+
+class Catalog(MutableMapping):
+    """
+    Columnar product catalog: group name -> `CatalogGroup`.
+
+    Every product is a dense integer row id. Price, stock and discount live in contiguous `array('q')` columns, names in one UTF-8 byte buffer, and lookups go through an open-addressing hash table of row ids instead of a dict per product. The mapping interface matches the nested-dict `Basket`, so it can be passed anywhere a basket is expected. # noqa E501
+    """
+
+    def __init__(self) -> None:
+        self.price = array('q')
+        self.number = array('q')
+        self.discount = array('q')
+        self.group_id = array('i')
+        self.slot = array('i')
+        self._name_start = array('q')
+        self._name_length = array('i')
+        self._names = bytearray()
+        self._table = array('i', [_EMPTY]) * 8
+        self._used = 0
+        self._groups: dict[str, CatalogGroup] = dict()
+        self._group_by_id: dict[int, CatalogGroup] = dict()
+        self._next_group = 0
+
+    @classmethod
+    def from_dict(cls, basket: dict) -> 'Catalog':
+        """
+        Build a catalog from a nested-dict basket.
+
+        Args:
+            basket (dict): A dictionary representing the basket with group information. # noqa E501
+
+        Returns:
+            Catalog: The new catalog, in the same order as `basket`.
+        """
+        catalog = cls()
+        for group, items in basket.items():
+            catalog[group] = items
+        return catalog
+
+    def to_dict(self) -> dict:
+        """Return the catalog as a nested-dict basket."""
+        return {
+            group: {product: dict(row) for product, row in items.items()}
+            for group, items in self._groups.items()
+        }
+
+    # Mapping interface -----------------------------------------------------
+
+    def __getitem__(self, group: str) -> CatalogGroup:
+        return self._groups[group]
+
+    def __setitem__(self, group: str, items) -> None:
+        view = self._groups.get(group)
+        if view is items:
+            return
+        if view is None:
+            view = CatalogGroup(self, self._next_group, group)
+            self._next_group += 1
+            self._groups[group] = view
+            self._group_by_id[view.id] = view
+        else:
+            view.clear()
+        for product, details in items.items():
+            view[product] = details
+
+    def __delitem__(self, group: str) -> None:
+        view = self._groups.pop(group)
+        view.clear()
+        del self._group_by_id[view.id]
+
+    def __contains__(self, group) -> bool:
+        return group in self._groups
+
+    def __iter__(self):
+        return iter(self._groups)
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    def __repr__(self) -> str:
+        return f'Catalog({len(self._groups)} groups, {self.size} products)'
+
+    def rename(self, group: str, new_group: str) -> None:
+        """Rename a group in place; an existing `new_group` is replaced."""
+        if new_group in self._groups and new_group != group:
+            del self[new_group]
+        view = self._groups[group]
+        view.name = new_group
+        self._groups = {
+            (new_group if name == group else name): items
+            for name, items in self._groups.items()
+        }
+
+    def group_of(self, product: str) -> str | None:
+        """Return the group holding `product`, or None."""
+        row = self.find(product)
+        if row < 0:
+            return None
+        return self._group_by_id[self.group_id[row]].name
+
+    @property
+    def size(self) -> int:
+        """The number of live products."""
+        return sum(len(view) for view in self._groups.values())
+
+    # Rows ------------------------------------------------------------------
+
+    def name(self, row: int) -> str:
+        """Return the product name of a row."""
+        start = self._name_start[row]
+        return self._names[start:start + self._name_length[row]].decode()
+
+    def row(self, row: int) -> ProductRow:
+        """Return the row view of a product id."""
+        return ProductRow(self, row)
+
+    def find(self, product: str, group_id: int | None = None) -> int:
+        """
+        Return the row id of `product`, or -1 if it does not exist.
+
+        Args:
+            product (str): The product name.
+            group_id (int): Only match rows of this group when given.
+
+        Returns:
+            int: The row id, or -1.
+        """
+        table = self._table
+        mask = len(table) - 1
+        key = product.encode()
+        size = len(key)
+        names = self._names
+        starts = self._name_start
+        lengths = self._name_length
+        groups = self.group_id
+        slot = hash(product) & mask
+        while True:
+            entry = table[slot]
+            if entry == _EMPTY:
+                return -1
+            if entry > 0:
+                row = entry - 1
+                if lengths[row] == size and (
+                    group_id is None or groups[row] == group_id
+                ):
+                    start = starts[row]
+                    if names[start:start + size] == key:
+                        return row
+            slot = (slot + 1) & mask
+
+    def _place(self, product: str, row: int) -> None:
+        table = self._table
+        mask = len(table) - 1
+        slot = hash(product) & mask
+        while table[slot] > 0:
+            slot = (slot + 1) & mask
+        if table[slot] == _EMPTY:
+            self._used += 1
+        table[slot] = row + 1
+
+    def _unplace(self, product: str, row: int) -> None:
+        table = self._table
+        mask = len(table) - 1
+        slot = hash(product) & mask
+        while table[slot] != row + 1:
+            slot = (slot + 1) & mask
+        table[slot] = _DELETED
+
+    def _grow(self) -> None:
+        live = self.size
+        size = 8
+        while size < live * 3:
+            size <<= 1
+        self._table = array('i', [_EMPTY]) * size
+        self._used = 0
+        for view in self._groups.values():
+            for row in view.rows:
+                if row >= 0:
+                    self._place(self.name(row), row)
+        logger.debug('Catalog table resized to %d slots.', size)
+
+    def add_row(self, view: CatalogGroup, product: str) -> int:
+        """
+        Append a zeroed product row to a group.
+
+        Args:
+            view (CatalogGroup): The group receiving the product.
+            product (str): The product name.
+
+        Returns:
+            int: The new row id.
+        """
+        if (self._used + 1) * 3 >= len(self._table) * 2:
+            self._grow()
+        row = len(self.price)
+        key = product.encode()
+        self._name_start.append(len(self._names))
+        self._name_length.append(len(key))
+        self._names += key
+        self.price.append(0)
+        self.number.append(0)
+        self.discount.append(0)
+        self.group_id.append(view.id)
+        self.slot.append(0)
+        view.append(row)
+        self._place(product, row)
+        return row
+
+    def drop_row(self, row: int) -> None:
+        """Remove a row from the lookup table; its id is never reused."""
+        self._unplace(self.name(row), row)
+        self.group_id[row] = -1
+
+    def rename_row(self, row: int, product: str) -> None:
+        """Give a row a new product name."""
+        # The old name leaves a tombstone, so renames fill the table as
+        # inserts do; `_grow` rebuilds it without the tombstones.
+        if (self._used + 1) * 3 >= len(self._table) * 2:
+            self._grow()
+        self._unplace(self.name(row), row)
+        key = product.encode()
+        self._name_start[row] = len(self._names)
+        self._name_length[row] = len(key)
+        self._names += key
+        self._place(product, row)
+
+    def nbytes(self) -> int:
+        """Return the bytes held by the columns, names and lookup table."""
+        columns = (
+            self.price, self.number, self.discount, self.group_id, self.slot,
+            self._name_start, self._name_length, self._table,
+        )
+        for view in self._groups.values():
+            columns += (view.rows, view._tree)
+        total = len(self._names)
+        for column in columns:
+            total += len(column) * column.itemsize
+        return total
@@ -0,0 +1,317 @@
+import json
+import time
+import atexit
+import struct
+import logging
+import threading
+from shop.models.basket import (
+    observe,
+    unobserve,
+)
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'SHOPEVNT'
+RECORD = struct.Struct('<HBd')
+LENGTH = struct.Struct('<H')
+TEXT = struct.Struct('<H')
+NUMBER = struct.Struct('<q')
+
+FLUSH_BYTES = 64 * 1024
+FLUSH_MILLISECONDS = 200
+# Bytes read at a time by `read_events`.
+READ_CHUNK = 1 << 20
+# Largest payload, and largest text field, a 2-byte length can describe.
+MAX_SIZE = 0xFFFF
+
+# Event type -> (code, field names); a field is text when its name is in
+# TEXT_FIELDS and an 8-byte integer otherwise.
+EVENTS = {
+    'cart_add': (1, ('product', 'number')),
+    'cart_remove': (2, ('product', 'number')),
+    'cart_expire': (3, ('product', 'number')),
+    'stock': (4, ('group', 'product', 'delta')),
+    'price': (5, ('group', 'product', 'field', 'value')),
+    'group_rename': (6, ('group', 'new_group')),
+    'group_delete': (7, ('group',)),
+    'checkout': (8, ('lines', 'items', 'total')),
+    'stock_set': (9, ('group', 'product', 'number')),
+}
+# Code of the record that holds the sampling rates as JSON; it is written
+# every time the log is opened.
+RATES = 0
+TEXT_FIELDS = ('product', 'group', 'field', 'new_group')
+NAMES = {code: (event, fields) for event, (code, fields) in EVENTS.items()}
+
+_events: 'EventLog | None' = None
+
+
+def parse_rates(text: str) -> dict[str, float]:
+    """
+    Read sampling rates such as `cart_add=0.1,stock=1`.
+
+    Args:
+        text (str): Comma separated `event=rate` pairs.
+
+    Returns:
+        dict[str, float]: The rate of each event type.
+    """
+    rates = dict()
+    for pair in text.split(','):
+        event, _, rate = pair.partition('=')
+        event = event.strip()
+        if event in EVENTS and rate.strip():
+            rates[event] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+def _encode(code: int, texts: tuple[bool, ...], values) -> bytearray:
+    # Build one whole record; nothing is appended to the log when a field
+    # does not fit.
+    record = bytearray(RECORD.pack(0, code, time.time()))
+    for text, value in zip(texts, values):
+        if text:
+            value = value.encode()
+            if len(value) > MAX_SIZE:
+                raise ValueError(f'a text of {len(value):,} bytes is too long')  # noqa E501
+            record += TEXT.pack(len(value))
+            record += value
+        else:
+            record += NUMBER.pack(value)
+    size = len(record) - RECORD.size
+    if size > MAX_SIZE:
+        raise ValueError(f'a payload of {size:,} bytes is too long')
+    LENGTH.pack_into(record, 0, size)
+    return record
+
+
+class EventLog:
+    """
+    Writer of length-prefixed binary event records.
+
+    The file starts with a magic. A record is a 2-byte payload length, a 1-byte event code and an 8-byte timestamp, followed by the fields: text as length-prefixed UTF-8, numbers as 8-byte integers. Opening the log appends to an existing file, after a record holding the sampling rates in force from then on. # noqa E501
+
+    An event type with a rate below 1 keeps that share of its events, evenly spaced rather than at random. Records are collected in memory and written in chunks of `FLUSH_BYTES`, or by a background thread once they are `FLUSH_MILLISECONDS` old. An event that does not fit the format (a text or payload over `MAX_SIZE` bytes, a number outside 64 bits) is logged and dropped; it never reaches the file and never raises into the caller. # noqa E501
+    """
+
+    def __init__(
+            self,
+            path: str,
+            rates: dict[str, float] | None = None,
+            flush_milliseconds: int = FLUSH_MILLISECONDS
+    ) -> None:
+        self.path = path
+        self.rates = {event: 1.0 for event in EVENTS}
+        self.rates.update(rates or dict())
+        self.written = 0
+        self.skipped = 0
+        self.dropped = 0
+        self._credit = {event: 0.0 for event in EVENTS}
+        self._layout = {
+            event: (code, tuple(field in TEXT_FIELDS for field in fields))
+            for event, (code, fields) in EVENTS.items()
+        }
+        self._pending = bytearray()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._file = open(path, 'ab')
+        if not self._file.tell():
+            self._file.write(MAGIC)
+        rates = json.dumps(self.rates).encode()
+        self._file.write(RECORD.pack(len(rates), RATES, time.time()) + rates)
+        self._flusher = None
+        if flush_milliseconds > 0:
+            self._flusher = threading.Thread(
+                target=self._flush_loop,
+                args=(flush_milliseconds / 1000,),
+                name='event-log-flush',
+                daemon=True,
+            )
+            self._flusher.start()
+
+    def _flush_loop(self, seconds: float) -> None:
+        while not self._closed.wait(seconds):
+            if self._pending:
+                self.flush()
+
+    def emit(self, event: str, *values) -> None:
+        """Record an event, unless sampling skips it."""
+        code, fields = self._layout[event]
+        rate = self.rates[event]
+        with self._lock:
+            if rate < 1.0:
+                credit = self._credit[event] + rate
+                if credit < 1.0:
+                    self._credit[event] = credit
+                    self.skipped += 1
+                    return
+                self._credit[event] = credit - 1.0
+            try:
+                record = _encode(code, fields, values)
+            except (ValueError, AttributeError, struct.error) as error:
+                self.dropped += 1
+                logger.warning('The %s event is dropped: %s', event, error)
+                return
+            self._pending += record
+            self.written += 1
+            if len(self._pending) >= FLUSH_BYTES:
+                self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        self._file.write(self._pending)
+        self._file.flush()
+        self._pending.clear()
+
+    def flush(self) -> None:
+        """Write every collected record now."""
+        with self._lock:
+            if self._pending:
+                self._flush_locked()
+
+    def close(self) -> None:
+        """Write what is collected and close the file."""
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+        self._file.close()
+        logger.info(
+            'Event log %s closed with %d events, %d sampled out, %d dropped.',
+            self.path, self.written, self.skipped, self.dropped
+        )
+
+
+def read_events(path: str):
+    """
+    Stream the events of an event log back as dictionaries.
+
+    Each dictionary has the `event` type, its `time`, its fields and the sampling `rate` it was written with. The file is read in `READ_CHUNK` blocks, so a log of any size is streamed in flat memory. Records of an unknown event code (written by a newer version) are skipped by their length, and a torn record at the end of the file is ignored. # noqa E501
+
+    Args:
+        path (str): The event log file.
+
+    Yields:
+        dict: One event.
+    """
+    rates = dict()
+    unknown = 0
+    with open(path, 'rb') as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'{path} is not an event log.')
+        data = b''
+        while block := file.read(READ_CHUNK):
+            data += block
+            at = 0
+            end = len(data)
+            while at + RECORD.size <= end:
+                length, code, stamp = RECORD.unpack_from(data, at)
+                start = at + RECORD.size
+                if start + length > end:
+                    break
+                at = start + length
+                if code == RATES:
+                    rates = json.loads(data[start:at])
+                    continue
+                names = NAMES.get(code)
+                if names is None:
+                    unknown += 1
+                    continue
+                event, fields = names
+                record = {'event': event, 'time': stamp, 'rate': rates.get(event, 1.0)}  # noqa E501
+                for field in fields:
+                    if field in TEXT_FIELDS:
+                        size, = TEXT.unpack_from(data, start)
+                        record[field] = data[start + 2:start + 2 + size].decode()  # noqa E501
+                        start += 2 + size
+                    else:
+                        record[field], = NUMBER.unpack_from(data, start)
+                        start += NUMBER.size
+                yield record
+            data = data[at:]
+    if unknown:
+        logger.warning('%d records of unknown events skipped in %s.', unknown, path)  # noqa E501
+
+
+def open_events(path: str, rates: dict[str, float] | None = None) -> EventLog:
+    """
+    Start writing the events of this process to `path`.
+
+    Args:
+        path (str): The event log file; an existing log is appended to.
+        rates (dict[str, float] | None): Sampling rates by event type; 1.0 (keep all) by default. # noqa E501
+
+    Returns:
+        EventLog: The open log.
+    """
+    global _events
+    close_events()
+    _events = EventLog(path, rates)
+    logger.info('Events are written to %s.', path)
+    return _events
+
+
+def close_events() -> None:
+    """Stop writing events and close the log."""
+    global _events
+    if _events is not None:
+        events, _events = _events, None
+        events.close()
+
+
+def emit(event: str, *values) -> None:
+    """
+    Record an event in the open log; does nothing when no log is open.
+
+    Args:
+        event (str): A key of `EVENTS`.
+        *values: The fields of the event, in order.
+
+    Returns:
+        None
+    """
+    if _events is not None:
+        _events.emit(event, *values)
+
+
+def _record(event: str, *args) -> None:
+    if _events is None:
+        return
+    if event == 'stock':
+        _events.emit('stock', *args)
+    elif event == 'field' and args[2] == 'number':
+        _events.emit('stock_set', args[0], args[1], args[3])
+    elif event == 'field':
+        _events.emit('price', *args)
+    elif event == 'rename_group':
+        _events.emit('group_rename', *args)
+    elif event == 'remove_group':
+        _events.emit('group_delete', *args)
+
+
+def watch_basket(basket: dict) -> None:
+    """
+    Record the stock changes, price edits and group renames and deletes of a basket. # noqa E501
+
+    Args:
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+
+    Returns:
+        None
+    """
+    observe(basket, _record)
+
+
+def unwatch_basket(basket: dict) -> None:
+    """
+    Stop recording the changes of a basket.
+
+    Args:
+        basket (dict): The watched basket.
+
+    Returns:
+        None
+    """
+    unobserve(basket, _record)
+
+
+atexit.register(close_events)
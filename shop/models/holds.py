@@ -0,0 +1,345 @@
+import math
+import time
+import logging
+import threading
+from shop.models.events import emit
+from shop.models.versions import catalog_versions
+from shop.helper.const import HOLD_TTL
+from shop.models.position import (
+    track_insert,
+    track_remove,
+)
+from shop.models.inventory import (
+    reserve,
+    release,
+)
+
+logger = logging.getLogger(__name__)
+
+TICK = 1.0
+SLOTS = 64
+LEVELS = 4
+
+# id(basket) -> (basket, Holds), same scheme as shop.models.index
+_holds: dict[int, tuple[dict, 'Holds']] = dict()
+
+
+class TimingWheel:
+    """
+    Hierarchical timing wheel: `levels` wheels of `slots` slots each.
+
+    Level 0 has one slot per tick, every higher level one slot per turn of the level below. An entry goes to the lowest level whose span covers its deadline and is moved one level down each time the wheel above reaches its slot, so scheduling is O(1) and each tick only touches the entries that are due or moved. Deadlines beyond the top level wait in an overflow list that is sorted out once per turn of the top wheel. # noqa E501
+    """
+
+    __slots__ = ('tick', '_slots', '_wheels', '_overflow', '_now', 'count')
+
+    def __init__(
+            self,
+            tick: float = TICK,
+            slots: int = SLOTS,
+            levels: int = LEVELS,
+            start: float = 0.0
+    ) -> None:
+        self.tick = tick
+        self._slots = slots
+        self._wheels = [[list() for _ in range(slots)] for _ in range(levels)]
+        self._overflow: list[tuple[int, object]] = list()
+        self._now = int(start // tick)
+        self.count = 0
+
+    def _place(self, due: int, item) -> None:
+        slots = self._slots
+        delta = due - self._now
+        span = slots
+        for wheel in self._wheels:
+            if delta < span:
+                wheel[due // (span // slots) % slots].append((due, item))
+                return
+            span *= slots
+        self._overflow.append((due, item))
+
+    def schedule(self, item, deadline: float) -> None:
+        """
+        Fire `item` at the first tick at or after `deadline`.
+
+        Args:
+            item: Anything; it is handed back by `advance`.
+            deadline (float): The time, on the clock given to `advance`.
+
+        Returns:
+            None
+        """
+        due = max(math.ceil(deadline / self.tick), self._now + 1)
+        self._place(due, item)
+        self.count += 1
+
+    def advance(self, now: float) -> list:
+        """
+        Move the wheel to `now` and return the items that came due.
+
+        Args:
+            now (float): The current time.
+
+        Returns:
+            list: The items whose deadline has passed, oldest first.
+        """
+        target = int(now // self.tick)
+        fired = list()
+        if not self.count:
+            self._now = max(self._now, target)
+            return fired
+        slots = self._slots
+        wheels = self._wheels
+        while self._now < target and self.count:
+            self._now += 1
+            tick = self._now
+            span = slots ** len(wheels)
+            if not tick % span and self._overflow:
+                overflow, self._overflow = self._overflow, list()
+                for due, item in overflow:
+                    self._place(due, item)
+            for level in range(len(wheels) - 1, 0, -1):
+                span //= slots
+                if not tick % span:
+                    slot = wheels[level][tick // span % slots]
+                    if slot:
+                        moved = slot[:]
+                        slot.clear()
+                        for due, item in moved:
+                            self._place(due, item)
+            slot = wheels[0][tick % slots]
+            if slot:
+                fired.extend(item for _, item in slot)
+                self.count -= len(slot)
+                slot.clear()
+        self._now = max(self._now, target)
+        return fired
+
+
+class Line:
+    """One cart line holding stock of one catalog entry until `deadline`."""
+
+    __slots__ = ('cart', 'product', 'key', 'number', 'deadline')
+
+    def __init__(
+            self,
+            cart: dict,
+            product: str,
+            key: int,
+            deadline: float
+    ) -> None:
+        self.cart = cart
+        self.product = product
+        self.key = key
+        self.number = 0
+        self.deadline = deadline
+
+
+class Holds:
+    """
+    The stock held by the carts of one basket, released when it expires.
+
+    Every cart line has one entry in the timing wheel. Adding to a line only moves its deadline; when the old entry fires, a line that is not due yet is scheduled again, so a busy cart never touches the wheel more than once per TTL. # noqa E501
+
+    A cart is keyed by product name, but a line records the catalog entry it holds (the id from `CatalogVersions.id_of`), so one name held from two groups is two lines, and stock goes back to the group it came from even after the product or its group is renamed. # noqa E501
+    """
+
+    def __init__(
+            self,
+            basket: dict,
+            ttl: float = HOLD_TTL,
+            clock=time.monotonic
+    ) -> None:
+        self.basket = basket
+        self.ttl = ttl
+        self.clock = clock
+        # (id(cart), product) -> {entry id: Line}, oldest line first.
+        self._lines: dict[tuple[int, str], dict[int, Line]] = dict()
+        self._wheel = TimingWheel(start=clock())
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(len(lines) for lines in self._lines.values())
+
+    def hold(self, cart: dict, group: str, product: str, number: int) -> bool:  # noqa E501
+        """Reserve `number` items and add them to the cart line."""
+        key = catalog_versions(self.basket).id_of(group, product)
+        if key is None or not reserve(self.basket, group, product, number):
+            return False
+        deadline = self.clock() + self.ttl
+        with self._lock:
+            lines = self._lines.setdefault((id(cart), product), dict())
+            line = lines.get(key)
+            if line is None:
+                line = lines[key] = Line(cart, product, key, deadline)
+                self._wheel.schedule(line, deadline)
+            line.number += number
+            line.deadline = deadline
+            if product not in cart:
+                cart[product] = 0
+                track_insert(cart, product)
+            cart[product] += number
+        emit('cart_add', product, number)
+        return True
+
+    def drop(
+            self,
+            cart: dict,
+            product: str,
+            number: int,
+            key: int | None = None
+    ) -> None:
+        """
+        Take `number` items off the cart line and put them back.
+
+        Without `key`, items that are not held go first, then the newest lines. # noqa E501
+
+        Args:
+            cart (dict): The cart, product name -> number.
+            product (str): The cart product.
+            number (int): How many items to take off.
+            key (int | None): Only take from the line of this entry id.
+
+        Returns:
+            None
+        """
+        taken = list()
+        with self._lock:
+            lines = self._lines.get((id(cart), product), {})
+            left = number
+            if key is None:
+                unheld = cart[product] - sum(
+                    line.number for line in lines.values()
+                )
+                left -= min(left, max(unheld, 0))
+            for line_key in reversed(list(lines)):
+                if not left:
+                    break
+                if key is not None and line_key != key:
+                    continue
+                line = lines[line_key]
+                count = min(left, line.number)
+                line.number -= count
+                left -= count
+                taken.append((line_key, count))
+                if line.number <= 0:
+                    del lines[line_key]
+            if not lines:
+                self._lines.pop((id(cart), product), None)
+            cart[product] -= number
+            if not cart[product]:
+                del cart[product]
+                track_remove(cart, product)
+        emit('cart_remove', product, number)
+        for key, count in taken:
+            self._give_back(key, count)
+
+    def lines(self, cart: dict) -> list[tuple[str, int | None, int]]:
+        """
+        Return the `(product, entry id, number)` lines of a cart.
+
+        A cart product held from several groups gives one line per group. Items of the cart that are not held (the cart was filled without `hold`) come last with the entry id None. # noqa E501
+
+        Args:
+            cart (dict): The cart, product name -> number.
+
+        Returns:
+            list[tuple[str, int | None, int]]: The lines, in cart order.
+        """
+        result = list()
+        with self._lock:
+            for product, number in cart.items():
+                for line in self._lines.get((id(cart), product), {}).values():
+                    result.append((product, line.key, line.number))
+                    number -= line.number
+                if number > 0:
+                    result.append((product, None, number))
+        return result
+
+    def confirm(self, cart: dict) -> None:
+        """Keep the stock of every line of the cart for good (checkout)."""
+        with self._lock:
+            for product in cart:
+                self._lines.pop((id(cart), product), None)
+
+    def abandon(self, cart: dict) -> None:
+        """Put the stock of every line of the cart back and empty it."""
+        with self._lock:
+            held = list()
+            for product in cart:
+                lines = self._lines.pop((id(cart), product), {})
+                held.extend(lines.values())
+            removed = list(cart.items())
+            cart.clear()
+        for product, number in removed:
+            emit('cart_remove', product, number)
+        for line in held:
+            self._give_back(line.key, line.number)
+
+    def expire(self, now: float | None = None) -> list[Line]:
+        """Release the lines whose deadline has passed and return them."""
+        if now is None:
+            now = self.clock()
+        expired = list()
+        with self._lock:
+            for line in self._wheel.advance(now):
+                key = (id(line.cart), line.product)
+                lines = self._lines.get(key)
+                if lines is None or lines.get(line.key) is not line:
+                    continue
+                if line.deadline > now:
+                    self._wheel.schedule(line, line.deadline)
+                    continue
+                del lines[line.key]
+                if not lines:
+                    del self._lines[key]
+                cart = line.cart
+                cart[line.product] -= line.number
+                if cart[line.product] <= 0:
+                    del cart[line.product]
+                    track_remove(cart, line.product)
+                expired.append(line)
+        for line in expired:
+            emit('cart_expire', line.product, line.number)
+            self._give_back(line.key, line.number)
+        if expired:
+            logger.info('%s cart lines expired.', len(expired))
+        return expired
+
+    def _give_back(self, key: int, number: int) -> None:
+        where = catalog_versions(self.basket).where(key)
+        if where is None:
+            logger.warning('Held entry %s is gone; its hold is dropped.', key)
+            return
+        group, product = where
+        release(self.basket, group, product, number)
+
+
+def holds(basket: dict) -> Holds:
+    """
+    Return the holds of a basket, creating them on first use.
+
+    Args:
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+
+    Returns:
+        Holds: The holds kept for this basket.
+    """
+    entry = _holds.get(id(basket))
+    if entry is None or entry[0] is not basket:
+        entry = (basket, Holds(basket))
+        _holds[id(basket)] = entry
+    return entry[1]
+
+
+def forget_holds(basket: dict) -> None:
+    """
+    Drop the holds kept for a basket that is no longer used.
+
+    Args:
+        basket (dict): The basket whose holds should be released.
+
+    Returns:
+        None
+    """
+    _holds.pop(id(basket), None)
@@ -0,0 +1,246 @@
+import os
+import csv
+import json
+import logging
+import contextlib
+from itertools import islice
+from shop.models.basket import (
+    insert_group,
+    insert_product,
+)
+from shop.helper.exception import (
+    ShopError,
+    NotNumber,
+    GroupNameError,
+    ProductNameError,
+    ProductDoesExist,
+)
+from shop.helper.const import (
+    MAX_NUMBER,
+    BACK_COMMANDS,
+    WRONG_COMMANDS,
+)
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 10_000
+# Rejected lines kept with their reason; the rest are only counted.
+REJECTIONS_KEPT = 10
+
+
+class Rejections:
+    """
+    The lines rejected by an import: how many, and the first `kept` of them.
+
+    It takes the place of a list of `(line_number, message)` pairs, so a file of millions of broken lines does not hold them all in memory. `len()` is the full count and iterating yields the kept pairs. # noqa E501
+    """
+
+    __slots__ = ('count', 'kept', 'first')
+
+    def __init__(self, kept: int = REJECTIONS_KEPT) -> None:
+        self.count = 0
+        self.kept = kept
+        self.first: list[tuple[int, str]] = list()
+
+    def append(self, rejection: tuple[int, str]) -> None:
+        self.count += 1
+        if len(self.first) < self.kept:
+            self.first.append(rejection)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self):
+        return iter(self.first)
+
+
+def read_records(path: str):
+    """
+    Stream the records of a CSV or JSONL file, one at a time.
+
+    The format comes from the file extension: `.jsonl` (or `.ndjson`) holds one JSON object per line and is yielded as the raw line, so a broken line is rejected by `validate_record` instead of stopping the import; anything else is read as CSV with a header row. Both need the `group`, `product`, `price` and `number` columns; `discount` is optional. # noqa E501
+
+    Args:
+        path (str): The file to read.
+
+    Yields:
+        tuple[int, dict | str]: The line number and the raw record.
+    """
+    extension = os.path.splitext(path)[1].casefold()
+    with open(path, newline='', encoding='utf-8') as file:
+        if extension in ('.jsonl', '.ndjson'):
+            for line_number, line in enumerate(file, start=1):
+                if line.strip():
+                    yield line_number, line
+        else:
+            reader = csv.reader(file)
+            header = [name.strip().casefold() for name in next(reader, ())]
+            for row in reader:
+                yield reader.line_num, dict(zip(header, row))
+
+
+def _name(value, error: type[ShopError]) -> str:
+    name = value.strip().casefold() if isinstance(value, str) else ''
+    if name in WRONG_COMMANDS or name in BACK_COMMANDS:
+        raise error(f'Cannot use {WRONG_COMMANDS}')
+    if name.isnumeric():
+        raise error(f'Cannot use int "{name}" as a name.')
+    return name
+
+
+def _number(value, field: str) -> int:
+    if isinstance(value, str) and value.isdecimal():
+        value = int(value)
+    if type(value) is int and 0 <= value <= MAX_NUMBER:
+        return value
+    raise NotNumber(f'The {field} "{value}" must be a positive int.')
+
+
+def validate_record(record: dict | str) -> tuple[str, str, dict]:
+    """
+    Check one imported record with the rules of the interactive `added_product` flow. # noqa E501
+
+    Names are casefolded and may not be numbers or reserved commands, price and number must be whole numbers, the price may not be zero and a discount, when given, must be between 1 and 100 (0 or empty means no discount). # noqa E501
+
+    Args:
+        record (dict | str): The raw record from `read_records`; a string is decoded as JSON. # noqa E501
+
+    Returns:
+        tuple[str, str, dict]: The group, the product and its details.
+
+    Raises:
+        GroupNameError: The group name is not allowed.
+        ProductNameError: The product name is not allowed, or the line is not a JSON object. # noqa E501
+        NotNumber: The price, number or discount is not valid.
+    """
+    if isinstance(record, str):
+        try:
+            record = json.loads(record)
+        except ValueError as error:
+            raise ProductNameError(f'Broken JSON line: {error}')
+    if not isinstance(record, dict):
+        raise ProductNameError('The line is not a JSON object.')
+    group = _name(record.get('group'), GroupNameError)
+    product = _name(record.get('product'), ProductNameError)
+    price = _number(record.get('price'), 'price')
+    if not price:
+        raise NotNumber('The price cannot be zero.')
+    number = _number(record.get('number'), 'number')
+    discount = record.get('discount') or 0
+    discount = _number(discount, 'discount')
+    if discount > 100:
+        raise NotNumber(
+            'The discount percentage must be a number between 1 and 100.'
+        )
+    return group, product, {
+        'price': price,
+        'number': number,
+        'discount': discount
+    }
+
+
+def validate_records(records, rejected: Rejections):
+    """
+    Keep the valid records of a stream and drop the rest.
+
+    Rejections are logged and appended to `rejected` as `(line_number, message)`. # noqa E501
+
+    Args:
+        records: The `(line_number, record)` pairs from `read_records`.
+        rejected (Rejections): Receives the rejected line numbers and reasons.
+
+    Yields:
+        tuple[int, str, str, dict]: The line number, the group, the product and its details. # noqa E501
+    """
+    for line_number, record in records:
+        try:
+            group, product, details = validate_record(record)
+        except ShopError as error:
+            logger.warning('Line %s rejected: %s', line_number, error)
+            rejected.append((line_number, str(error)))
+            continue
+        yield line_number, group, product, details
+
+
+def batches(items, size: int = BATCH_SIZE):
+    """
+    Group a stream into lists of at most `size` items.
+
+    Args:
+        items: Any iterable.
+        size (int): The largest batch.
+
+    Yields:
+        list: The next batch.
+    """
+    items = iter(items)
+    while batch := list(islice(items, size)):
+        yield batch
+
+
+def apply_batch(basket: dict, batch: list, rejected: Rejections) -> int:
+    """
+    Add one batch of validated records to the basket.
+
+    Missing groups are created on the fly and a product that already exists in its group is rejected, like in the interactive flow. Baskets with a `transaction()` (the SQLite store) write the whole batch in one transaction. # noqa E501
+
+    Args:
+        basket (dict): The basket the records are imported into.
+        batch (list): `(line_number, group, product, details)` tuples.
+        rejected (Rejections): Receives the rejected duplicates.
+
+    Returns:
+        int: The number of products added.
+    """
+    transaction = getattr(basket, 'transaction', contextlib.nullcontext)
+    added = 0
+    with transaction():
+        for line_number, group, product, details in batch:
+            if group not in basket:
+                insert_group(basket, group)
+                logger.info('The "%s" group is created by the import.', group)
+            elif product in basket[group]:
+                error = ProductDoesExist(
+                    f'This {product} is exist in {group} group.'
+                )
+                logger.warning('Line %s rejected: %s', line_number, error)
+                rejected.append((line_number, str(error)))
+                continue
+            insert_product(basket, group, product, details)
+            added += 1
+    return added
+
+
+def import_catalog(
+        basket: dict,
+        path: str,
+        batch_size: int = BATCH_SIZE
+) -> tuple[int, Rejections]:
+    """
+    Import products from a CSV or JSONL file into the basket.
+
+    The file is streamed through `read_records`, `validate_records` and `batches`, so memory stays flat however long the file is. # noqa E501
+
+    Args:
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+        path (str): The CSV or JSONL file.
+        batch_size (int): The number of records applied at once.
+
+    Returns:
+        tuple[int, Rejections]: The number of products added and the rejected lines. # noqa E501
+
+    Raises:
+        OSError: The file cannot be read.
+        UnicodeDecodeError: The file is not UTF-8.
+        csv.Error: The CSV file is malformed.
+    """
+    rejected = Rejections()
+    added = 0
+    records = validate_records(read_records(path), rejected)
+    for batch in batches(records, batch_size):
+        added += apply_batch(basket, batch, rejected)
+        logger.debug('%s products imported from "%s".', added, path)
+    logger.info(
+        '%s products imported from "%s", %s rejected.', added, path, len(rejected)  # noqa E501
+    )
+    return added, rejected
@@ -0,0 +1,175 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# id(basket) -> (basket, {product: group}); the basket is kept alongside its
+# index so a recycled id can never hand back another basket's index.
+_indexes: dict[int, tuple[dict, dict]] = dict()
+
+
+def _native(basket: dict) -> bool:
+    # A `Catalog` answers product -> group lookups from its own hash table.
+    return hasattr(basket, 'group_of')
+
+
+def build_index(basket: dict) -> dict:
+    """
+    Build the product -> group index for a basket.
+
+    When the same product name exists in several groups the first group in basket order wins, which matches the old linear search. # noqa E501
+
+    Args:
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+
+    Returns:
+        dict: A dictionary mapping every product name to its group name.
+    """
+    index = dict()
+    for group in basket:
+        for product in basket[group]:
+            index.setdefault(product, group)
+    logger.debug('Product index built for %d products.', len(index))
+    return index
+
+
+def product_index(basket: dict) -> dict:
+    """
+    Return the product -> group index of a basket, building it on first use.
+
+    Args:
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+
+    Returns:
+        dict: The index maintained for this basket.
+    """
+    entry = _indexes.get(id(basket))
+    if entry is None or entry[0] is not basket:
+        entry = (basket, build_index(basket))
+        _indexes[id(basket)] = entry
+    return entry[1]
+
+
+def forget_index(basket: dict) -> None:
+    """
+    Drop the index kept for a basket that is no longer used.
+
+    Args:
+        basket (dict): The basket whose index should be released.
+
+    Returns:
+        None
+    """
+    _indexes.pop(id(basket), None)
+
+
+def lookup_group(product: str, basket: dict) -> str | None:
+    """
+    Find the group of a product in constant time.
+
+    The index entry is checked against the basket before it is trusted. A stale entry (the basket was edited without going through `shop.models.basket`) falls back to one scan that repairs the index. # noqa E501
+
+    Args:
+        product (str): The name of the product to search for.
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+
+    Returns:
+        str: The name of the group, or None if the product is not in the basket. # noqa E501
+    """
+    if _native(basket):
+        return basket.group_of(product)
+    index = product_index(basket)
+    group = index.get(product)
+    if group is None:
+        return None
+    items = basket.get(group)
+    if items is not None and product in items:
+        return group
+    del index[product]
+    for group in basket:
+        if product in basket[group]:
+            index[product] = group
+            return group
+    return None
+
+
+def index_product(basket: dict, product: str, group: str) -> None:
+    """
+    Record that `product` now lives in `group`.
+
+    Args:
+        basket (dict): The basket the product was added to.
+        product (str): The product name.
+        group (str): The group name.
+
+    Returns:
+        None
+    """
+    if not _native(basket):
+        product_index(basket).setdefault(product, group)
+
+
+def unindex_product(basket: dict, product: str, group: str) -> None:
+    """
+    Remove `product` of `group` from the index.
+
+    If another group still holds a product with the same name the index is pointed at it. # noqa E501
+
+    Args:
+        basket (dict): The basket the product was removed from.
+        product (str): The product name.
+        group (str): The group the product was removed from.
+
+    Returns:
+        None
+    """
+    if _native(basket):
+        return
+    index = product_index(basket)
+    if index.get(product) != group:
+        return
+    del index[product]
+    for other in basket:
+        if other != group and product in basket[other]:
+            index[product] = other
+            break
+
+
+def unindex_group(basket: dict, group: str) -> None:
+    """
+    Remove every product of `group` from the index.
+
+    Must be called while `group` is still in the basket.
+
+    Args:
+        basket (dict): The basket the group is removed from.
+        group (str): The group name.
+
+    Returns:
+        None
+    """
+    if _native(basket):
+        return
+    for product in basket[group]:
+        unindex_product(basket, product, group)
+
+
+def reindex_group(basket: dict, old_group: str, new_group: str) -> None:
+    """
+    Point the products of a renamed group at its new name.
+
+    Args:
+        basket (dict): The basket holding the renamed group.
+        old_group (str): The previous group name.
+        new_group (str): The new group name.
+
+    Returns:
+        None
+    """
+    if _native(basket):
+        return
+    index = product_index(basket)
+    for product in basket[new_group]:
+        if index.get(product) == old_group:
+            index[product] = new_group
+        else:
+            index.setdefault(product, new_group)
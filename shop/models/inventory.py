@@ -0,0 +1,269 @@
+import logging
+import itertools
+import threading
+from shop.models.basket import (
+    set_field,
+    change_stock,
+)
+
+logger = logging.getLogger(__name__)
+
+STRIPES = 64
+SHARDS = 8
+
+# One lock per stripe; a product always maps to the same stripe, so two
+# carts taking the same product queue up while different products almost
+# never share a lock.
+_stripes = tuple(threading.Lock() for _ in range(STRIPES))
+
+# Every thread gets the next number on its first reservation, so the
+# threads spread round robin over the shards. Thread idents are aligned
+# addresses and `get_ident() % SHARDS` put every thread on shard 0.
+_thread = threading.local()
+_thread_numbers = itertools.count()
+
+# id(basket) -> (basket, {(group, product): ShardedStock}), same scheme as
+# shop.models.index
+_hot: dict[int, tuple[dict, dict[tuple[str, str], 'ShardedStock']]] = dict()
+
+
+def stripe(group: str, product: str) -> threading.Lock:
+    """
+    Return the lock that guards the stock of a product.
+
+    Args:
+        group (str): The group holding the product.
+        product (str): The product name.
+
+    Returns:
+        threading.Lock: The stripe lock of the product.
+    """
+    return _stripes[hash((group, product)) % STRIPES]
+
+
+class ShardedStock:
+    """
+    Stock of a hot product split into shards, each with its own lock.
+
+    A thread takes from its own shard (threads are numbered round robin), then from the other shards one at a time, and only locks every shard, in order, when no single shard has enough. The shards never go below zero, so the product can not be oversold. Once `retire` has run, `take` and `put` return None and the caller goes back to the basket. # noqa E501
+    """
+
+    __slots__ = ('_counts', '_locks', 'retired')
+
+    def __init__(self, number: int, shards: int = SHARDS) -> None:
+        base, extra = divmod(number, shards)
+        self._counts = [base + (shard < extra) for shard in range(shards)]
+        self._locks = tuple(threading.Lock() for _ in range(shards))
+        self.retired = False
+
+    def _shard(self) -> int:
+        number = getattr(_thread, 'number', None)
+        if number is None:
+            number = _thread.number = next(_thread_numbers)
+        return number % len(self._counts)
+
+    @property
+    def total(self) -> int:
+        """The stock left in all shards."""
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            return sum(self._counts)
+        finally:
+            for lock in self._locks:
+                lock.release()
+
+    def retire(self) -> int:
+        """Stop taking and putting, and return the stock left."""
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            self.retired = True
+            return sum(self._counts)
+        finally:
+            for lock in self._locks:
+                lock.release()
+
+    def take(self, number: int) -> bool | None:
+        """Take `number` items if they are all available."""
+        counts = self._counts
+        shard = self._shard()
+        with self._locks[shard]:
+            if self.retired:
+                return None
+            if counts[shard] >= number:
+                counts[shard] -= number
+                return True
+        for other, lock in enumerate(self._locks):
+            with lock:
+                if self.retired:
+                    return None
+                if counts[other] >= number:
+                    counts[other] -= number
+                    return True
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            if self.retired:
+                return None
+            if sum(counts) < number:
+                return False
+            for shard in range(len(counts)):
+                taken = min(counts[shard], number)
+                counts[shard] -= taken
+                number -= taken
+            return True
+        finally:
+            for lock in self._locks:
+                lock.release()
+
+    def put(self, number: int) -> bool | None:
+        """Give `number` items back."""
+        shard = self._shard()
+        with self._locks[shard]:
+            if self.retired:
+                return None
+            self._counts[shard] += number
+            return True
+
+
+def _hot_products(basket: dict) -> dict[tuple[str, str], ShardedStock]:
+    entry = _hot.get(id(basket))
+    if entry is None or entry[0] is not basket:
+        entry = (basket, dict())
+        _hot[id(basket)] = entry
+    return entry[1]
+
+
+def reserve(basket: dict, group: str, product: str, number: int) -> bool:
+    """
+    Take `number` items of a product out of stock, all or nothing.
+
+    The check and the update run under the product's stripe lock (or in its shards for a hot product), so concurrent carts can never oversell. # noqa E501
+
+    Args:
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+        group (str): The group holding the product.
+        product (str): The product name.
+        number (int): How many items to take.
+
+    Returns:
+        bool: True if the items were reserved.
+    """
+    hot = _hot_products(basket)
+    while True:
+        sharded = hot.get((group, product))
+        if sharded is None:
+            with stripe(group, product):
+                if (group, product) in hot:
+                    continue
+                return change_stock(basket, group, product, -number)
+        taken = sharded.take(number)
+        if taken is not None:
+            return taken
+
+
+def release(basket: dict, group: str, product: str, number: int) -> None:
+    """
+    Put `number` reserved items of a product back into stock.
+
+    Args:
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+        group (str): The group holding the product.
+        product (str): The product name.
+        number (int): How many items to give back.
+
+    Returns:
+        None
+    """
+    hot = _hot_products(basket)
+    while True:
+        sharded = hot.get((group, product))
+        if sharded is None:
+            with stripe(group, product):
+                if (group, product) in hot:
+                    continue
+                change_stock(basket, group, product, number)
+                return
+        if sharded.put(number) is not None:
+            return
+
+
+def stock(basket: dict, group: str, product: str) -> int:
+    """
+    Return the stock left of a product, including a hot product's shards.
+
+    Args:
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+        group (str): The group holding the product.
+        product (str): The product name.
+
+    Returns:
+        int: The number of items in stock.
+    """
+    sharded = _hot_products(basket).get((group, product))
+    if sharded is not None:
+        return sharded.total
+    return basket[group][product]['number']
+
+
+def make_hot(
+        basket: dict,
+        group: str,
+        product: str,
+        shards: int = SHARDS
+) -> None:
+    """
+    Move the stock of a product into a sharded counter.
+
+    Reservations of a hot product stop touching the basket, so the `number` stored in the basket (and the journal) is only brought up to date by `flush_hot` and `make_cold`. # noqa E501
+
+    Args:
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+        group (str): The group holding the product.
+        product (str): The product name.
+        shards (int): The number of shards.
+
+    Returns:
+        None
+    """
+    hot = _hot_products(basket)
+    with stripe(group, product):
+        if (group, product) in hot:
+            return
+        number = basket[group][product]['number']
+        hot[group, product] = ShardedStock(number, shards)
+    logger.info('The "%s" stock is split into %s shards.', product, shards)
+
+
+def flush_hot(basket: dict) -> None:
+    """
+    Write the stock of every hot product back to the basket.
+
+    Args:
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+
+    Returns:
+        None
+    """
+    for (group, product), sharded in list(_hot_products(basket).items()):
+        set_field(basket, group, product, 'number', sharded.total)
+
+
+def make_cold(basket: dict, group: str, product: str) -> None:
+    """
+    Fold the shards of a hot product back into the basket.
+
+    Args:
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+        group (str): The group holding the product.
+        product (str): The product name.
+
+    Returns:
+        None
+    """
+    hot = _hot_products(basket)
+    with stripe(group, product):
+        sharded = hot.pop((group, product), None)
+        if sharded is not None:
+            set_field(basket, group, product, 'number', sharded.retire())
@@ -0,0 +1,403 @@
+import os
+import glob
+import time
+import struct
+import logging
+import threading
+from collections import Counter
+from shop.models.catalog import (
+    FIELDS,
+    Catalog,
+)
+from shop.models.basket import (
+    guard,
+    observe,
+    unguard,
+    unobserve,
+)
+from shop.models.position import rename_key
+from shop.models.snapshot import (
+    load_snapshot,
+    save_snapshot,
+)
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'SHOPJRNL'
+HEADER = struct.Struct('<8sQ')
+RECORD = struct.Struct('<IB')
+TEXT = struct.Struct('<H')
+NUMBER = struct.Struct('<q')
+PRODUCT = struct.Struct('<qqq')
+FIELD = struct.Struct('<Bq')
+
+COMMIT_RECORDS = 256
+COMMIT_MILLISECONDS = 50
+COMPACT_RECORDS = 1_000_000
+# Bytes of journal read at a time by `replay`.
+REPLAY_CHUNK = 1 << 20
+
+OP_GROUP = 1
+OP_PRODUCT = 2
+OP_RENAME_PRODUCT = 3
+OP_RENAME_GROUP = 4
+OP_REMOVE_GROUP = 5
+OP_STOCK = 6
+OP_FIELD = 7
+
+
+def _text(value: str) -> bytes:
+    value = value.encode()
+    return TEXT.pack(len(value)) + value
+
+
+def encode(event: str, *args) -> bytes:
+    """
+    Encode a basket change (see `shop.models.basket.observe`) as a record.
+
+    A record is a 4-byte length, a 1-byte operation and its payload: names as length-prefixed UTF-8, numbers as 8-byte integers. # noqa E501
+
+    Args:
+        event (str): The event name.
+        *args: The event arguments.
+
+    Returns:
+        bytes: The record.
+    """
+    if event == 'stock':
+        group, product, delta = args
+        op = OP_STOCK
+        payload = _text(group) + _text(product) + NUMBER.pack(delta)
+    elif event == 'field':
+        group, product, field, value = args
+        op = OP_FIELD
+        payload = (
+            _text(group) + _text(product)
+            + FIELD.pack(FIELDS.index(field), value)
+        )
+    elif event == 'product':
+        group, product, details = args
+        op = OP_PRODUCT
+        payload = _text(group) + _text(product) + PRODUCT.pack(
+            details['price'], details['number'], details['discount']
+        )
+    elif event == 'rename_product':
+        group, product, new_product = args
+        op = OP_RENAME_PRODUCT
+        payload = _text(group) + _text(product) + _text(new_product)
+    elif event == 'rename_group':
+        group, new_group = args
+        op, payload = OP_RENAME_GROUP, _text(group) + _text(new_group)
+    elif event == 'remove_group':
+        op, payload = OP_REMOVE_GROUP, _text(args[0])
+    elif event == 'group':
+        op, payload = OP_GROUP, _text(args[0])
+    else:
+        raise ValueError(f'Unknown basket event {event!r}.')
+    return RECORD.pack(len(payload) + 1, op) + payload
+
+
+def _texts(data: bytes, at: int, count: int) -> tuple[list[str], int]:
+    texts = list()
+    for _ in range(count):
+        size = data[at] | data[at + 1] << 8
+        texts.append(data[at + 2:at + 2 + size].decode())
+        at += 2 + size
+    return texts, at
+
+
+def replay(basket: dict, path: str) -> int:
+    """
+    Apply every record of a journal file to a basket.
+
+    Stock deltas add up and price or discount edits overwrite each other, so runs of them are folded per product and applied when a structural record, a stock overwrite or the end of the file is reached. A stock record is kept as its raw bytes (names and delta) and counted in C by `Counter`, so a move of the same size on the same product is only decoded once per run. Records go to the basket directly, without the indexes and observers of `shop.models.basket`; indexes are rebuilt on first use. The file is read in `REPLAY_CHUNK` blocks; a torn record at the end of the file (a crash during a write) is ignored. # noqa E501
+
+    Args:
+        basket (dict): The basket the journal was written for.
+        path (str): The journal file.
+
+    Returns:
+        int: The number of records applied.
+    """
+    count = 0
+    moves: list[bytes] = list()
+    stock: Counter = Counter()
+    fields: dict[tuple[bytes, int], int] = dict()
+    append = moves.append
+    unpack_record = RECORD.unpack_from
+    unpack_field = FIELD.unpack_from
+    number_field = FIELDS.index('number')
+
+    def fold() -> None:
+        nonlocal count
+        count += len(moves)
+        stock.update(moves)
+        moves.clear()
+
+    def flush() -> None:
+        fold()
+        for record, times in stock.items():
+            (group, product), at = _texts(record, 0, 2)
+            delta = NUMBER.unpack_from(record, at)[0]
+            basket[group][product]['number'] += delta * times
+        for (key, field), value in fields.items():
+            (group, product), _ = _texts(key, 0, 2)
+            basket[group][product][FIELDS[field]] = value
+        stock.clear()
+        fields.clear()
+
+    with open(path, 'rb') as file:
+        file.seek(HEADER.size)
+        data = b''
+        while True:
+            block = file.read(REPLAY_CHUNK)
+            if not block:
+                break
+            data += block
+            end = len(data)
+            last = end - RECORD.size
+            at = 0
+            while at <= last:
+                length, op = unpack_record(data, at)
+                following = at + 4 + length
+                if following > end:
+                    break
+                if op == OP_STOCK:
+                    append(data[at + 5:following])
+                    at = following
+                    continue
+                at += 5
+                count += 1
+                if op == OP_FIELD:
+                    field, value = unpack_field(data, following - 9)
+                    if field == number_field:
+                        flush()
+                        (group, product), _ = _texts(data, at, 2)
+                        basket[group][product]['number'] = value
+                    else:
+                        fields[data[at:following - 9], field] = value
+                else:
+                    flush()
+                    if op == OP_PRODUCT:
+                        (group, product), at = _texts(data, at, 2)
+                        price, number, discount = PRODUCT.unpack_from(data, at)  # noqa E501
+                        basket[group][product] = {
+                            'price': price,
+                            'number': number,
+                            'discount': discount
+                        }
+                    elif op == OP_RENAME_PRODUCT:
+                        (group, product, new_product), at = _texts(data, at, 3)  # noqa E501
+                        rename_key(basket[group], product, new_product)
+                    elif op == OP_RENAME_GROUP:
+                        (group, new_group), at = _texts(data, at, 2)
+                        rename_key(basket, group, new_group)
+                    elif op == OP_REMOVE_GROUP:
+                        del basket[_texts(data, at, 1)[0][0]]
+                    elif op == OP_GROUP:
+                        basket[_texts(data, at, 1)[0][0]] = dict()
+                at = following
+            fold()
+            data = data[at:]
+    if data:
+        logger.warning('Torn journal record at the end of %s.', path)
+    flush()
+    return count
+
+
+class Journal:
+    """
+    Append-only journal of basket changes with group commit.
+
+    Records are buffered and written with one `fsync` every `commit_records` records or `commit_milliseconds` milliseconds, whichever comes first, so a burst of changes shares one disk flush. A background thread commits a partial batch once it is old enough. # noqa E501
+    """
+
+    def __init__(
+            self,
+            path: str,
+            generation: int,
+            commit_records: int = COMMIT_RECORDS,
+            commit_milliseconds: int = COMMIT_MILLISECONDS,
+            records: int = 0,
+    ) -> None:
+        self.path = path
+        self.generation = generation
+        self.commit_records = commit_records
+        self.commit_seconds = commit_milliseconds / 1000
+        # Records in the file, counting those already there (`records`).
+        self.records = records
+        self._pending = bytearray()
+        self._pending_records = 0
+        self._first_pending = 0.0
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        exists = os.path.exists(path)
+        self._file = open(path, 'ab')
+        if not exists or not os.path.getsize(path):
+            self._file.write(HEADER.pack(MAGIC, generation))
+            self._sync()
+        self._committer = None
+        if commit_milliseconds > 0:
+            self._committer = threading.Thread(
+                target=self._commit_loop, name='journal-commit', daemon=True
+            )
+            self._committer.start()
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _commit_loop(self) -> None:
+        while not self._closed.wait(self.commit_seconds):
+            if self._pending_records:
+                self.commit()
+
+    def append(self, record: bytes) -> None:
+        """Buffer a record and commit the batch when it is due."""
+        with self._lock:
+            if not self._pending_records:
+                self._first_pending = time.monotonic()
+            self._pending += record
+            self._pending_records += 1
+            self.records += 1
+            age = time.monotonic() - self._first_pending
+            due = (
+                self._pending_records >= self.commit_records
+                or age >= self.commit_seconds
+            )
+            if due:
+                self._commit_locked()
+
+    def record(self, event: str, *args) -> None:
+        """Observer for `shop.models.basket.observe`."""
+        self.append(encode(event, *args))
+
+    def _commit_locked(self) -> None:
+        if not self._pending_records:
+            return
+        self._file.write(self._pending)
+        self._sync()
+        logger.debug('Journal committed %d records.', self._pending_records)
+        self._pending.clear()
+        self._pending_records = 0
+
+    def commit(self) -> None:
+        """Write and fsync every buffered record now."""
+        with self._lock:
+            self._commit_locked()
+
+    def close(self) -> None:
+        """Commit what is buffered and close the file."""
+        self._closed.set()
+        if self._committer is not None:
+            self._committer.join()
+        self.commit()
+        self._file.close()
+
+
+class DurableBasket:
+    """
+    A basket made durable by a snapshot plus the journal written on top of it.
+
+    The directory holds `snapshot.<generation>` and `journal`. The journal header names the generation it extends, so a crash during compaction never replays records that the newer snapshot already contains. # noqa E501
+    """
+
+    def __init__(
+            self,
+            directory: str,
+            default: dict | None = None,
+            commit_records: int = COMMIT_RECORDS,
+            commit_milliseconds: int = COMMIT_MILLISECONDS,
+            compact_records: int = COMPACT_RECORDS,
+    ) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.compact_records = compact_records
+        self._commit = (commit_records, commit_milliseconds)
+        self.generation = self._latest_generation()
+        if self.generation is None:
+            self.generation = 0
+            save_snapshot(
+                Catalog.from_dict(default or dict()), self._snapshot_path()
+            )
+        self.basket = load_snapshot(self._snapshot_path())
+        journal_path = self._journal_path()
+        replayed = 0
+        if os.path.exists(journal_path):
+            with open(journal_path, 'rb') as file:
+                header = file.read(HEADER.size)
+            magic, generation = HEADER.unpack(header)
+            if magic == MAGIC and generation == self.generation:
+                start = time.perf_counter()
+                replayed = count = replay(self.basket, journal_path)
+                logger.info(
+                    'Replayed %d journal records in %.3f s.',
+                    count, time.perf_counter() - start
+                )
+            else:
+                os.remove(journal_path)
+        self.journal = Journal(
+            journal_path, self.generation, *self._commit, records=replayed
+        )
+        self._prepared = threading.local()
+        guard(self.basket, self._prepare)
+        observe(self.basket, self._record)
+
+    def _latest_generation(self) -> int | None:
+        generations = [
+            int(path.rsplit('.', 1)[1])
+            for path in glob.glob(os.path.join(self.directory, 'snapshot.*'))
+            if path.rsplit('.', 1)[1].isdigit()
+        ]
+        return max(generations, default=None)
+
+    def _snapshot_path(self, generation: int | None = None) -> str:
+        if generation is None:
+            generation = self.generation
+        return os.path.join(self.directory, f'snapshot.{generation}')
+
+    def _journal_path(self) -> str:
+        return os.path.join(self.directory, 'journal')
+
+    def _prepare(self, event: str, *args) -> None:
+        # Encode before the change is applied: a change that cannot be
+        # journaled (e.g. a number outside int64) is refused, instead of
+        # being applied and then lost.
+        self._prepared.record = (event, args, encode(event, *args))
+
+    def _record(self, event: str, *args) -> None:
+        prepared = getattr(self._prepared, 'record', None)
+        self._prepared.record = None
+        if prepared is not None and prepared[0] == event and prepared[1] == args:  # noqa E501
+            self.journal.append(prepared[2])
+        else:
+            self.journal.record(event, *args)
+        if self.journal.records >= self.compact_records:
+            self.compact()
+
+    def compact(self) -> None:
+        """
+        Fold the journal into a new snapshot and start an empty journal.
+
+        Returns:
+            None
+        """
+        generation = self.generation + 1
+        self.journal.commit()
+        save_snapshot(self.basket, self._snapshot_path(generation))
+        self.journal.close()
+        temp = f'{self._journal_path()}.tmp'
+        if os.path.exists(temp):
+            os.remove(temp)
+        Journal(temp, generation, commit_milliseconds=0).close()
+        os.replace(temp, self._journal_path())
+        os.remove(self._snapshot_path())
+        self.generation = generation
+        self.journal = Journal(self._journal_path(), generation, *self._commit)
+        logger.info('Journal compacted into snapshot %d.', generation)
+
+    def close(self) -> None:
+        """Commit the journal and stop recording changes."""
+        unguard(self.basket, self._prepare)
+        unobserve(self.basket, self._record)
+        self.journal.close()
@@ -0,0 +1,234 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# id(container) -> (container, PositionIndex), same scheme as shop.models.index
+_positions: dict[int, tuple[dict, 'PositionIndex']] = dict()
+
+
+class PositionIndex:
+    """
+    Order-statistic index over the keys of a dictionary.
+
+    Keys keep the slot they were inserted in; a removed key leaves a hole. A Fenwick tree over the slots counts the live keys so that "key at position N" and "position of key" are both O(log n). Renaming a key reuses its slot, so the order never changes. # noqa E501
+    """
+
+    __slots__ = ('_slots', '_slot_of', '_tree', '_holes')
+
+    def __init__(self, keys=()) -> None:
+        self._slots = [None]
+        self._slot_of = dict()
+        self._tree = [0]
+        self._holes = 0
+        for key in keys:
+            self.append(key)
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def __contains__(self, key) -> bool:
+        return key in self._slot_of
+
+    def __iter__(self):
+        return (key for key in self._slots[1:] if key is not None)
+
+    def _prefix(self, slot: int) -> int:
+        tree = self._tree
+        total = 0
+        while slot > 0:
+            total += tree[slot]
+            slot &= slot - 1
+        return total
+
+    def _update(self, slot: int, delta: int) -> None:
+        tree = self._tree
+        size = len(tree)
+        while slot < size:
+            tree[slot] += delta
+            slot += slot & -slot
+
+    def append(self, key) -> None:
+        """Add `key` at the last position."""
+        if key in self._slot_of:
+            return
+        slot = len(self._slots)
+        self._slots.append(key)
+        self._slot_of[key] = slot
+        low = slot - (slot & -slot)
+        self._tree.append(1 + self._prefix(slot - 1) - self._prefix(low))
+
+    def remove(self, key) -> None:
+        """Remove `key`; the keys after it move up one position."""
+        slot = self._slot_of.pop(key, None)
+        if slot is None:
+            return
+        self._slots[slot] = None
+        self._update(slot, -1)
+        self._holes += 1
+        if self._holes > 32 and self._holes > len(self._slot_of):
+            self.__init__(list(self))
+
+    def rename(self, key, new_key) -> None:
+        """Replace `key` by `new_key` at the same position."""
+        if key not in self._slot_of or key == new_key:
+            return
+        if new_key in self._slot_of:
+            self.remove(new_key)
+        slot = self._slot_of.pop(key)
+        self._slots[slot] = new_key
+        self._slot_of[new_key] = slot
+
+    def position(self, key) -> int:
+        """Return the 1-based position of `key`, or 0 if it is missing."""
+        slot = self._slot_of.get(key)
+        if slot is None:
+            return 0
+        return self._prefix(slot)
+
+    def select(self, number: int):
+        """Return the key at 1-based position `number`, or None."""
+        if not 1 <= number <= len(self._slot_of):
+            return None
+        tree = self._tree
+        size = len(tree) - 1
+        slot = 0
+        step = 1 << size.bit_length()
+        while step:
+            following = slot + step
+            if following <= size and tree[following] < number:
+                slot = following
+                number -= tree[following]
+            step >>= 1
+        return self._slots[slot + 1]
+
+
+def positions(container: dict) -> PositionIndex:
+    """
+    Return the position index of a dictionary, building it on first use.
+
+    An index whose size no longer matches the dictionary (it was edited without the tracking helpers) is rebuilt. # noqa E501
+
+    Args:
+        container (dict): The basket, a group or a shopping list.
+
+    Returns:
+        PositionIndex: The index kept for this dictionary.
+    """
+    entry = _positions.get(id(container))
+    if (
+        entry is None
+        or entry[0] is not container
+        or len(entry[1]) != len(container)
+    ):
+        entry = (container, PositionIndex(container))
+        _positions[id(container)] = entry
+        logger.debug('Position index built for %d keys.', len(container))
+    return entry[1]
+
+
+def forget_positions(container: dict) -> None:
+    """
+    Drop the position index kept for a dictionary.
+
+    Args:
+        container (dict): The dictionary that is no longer used.
+
+    Returns:
+        None
+    """
+    _positions.pop(id(container), None)
+
+
+def item_at(container: dict, number: int):
+    """
+    Return the key at 1-based position `number` of a dictionary.
+
+    Args:
+        container (dict): The basket, a group or a shopping list.
+        number (int): The 1-based position.
+
+    Returns:
+        The key at that position, or None if the position is out of range.
+    """
+    if hasattr(container, 'select'):
+        return container.select(number)
+    return positions(container).select(number)
+
+
+def position_of(container: dict, key) -> int:
+    """
+    Return the 1-based position of `key` in a dictionary.
+
+    Args:
+        container (dict): The basket, a group or a shopping list.
+        key: The key to locate.
+
+    Returns:
+        int: The position, or 0 if the key is missing.
+    """
+    if hasattr(container, 'position'):
+        return container.position(key)
+    return positions(container).position(key)
+
+
+def track_insert(container: dict, key) -> None:
+    """
+    Record a key that was just added to `container`.
+
+    Args:
+        container (dict): The dictionary that received the key.
+        key: The new key.
+
+    Returns:
+        None
+    """
+    entry = _positions.get(id(container))
+    if entry is not None and entry[0] is container:
+        entry[1].append(key)
+
+
+def track_remove(container: dict, key) -> None:
+    """
+    Record a key that was just removed from `container`.
+
+    Args:
+        container (dict): The dictionary that lost the key.
+        key: The removed key.
+
+    Returns:
+        None
+    """
+    entry = _positions.get(id(container))
+    if entry is not None and entry[0] is container:
+        entry[1].remove(key)
+
+
+def rename_key(container: dict, key, new_key) -> None:
+    """
+    Rename a key of a dictionary in place without moving it.
+
+    A plain `container[new_key] = container.pop(key)` sends the key to the end, which reorders the menus. The dictionary is rebuilt in order instead; an existing `new_key` entry is replaced. Containers with their own `rename` (a `Catalog` and its groups) rename in place. # noqa E501
+
+    Args:
+        container (dict): The basket or a group.
+        key: The current key.
+        new_key: The new key.
+
+    Returns:
+        None
+    """
+    if key == new_key:
+        return
+    entry = _positions.get(id(container))
+    if hasattr(container, 'rename'):
+        container.rename(key, new_key)
+    else:
+        items = [
+            (new_key if name == key else name, value)
+            for name, value in container.items()
+            if name != new_key
+        ]
+        container.clear()
+        container.update(items)
+    if entry is not None and entry[0] is container:
+        entry[1].rename(key, new_key)
@@ -1,5 +1,12 @@
 import logging
 from shop.models.group import get_group
+from shop.models.position import item_at
+from shop.models.versions import net_price
+from shop.models.basket import (
+    set_field,
+    insert_product,
+    rename_product,
+)
 from shop.helper.exception import (
     NotNumber,
     ProductNameError,
@@ -7,17 +14,26 @@ from shop.helper.exception import (
     GroupDoesNotExist,
     ProductDoesNotExist,
 )
+from shop.utils.metrics import time_command
 from shop.helper.const import (
     NO,
     YES,
     BACK_COMMANDS,
     WRONG_COMMANDS,
+    MAX_NUMBER,
+    PRODUCT_COMMANDS,
+)
+from shop.utils.pager import (
+    Pager,
+    browse,
+    show_footer,
 )
 from shop.utils.help_funcs import (
+    ask,
     keep,
     title,
-    help_product,
     clear_screen,
+    help_product,
     decortor_exceptions,
 )
 
@@ -35,10 +51,10 @@ def get_product_by_index(number: int, basket: dict) -> str | bool:
     Returns:
         str: The product name at the given index, or False if the index is invalid. # noqa E501
     """
-    for index, group in enumerate(basket, start=1):
-        if index == number:
-            return group
-    return False
+    group = item_at(basket, number)
+    if group is None:
+        return False
+    return group
 
 
 def check_exist(product: str, basket: dict, group: str) -> bool:
@@ -56,6 +72,21 @@ def check_exist(product: str, basket: dict, group: str) -> bool:
     return product in basket[group]
 
 
+def whole_number(text: str) -> int | None:
+    """
+    Return `text` as a whole number the catalog columns can store.
+
+    Args:
+        text (str): The user input.
+
+    Returns:
+        int | None: The number, or None if it is not made of digits or is above MAX_NUMBER. # noqa E501
+    """
+    if text.isdecimal() and int(text) <= MAX_NUMBER:
+        return int(text)
+    return None
+
+
 def get_price_number(word: str) -> int | str | bool:
     """
     Prompts the user to enter a price and converts it to an integer.
@@ -67,9 +98,10 @@ def get_price_number(word: str) -> int | str | bool:
         message = 'How much is it ? '
     elif word == 'number':
         message = 'How many to have ? '
-    number = input(message)
-    if number.isnumeric():
-        return int(number)
+    number = ask(message)
+    value = whole_number(number)
+    if value is not None:
+        return value
     elif number in BACK_COMMANDS:
         return 'back'
     else:
@@ -88,7 +120,7 @@ def get_product_name(basket: dict, cart_group: str) -> str | bool:
         str: The validated product name entered by the user.
     """
     messeage = 'Enter the product for add to shopping list: '
-    product_name = input(messeage).casefold()
+    product_name = ask(messeage).casefold()
     if product_name in BACK_COMMANDS:
         return 'back'
     elif product_name in WRONG_COMMANDS or product_name.isspace():
@@ -106,13 +138,12 @@ def discount_product() -> int | str:
     message1 = 'How many percent discount should be applied? (1-100) '
     message2 = 'The discount percentage must be a number between 1 and 100.'
     while True:
-        discount = input(message).casefold()
+        discount = ask(message).casefold()
         if discount in BACK_COMMANDS:
             return 'back'
         elif discount in YES:
-            value = input(message1)
-            if value.isnumeric():
-                value = int(value)
+            value = whole_number(ask(message1))
+            if value is not None:
                 if 1 <= value <= 100:
                     return value
                 else:
@@ -156,13 +187,13 @@ def added_product(basket: dict) -> None:
         if product_name == 'back':
             break
         elif product_name == 'wrong':
-            logger.error(f'Cannot use {WRONG_COMMANDS}.')
+            logger.error('Cannot use %s.', WRONG_COMMANDS)
             raise ProductNameError(f'Cannot use {WRONG_COMMANDS}')
         elif product_name == 'int':
-            logger.warning(f'The name input "{product_name}" must be string.')
+            logger.warning('The name input "%s" must be string.', product_name)
             raise ProductNameError('Cannot use int. Please try again...')
         elif not product_name:
-            logger.error(f'This "{product_name}" is exist in shopping list.')
+            logger.error('This "%s" is exist in shopping list.', product_name)
             raise ProductDoesExist(
                 f'This {product_name} is exist in shopping list.'
             )
@@ -171,7 +202,7 @@ def added_product(basket: dict) -> None:
         if price == 'back':
             break
         elif not price:
-            logger.error(f'Cannot use {number}.just enter int.')
+            logger.error('Cannot use %s.just enter int.', number)
             raise NotNumber(
                 f'Cannot use {number}.just enter int. Please try again...'
             )
@@ -180,7 +211,7 @@ def added_product(basket: dict) -> None:
         if price == 'back':
             break
         elif not price:
-            logger.error(f'Cannot use {number}.just enter int.')
+            logger.error('Cannot use %s.just enter int.', number)
             raise NotNumber(
                 f'Cannot use {number}.just enter int. Please try again...'
             )
@@ -192,14 +223,12 @@ def added_product(basket: dict) -> None:
             logger.error('Cannot use string.just enter integer.')
             raise NotNumber('You must enter the int. Please try again...')
 
-        basket[cart_group].update(
-            {product_name: {
-                'price': price,
-                'number': number,
-                'discount': discount
-            }}
-        )
-        logger.debug(f'The "{product_name}" added to shopping list.')
+        insert_product(basket, cart_group, product_name, {
+            'price': price,
+            'number': number,
+            'discount': discount
+        })
+        logger.debug('The "%s" added to shopping list.', product_name)
         print(f'The `{product_name}` added to shopping list.')
         keep()
 
@@ -236,52 +265,95 @@ def get_of_product(number: int, basket: dict, group: str) -> str | bool:
 
     items = basket.get(group)
     if items:
-        if 1 <= number <= len(items):
-            for index, product in enumerate(items, start=1):
-                if index == number:
-                    return product
+        product = item_at(items, number)
+        if product is not None:
+            return product
     return False
 
 
-def show_product_group(basket: dict, group: str) -> None:
+def show_product_group(
+        basket: dict,
+        group: str,
+        pager: Pager | None = None
+) -> None:
     """
     Display the items in a specific group of a basket.
 
+    Only the page chosen by `pager` is read and formatted, followed by a footer when the group has more pages. # noqa E501
+
     Args:
         basket (dict): The dictionary representing the basket of items.
         group (str): The name of the group to display.
+        pager (Pager | None): The page to show; the first page by default.
 
     Returns:
         None
 
     """
+    pager = pager or Pager()
     items = basket[group]
-    for index, product in enumerate(items, start=1):
+    for index, product in pager.entries(items):
         price = items[product]["price"]
         number = items[product]["number"]
         discount = items[product]["discount"]
-        print(f'\t{index}: {product} -> Price: {price:,} Number: {number} and discount: {discount}')  # noqa E501
-    logger.info(f'Show all products in {group} group')
+        net = net_price(basket, group, product)
+        print(f'\t{index}: {product} -> Price: {price:,} Number: {number} and discount: {discount} net: {net:,}')  # noqa E501
+    show_footer(pager, len(items))
+    logger.info('Show all products in %s group', group)
+
 
+def product_rows(basket: dict, word: str = ''):
+    """
+    Yield the rows of the product listing without formatting them.
+
+    Args:
+        basket (dict): A dictionary representing the shopping basket.
+        word (str): Only keep products whose name contains this word, with the header of their group. # noqa E501
+
+    Yields:
+        tuple[int, str, str | None]: The position, the group and the product, or None for a group header row. # noqa E501
+    """
+    for group_index, group in enumerate(basket, start=1):
+        if not word:
+            yield group_index, group, None
+        header = bool(word)
+        for index, product in enumerate(basket[group], start=1):
+            if word and word not in product.casefold():
+                continue
+            if header:
+                yield group_index, group, None
+                header = False
+            yield index, group, product
 
-def show_product(basket: dict) -> str:
+
+def show_product(basket: dict, pager: Pager | None = None) -> str:
     """
     Displays the products in the shopping basket.
 
+    Rows come from `product_rows` and only the page chosen by `pager` is formatted. # noqa E501
+
     Args:
         basket (dict): A dictionary representing the shopping basket.
+        pager (Pager | None): The page to show; the first page by default.
 
     Returns:
         str: The formatted string representation of the products.
     """
+    pager = pager or Pager()
     output = ""
-    for index, group in enumerate(basket, start=1):
-        output += f'{index}: {group}\n'
-        for index, product in enumerate(basket[group], start=1):
-            price = basket[group][product]["price"]
-            number = basket[group][product]["number"]
-            discount = basket[group][product]["discount"]
-            output += f'\t{index}: {product} -> Price: {price:,} number: {number} and discpunt: {discount}\n'  # noqa E501
+    for index, group, product in pager.rows(product_rows(basket, pager.word)):
+        if product is None:
+            output += f'{index}: {group}\n'
+            continue
+        price = basket[group][product]["price"]
+        number = basket[group][product]["number"]
+        discount = basket[group][product]["discount"]
+        net = net_price(basket, group, product)
+        output += f'\t{index}: {product} -> Price: {price:,} number: {number} and discpunt: {discount} net: {net:,}\n'  # noqa E501
+    total = len(basket) + sum(len(basket[group]) for group in basket)
+    footer = pager.footer(total)
+    if footer is not None:
+        output += f'\n{footer}\n'
     logger.info('Show all products with groups.')
     return output
 
@@ -303,14 +375,17 @@ def get_product_choices(basket: dict, cart_group: str) -> str | bool:
     """
     message = 'Please Enter the name product or number product: '
     message1 = 'The "{}" is not exist. Please try again.'
+    pager = Pager()
     while True:
         clear_screen()
-        show_product_group(basket, cart_group)
-        product_choice = input(message).casefold()
+        show_product_group(basket, cart_group, pager)
+        product_choice = ask(message).casefold()
         if product_choice in BACK_COMMANDS:
             return 'back'
         elif product_choice in WRONG_COMMANDS or product_choice.isspace():
             return 'wrong'
+        elif pager.command(product_choice, basket[cart_group]):
+            continue
         if product_choice.isnumeric():
             product_choice = int(product_choice)
             product_name = get_of_product(product_choice, basket, cart_group)
@@ -351,20 +426,20 @@ def edited_name(basket: dict, cart_group: str) -> None:
         if product_name == 'back':
             break
         elif product_name == 'wrong':
-            logger.error(f'Cannot use {WRONG_COMMANDS}.')
+            logger.error('Cannot use %s.', WRONG_COMMANDS)
             raise ProductNameError(f'Cannot use {WRONG_COMMANDS}')
-        new_product = input('Enter the new product: ').casefold()
+        new_product = ask('Enter the new product: ').casefold()
         if new_product.isnumeric():
-            logger.error(f'Cannot use "{new_product}" to add shopping list.')
+            logger.error('Cannot use "%s" to add shopping list.', new_product)
             raise ProductNameError('Cannot use int to add shopping list.')
         else:
             if new_product in BACK_COMMANDS:
                 break
             elif new_product in WRONG_COMMANDS or new_product.isspace():
-                logger.error(f'Cannot use {WRONG_COMMANDS}.')
+                logger.error('Cannot use %s.', WRONG_COMMANDS)
                 raise ProductNameError(f'Cannot use {WRONG_COMMANDS}')
-        basket[cart_group][new_product] = basket[cart_group].pop(product_name)
-        logger.debug(f'The "{product_name}" edited to {new_product}.')
+        rename_product(basket, cart_group, product_name, new_product)
+        logger.debug('The "%s" edited to %s.', product_name, new_product)
         clear_screen()
         show_product_group(basket, cart_group)
         keep()
@@ -391,21 +466,21 @@ def edited_price_number(basket: dict, cart_group: str, word: str) -> None:
         if product_name == 'back':
             break
         if product_name == 'wrong':
-            logger.error(f'Cannot use {WRONG_COMMANDS}.')
+            logger.error('Cannot use %s.', WRONG_COMMANDS)
             raise ProductNameError(f'Cannot use {WRONG_COMMANDS}')
-        new_word = input(f'Enter the new {word}: ').casefold()
-        if new_word.isnumeric():
-            new_word = int(new_word)
+        new_word = ask(f'Enter the new {word}: ').casefold()
+        if (value := whole_number(new_word)) is not None:
+            new_word = value
             if word == 'discount':
                 if 1 <= new_word <= 100:
                     logger.debug(
-                        f'The "{product_name}" edited {word} to {new_word}.'
+                        'The "%s" edited %s to %s.', product_name, word, new_word  # noqa E501
                     )
                 else:
                     print(message2)
                     keep()
                     continue
-            basket[cart_group][product_name][word] = new_word
+            set_field(basket, cart_group, product_name, word, new_word)
             show_product_group(basket, cart_group)
             keep()
             break
@@ -438,7 +513,7 @@ def edited_product(basket: dict) -> None:
             break
         elif cart_group == 'Not':
             logger.error(
-                f'The "{cart_group}" is not in groups. Please try again.'
+                'The "%s" is not in groups. Please try again.', cart_group
             )
             raise GroupDoesNotExist(
                 f'The `{cart_group}` is not in groups. Please try again'
@@ -446,11 +521,11 @@ def edited_product(basket: dict) -> None:
         clear_screen()
         print(title('Edit Product Menu'))
         show_product_group(basket, cart_group)
-        choice = input(message).casefold()
+        choice = ask(message).casefold()
         if choice in BACK_COMMANDS:
             break
         elif choice in WRONG_COMMANDS or choice.isspace():
-            logger.error(f'Cannot use {WRONG_COMMANDS}.')
+            logger.error('Cannot use %s.', WRONG_COMMANDS)
             raise ProductNameError(f'Cannot use {WRONG_COMMANDS}')
         elif choice == 'name':
             try:
@@ -500,22 +575,22 @@ def product_menu(basket: dict) -> None:
         print(title('Products Menu'))
         help_product()
         if empty_products(basket):
-            command = input(message1).casefold()
-            if command in BACK_COMMANDS:
-                break
-            elif command == 'add':
-                added_product(basket)
-            elif command == 'show':
-                print(show_product(basket))
-                keep()
+            command = ask(message1).casefold()
+            with time_command('admin:product', command, PRODUCT_COMMANDS):
+                if command in BACK_COMMANDS:
+                    break
+                elif command == 'add':
+                    added_product(basket)
+                elif command == 'show':
+                    browse(lambda pager: print(show_product(basket, pager)))
         else:
-            command = input(message).casefold()
-            if command in BACK_COMMANDS:
-                break
-            elif command == 'add':
-                added_product(basket)
-            elif command == 'edit':
-                edited_product(basket)
-            elif command == 'show':
-                print(show_product(basket))
-                keep()
+            command = ask(message).casefold()
+            with time_command('admin:product', command, PRODUCT_COMMANDS):
+                if command in BACK_COMMANDS:
+                    break
+                elif command == 'add':
+                    added_product(basket)
+                elif command == 'edit':
+                    edited_product(basket)
+                elif command == 'show':
+                    browse(lambda pager: print(show_product(basket, pager)))
@@ -0,0 +1,219 @@
+import math
+import logging
+from array import array
+from difflib import SequenceMatcher
+from collections import Counter
+from shop.models.index import lookup_group
+from shop.models.versions import catalog_versions
+from shop.models.basket import (
+    observe,
+    unobserve,
+)
+
+logger = logging.getLogger(__name__)
+
+# A name must share at least this share of the query trigrams to be a
+# candidate, which lets a query skip the most common trigram lists.
+MIN_OVERLAP = 1 / 3
+# Posting entries counted per query once the rarest list is counted; the
+# rest of the lists are too common to tell names apart anyway.
+COUNT_BUDGET = 40_000
+CANDIDATES = 32
+COMPACT_RETIRED = 1024
+
+# id(basket) -> (basket, TrigramIndex, observer), same scheme as
+# shop.models.index
+_searches: dict[int, tuple[dict, 'TrigramIndex', object]] = dict()
+
+
+def trigrams(name: str) -> set[str]:
+    """
+    Return the trigrams of a casefolded name padded with spaces.
+
+    Args:
+        name (str): A product name or a search word.
+
+    Returns:
+        set[str]: The distinct trigrams.
+    """
+    padded = f'  {name.casefold()} '
+    return {padded[at:at + 3] for at in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Inverted index from trigrams to product names.
+
+    Every name gets an integer id and each trigram keeps an `array` of the ids that contain it. A removed name only loses its id; the posting lists are rebuilt once enough ids are retired. # noqa E501
+    """
+
+    __slots__ = ('_names', '_ids', '_postings', 'retired')
+
+    def __init__(self, names=()) -> None:
+        self._names: list[str | None] = list()
+        self._ids: dict[str, int] = dict()
+        self._postings: dict[str, array] = dict()
+        self.retired = 0
+        for name in names:
+            self.add(name)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, name) -> bool:
+        return name in self._ids
+
+    def add(self, name: str) -> None:
+        """Index a name; a name that is already indexed is left alone."""
+        if name in self._ids:
+            return
+        number = len(self._names)
+        self._names.append(name)
+        self._ids[name] = number
+        postings = self._postings
+        for gram in trigrams(name):
+            posting = postings.get(gram)
+            if posting is None:
+                posting = postings[gram] = array('i')
+            posting.append(number)
+
+    def discard(self, name: str) -> None:
+        """Forget a name if it is indexed."""
+        number = self._ids.pop(name, None)
+        if number is None:
+            return
+        self._names[number] = None
+        self.retired += 1
+        if self.retired > COMPACT_RETIRED and self.retired > len(self._ids):
+            self.compact()
+
+    def compact(self) -> None:
+        """Rebuild the posting lists without the retired ids."""
+        names = list(self._ids)
+        self._names = list()
+        self._ids = dict()
+        self._postings = dict()
+        self.retired = 0
+        for name in names:
+            self.add(name)
+
+    def candidates(self, word: str, limit: int = CANDIDATES) -> list[str]:
+        """
+        Return up to `limit` names sharing the most trigrams with `word`.
+
+        Only the rarest posting lists are counted: a name that shares `MIN_OVERLAP` of the query trigrams must appear in at least one of them. Counting also stops after `COUNT_BUDGET` entries, so a query made of very common trigrams stays fast and ranks by its rarest ones. # noqa E501
+
+        Args:
+            word (str): The search word.
+            limit (int): The largest number of names to return.
+
+        Returns:
+            list[str]: The names, best first.
+        """
+        grams = trigrams(word)
+        postings = sorted(
+            (self._postings.get(gram, ()) for gram in grams), key=len
+        )
+        needed = max(1, math.ceil(len(grams) * MIN_OVERLAP))
+        counts = Counter()
+        counted = 0
+        for posting in postings[:len(postings) - needed + 1]:
+            if counted and counted + len(posting) > COUNT_BUDGET:
+                break
+            counts.update(posting)
+            counted += len(posting)
+        names = self._names
+        for want in (limit * 2, None):
+            found = [
+                names[number]
+                for number, _ in counts.most_common(want)
+                if names[number] is not None
+            ][:limit]
+            if len(found) == limit or len(counts) <= limit * 2:
+                break
+        return found
+
+
+def _observer(basket: dict, index: TrigramIndex):
+    def record(event: str, *args) -> None:
+        if event == 'product':
+            index.add(args[1])
+        elif event == 'rename_product':
+            group, product, new_product = args
+            index.add(new_product)
+            if lookup_group(product, basket) is None:
+                index.discard(product)
+    return record
+
+
+def search_index(basket: dict) -> TrigramIndex:
+    """
+    Return the trigram index of a basket, building it on first use.
+
+    The index follows products added or renamed through `shop.models.basket`. Products that disappear with their group are dropped the next time a search meets them. # noqa E501
+
+    Args:
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+
+    Returns:
+        TrigramIndex: The index maintained for this basket.
+    """
+    entry = _searches.get(id(basket))
+    if entry is None or entry[0] is not basket:
+        index = TrigramIndex(
+            product for group in basket for product in basket[group]
+        )
+        observer = _observer(basket, index)
+        observe(basket, observer)
+        entry = (basket, index, observer)
+        _searches[id(basket)] = entry
+        logger.debug('Search index built for %d products.', len(index))
+    return entry[1]
+
+
+def forget_search(basket: dict) -> None:
+    """
+    Drop the trigram index kept for a basket that is no longer used.
+
+    Args:
+        basket (dict): The basket whose index should be released.
+
+    Returns:
+        None
+    """
+    entry = _searches.pop(id(basket), None)
+    if entry is not None and entry[0] is basket:
+        unobserve(basket, entry[2])
+
+
+def search_products(
+        basket: dict,
+        word: str,
+        limit: int = 10
+) -> list[tuple[str, str, float]]:
+    """
+    Find the products of the whole basket that best match a word.
+
+    Candidates come from the trigram index; only they get an exact `SequenceMatcher` ratio, and the best `limit` of them are returned. A name held by several groups gives one result per group. # noqa E501
+
+    Args:
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+        word (str): The search word.
+        limit (int): The largest number of results.
+
+    Returns:
+        list[tuple[str, str, float]]: `(product, group, score)` tuples, best first. # noqa E501
+    """
+    index = search_index(basket)
+    versions = catalog_versions(basket)
+    word = word.casefold()
+    results = list()
+    for product in index.candidates(word, max(limit * 4, CANDIDATES)):
+        groups = versions.groups_of(product)
+        if not groups:
+            index.discard(product)
+            continue
+        score = SequenceMatcher(None, product.casefold(), word).ratio()
+        results.extend((product, group, score) for group in groups)
+    results.sort(key=lambda result: result[2], reverse=True)
+    return results[:limit]
@@ -0,0 +1,411 @@
+import os
+import json
+import mmap
+import struct
+import logging
+from zlib import crc32
+from array import array
+from collections.abc import MutableMapping
+from shop.models.catalog import FIELDS
+from shop.models.position import (
+    positions,
+    rename_key,
+)
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'SHOPSNAP'
+VERSION = 1
+
+# magic, version, groups, products, groups_at, products_at, table_at,
+# table_slots, strings_at
+HEADER = struct.Struct('<8sIIQQQQQQ')
+# name_at, name_length, first_row, row_count
+GROUP = struct.Struct('<QQQQ')
+# price, number, discount, name_at, name_length, group
+PRODUCT = struct.Struct('<qqqQII')
+FIELD_AT = {field: index * 8 for index, field in enumerate(FIELDS)}
+
+
+def _hash(name: bytes) -> int:
+    return crc32(name)
+
+
+def save_snapshot(basket: dict, path: str) -> None:
+    """
+    Write a basket to a binary snapshot file.
+
+    The file holds a header, one fixed-width record per group and per product, a hash table of product rows and a string table with every name. It is written next to `path` and renamed over it, so a process that has the old snapshot mapped keeps a valid file. # noqa E501
+
+    Args:
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+        path (str): The snapshot file to write.
+
+    Returns:
+        None
+    """
+    strings = bytearray()
+    groups = bytearray()
+    products = bytearray()
+    hashes = array('I')
+    row = 0
+    for group_index, (group, items) in enumerate(basket.items()):
+        name = group.encode()
+        groups += GROUP.pack(len(strings), len(name), row, len(items))
+        strings += name
+        for product, details in items.items():
+            name = product.encode()
+            products += PRODUCT.pack(
+                details['price'],
+                details['number'],
+                details['discount'],
+                len(strings),
+                len(name),
+                group_index,
+            )
+            strings += name
+            hashes.append(_hash(name))
+            row += 1
+
+    slots = 8
+    while slots < row * 2:
+        slots <<= 1
+    mask = slots - 1
+    table = array('I', [0]) * slots
+    for number, value in enumerate(hashes):
+        slot = value & mask
+        while table[slot]:
+            slot = (slot + 1) & mask
+        table[slot] = number + 1
+
+    groups_at = HEADER.size
+    products_at = groups_at + len(groups)
+    table_at = products_at + len(products)
+    strings_at = table_at + slots * table.itemsize
+    header = HEADER.pack(
+        MAGIC, VERSION, len(basket), row,
+        groups_at, products_at, table_at, slots, strings_at,
+    )
+    temp = f'{path}.tmp'
+    with open(temp, 'wb') as file:
+        file.write(header)
+        file.write(groups)
+        file.write(products)
+        table.tofile(file)
+        file.write(strings)
+    os.replace(temp, path)
+    logger.info('Snapshot of %d products written to %s.', row, path)
+
+
+def load_snapshot(path: str) -> 'MappedBasket':
+    """
+    Open a snapshot written by `save_snapshot`.
+
+    Only the header and the group records are read; product rows are decoded from the memory map when they are used. # noqa E501
+
+    Args:
+        path (str): The snapshot file.
+
+    Returns:
+        MappedBasket: The basket backed by the snapshot.
+    """
+    return MappedBasket(path)
+
+
+def save_json(basket: dict, path: str) -> None:
+    """
+    Write a basket as JSON, the baseline format for `load_json`.
+
+    Args:
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+        path (str): The JSON file to write.
+
+    Returns:
+        None
+    """
+    data = {
+        group: {product: dict(details) for product, details in items.items()}
+        for group, items in basket.items()
+    }
+    with open(path, 'w') as file:
+        json.dump(data, file)
+
+
+def load_json(path: str) -> dict:
+    """
+    Read a basket written by `save_json`.
+
+    Args:
+        path (str): The JSON file.
+
+    Returns:
+        dict: The nested-dict basket.
+    """
+    with open(path) as file:
+        return json.load(file)
+
+
+class MappedRow(MutableMapping):
+    """Dict-like view of a product record inside the memory map."""
+
+    __slots__ = ('_map', '_at')
+
+    def __init__(self, mapped: mmap.mmap, at: int) -> None:
+        self._map = mapped
+        self._at = at
+
+    def __getitem__(self, field: str) -> int:
+        at = self._at + FIELD_AT[field]
+        return struct.unpack_from('<q', self._map, at)[0]
+
+    def __setitem__(self, field: str, value: int) -> None:
+        struct.pack_into('<q', self._map, self._at + FIELD_AT[field], value)
+
+    def __delitem__(self, field: str) -> None:
+        raise TypeError('Snapshot rows have fixed fields.')
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self) -> int:
+        return len(FIELDS)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class MappedGroup(MutableMapping):
+    """
+    One group of a `MappedBasket`.
+
+    Reads and stock or price writes go straight to the snapshot records. The first structural edit (adding, renaming or deleting a product) copies the group into a plain dict, and the group works from that copy afterwards. # noqa E501
+    """
+
+    __slots__ = ('_basket', 'index', 'name', 'first', 'count', '_items')
+
+    def __init__(
+            self,
+            basket: 'MappedBasket',
+            index: int,
+            name: str,
+            first: int,
+            count: int,
+    ) -> None:
+        self._basket = basket
+        self.index = index
+        self.name = name
+        self.first = first
+        self.count = count
+        self._items = None
+
+    @property
+    def mapped(self) -> bool:
+        """True while the group is still read from the snapshot."""
+        return self._items is None
+
+    def _row(self, product: str) -> int:
+        return self._basket.find(product, self.index)
+
+    def _materialize(self) -> dict:
+        if self._items is None:
+            self._items = {
+                product: dict(details) for product, details in self.items()
+            }
+            self._basket.materialized(self)
+        return self._items
+
+    def __getitem__(self, product: str):
+        if self._items is not None:
+            return self._items[product]
+        row = self._row(product)
+        if row < 0:
+            raise KeyError(product)
+        return self._basket.row(row)
+
+    def __setitem__(self, product: str, details) -> None:
+        if self._items is None and product in self:
+            row = self[product]
+            for field in FIELDS:
+                row[field] = details.get(field, 0)
+            return
+        self._materialize()[product] = details
+
+    def __delitem__(self, product: str) -> None:
+        del self._materialize()[product]
+
+    def __contains__(self, product) -> bool:
+        if self._items is not None:
+            return product in self._items
+        return self._row(product) >= 0
+
+    def __iter__(self):
+        if self._items is not None:
+            return iter(self._items)
+        name = self._basket.name
+        rows = range(self.first, self.first + self.count)
+        return (name(row) for row in rows)
+
+    def __len__(self) -> int:
+        if self._items is not None:
+            return len(self._items)
+        return self.count
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+    def clear(self) -> None:
+        self._materialize().clear()
+
+    def select(self, number: int) -> str | None:
+        """Return the product at 1-based position `number`, or None."""
+        if self._items is not None:
+            return positions(self._items).select(number)
+        if 1 <= number <= self.count:
+            return self._basket.name(self.first + number - 1)
+        return None
+
+    def position(self, product: str) -> int:
+        """Return the 1-based position of `product`, or 0 if it is missing."""
+        if self._items is not None:
+            return positions(self._items).position(product)
+        row = self._row(product)
+        return row - self.first + 1 if row >= 0 else 0
+
+    def rename(self, product: str, new_product: str) -> None:
+        """Rename a product in place; an existing `new_product` is replaced."""
+        rename_key(self._materialize(), product, new_product)
+
+
+class MappedBasket(MutableMapping):
+    """
+    Basket served from a memory-mapped snapshot file.
+
+    The file is mapped copy-on-write: edits change this process's pages and never the file. Product lookups probe the hash table stored in the snapshot, so nothing is decoded or indexed up front. # noqa E501
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+        (
+            magic, version, groups, self.size, groups_at,
+            self._products_at, self._table_at, slots, self._strings_at,
+        ) = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a basket snapshot.')
+        self._mask = slots - 1
+        self._by_index: list[MappedGroup | None] = list()
+        self._groups: dict[str, MutableMapping] = dict()
+        for index in range(groups):
+            name_at, length, first, count = GROUP.unpack_from(
+                self._map, groups_at + index * GROUP.size
+            )
+            name = self._string(name_at, length)
+            view = MappedGroup(self, index, name, first, count)
+            self._by_index.append(view)
+            self._groups[name] = view
+        logger.info('Snapshot %s mapped with %d products.', path, self.size)
+
+    def _string(self, at: int, length: int) -> str:
+        start = self._strings_at + at
+        return self._map[start:start + length].decode()
+
+    def _record(self, row: int) -> tuple:
+        return PRODUCT.unpack_from(
+            self._map, self._products_at + row * PRODUCT.size
+        )
+
+    def name(self, row: int) -> str:
+        """Return the product name of a snapshot row."""
+        record = self._record(row)
+        return self._string(record[3], record[4])
+
+    def row(self, row: int) -> MappedRow:
+        """Return the row view of a snapshot row."""
+        return MappedRow(self._map, self._products_at + row * PRODUCT.size)
+
+    def find(self, product: str, group: int | None = None) -> int:
+        """
+        Return the snapshot row of `product`, or -1.
+
+        Args:
+            product (str): The product name.
+            group (int): Only match rows of this group index when given.
+
+        Returns:
+            int: The row number, or -1.
+        """
+        key = product.encode()
+        mapped = self._map
+        slot = _hash(key) & self._mask
+        while True:
+            at = self._table_at + slot * 4
+            entry = struct.unpack_from('<I', mapped, at)[0]
+            if not entry:
+                return -1
+            record = self._record(entry - 1)
+            if (
+                record[4] == len(key)
+                and (group is None or record[5] == group)
+                and self._string(record[3], record[4]) == product
+            ):
+                return entry - 1
+            slot = (slot + 1) & self._mask
+
+    def materialized(self, view: MappedGroup) -> None:
+        """Record that a group now lives in memory instead of the map."""
+        self._by_index[view.index] = None
+
+    def group_of(self, product: str) -> str | None:
+        """Return the group holding `product`, or None."""
+        row = self.find(product)
+        if row >= 0:
+            view = self._by_index[self._record(row)[5]]
+            if view is not None:
+                return view.name
+        for name, items in self._groups.items():
+            if not isinstance(items, MappedGroup) or not items.mapped:
+                if product in items:
+                    return name
+        return None
+
+    def __getitem__(self, group: str):
+        return self._groups[group]
+
+    def __setitem__(self, group: str, items) -> None:
+        view = self._groups.get(group)
+        if view is items:
+            return
+        if view is not None:
+            view.clear()
+            view.update(items)
+            return
+        self._groups[group] = dict(items)
+
+    def __delitem__(self, group: str) -> None:
+        view = self._groups.pop(group)
+        if isinstance(view, MappedGroup) and view.mapped:
+            self._by_index[view.index] = None
+
+    def __contains__(self, group) -> bool:
+        return group in self._groups
+
+    def __iter__(self):
+        return iter(self._groups)
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    def __repr__(self) -> str:
+        return f'MappedBasket({len(self._groups)} groups from {self.size} products)'  # noqa E501
+
+    def rename(self, group: str, new_group: str) -> None:
+        """Rename a group in place; an existing `new_group` is replaced."""
+        if new_group in self._groups and new_group != group:
+            del self[new_group]
+        view = self._groups[group]
+        if isinstance(view, MappedGroup):
+            view.name = new_group
+        self._groups = {
+            (new_group if name == group else name): items
+            for name, items in self._groups.items()
+        }
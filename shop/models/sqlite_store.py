@@ -0,0 +1,357 @@
+import queue
+import sqlite3
+import logging
+import threading
+import contextlib
+from collections.abc import MutableMapping
+from shop.models.catalog import FIELDS
+
+logger = logging.getLogger(__name__)
+
+POOL_SIZE = 4
+
+SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS groups (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        position INTEGER NOT NULL
+    )''',
+    '''CREATE TABLE IF NOT EXISTS products (
+        id INTEGER PRIMARY KEY,
+        group_id INTEGER NOT NULL REFERENCES groups (id) ON DELETE CASCADE,
+        name TEXT NOT NULL,
+        price INTEGER NOT NULL,
+        number INTEGER NOT NULL,
+        discount INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        UNIQUE (group_id, name)
+    )''',
+    'CREATE INDEX IF NOT EXISTS products_name ON products (name)',
+    'CREATE INDEX IF NOT EXISTS products_price ON products (price)',
+    '''CREATE INDEX IF NOT EXISTS products_position
+        ON products (group_id, position)''',
+)
+
+# Statements are module constants so every pooled connection compiles each
+# one once and reuses it from its statement cache.
+GROUP_NAMES = 'SELECT name FROM groups ORDER BY position'
+GROUP_COUNT = 'SELECT COUNT(*) FROM groups'
+GROUP_ID = 'SELECT id FROM groups WHERE name = ?'
+GROUP_INSERT = '''INSERT INTO groups (name, position)
+    VALUES (?, (SELECT COALESCE(MAX(position), 0) + 1 FROM groups))'''
+GROUP_DELETE = 'DELETE FROM groups WHERE id = ?'
+GROUP_RENAME = 'UPDATE groups SET name = ? WHERE id = ?'
+GROUP_CLEAR = 'DELETE FROM products WHERE group_id = ?'
+GROUP_OF = '''SELECT groups.name FROM products
+    JOIN groups ON groups.id = products.group_id
+    WHERE products.name = ? ORDER BY groups.position LIMIT 1'''
+PRODUCT_NAMES = '''SELECT name FROM products
+    WHERE group_id = ? ORDER BY position'''
+PRODUCT_COUNT = 'SELECT COUNT(*) FROM products WHERE group_id = ?'
+PRODUCT_ID = 'SELECT id FROM products WHERE group_id = ? AND name = ?'
+PRODUCT_AT = '''SELECT name FROM products
+    WHERE group_id = ? ORDER BY position LIMIT 1 OFFSET ?'''
+PRODUCT_POSITION = '''SELECT COUNT(*) FROM products
+    WHERE group_id = ?1 AND position <= (
+        SELECT position FROM products WHERE group_id = ?1 AND name = ?2
+    )'''
+PRODUCT_UPSERT = '''INSERT INTO products
+    (group_id, name, price, number, discount, position)
+    VALUES (?1, ?2, ?3, ?4, ?5, (
+        SELECT COALESCE(MAX(position), 0) + 1
+        FROM products WHERE group_id = ?1
+    ))
+    ON CONFLICT (group_id, name) DO UPDATE SET
+        price = excluded.price,
+        number = excluded.number,
+        discount = excluded.discount'''
+PRODUCT_DELETE = 'DELETE FROM products WHERE group_id = ? AND name = ?'
+PRODUCT_RENAME = '''UPDATE products SET name = ?
+    WHERE group_id = ? AND name = ?'''
+PRODUCT_FIELD = {
+    field: f'SELECT {field} FROM products WHERE id = ?' for field in FIELDS
+}
+PRODUCT_SET = {
+    field: f'UPDATE products SET {field} = ? WHERE id = ?' for field in FIELDS
+}
+PRODUCT_STOCK = '''UPDATE products SET number = number + ?1
+    WHERE group_id = ?2 AND name = ?3 AND number + ?1 >= 0'''
+
+
+class ConnectionPool:
+    """
+    A small pool of SQLite connections to one database file.
+
+    Every connection runs in WAL mode, so readers never wait for the writer. A thread that is already inside `connection()` gets the same connection back, which lets nested calls share one transaction. # noqa E501
+    """
+
+    def __init__(self, path: str, size: int = POOL_SIZE) -> None:
+        self.path = path
+        self._idle = queue.LifoQueue()
+        self._local = threading.local()
+        for _ in range(size):
+            self._idle.put(self._connect())
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self.path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=256,
+        )
+        connection.execute('PRAGMA journal_mode = WAL')
+        connection.execute('PRAGMA synchronous = NORMAL')
+        connection.execute('PRAGMA foreign_keys = ON')
+        return connection
+
+    @contextlib.contextmanager
+    def connection(self):
+        held = getattr(self._local, 'connection', None)
+        if held is not None:
+            yield held
+            return
+        connection = self._idle.get()
+        self._local.connection = connection
+        try:
+            yield connection
+        finally:
+            self._local.connection = None
+            self._idle.put(connection)
+
+    def close(self) -> None:
+        while not self._idle.empty():
+            self._idle.get().close()
+
+
+class SQLiteRow(MutableMapping):
+    """Dict-like view of one row of the `products` table."""
+
+    __slots__ = ('_basket', 'id')
+
+    def __init__(self, basket: 'SQLiteBasket', row: int) -> None:
+        self._basket = basket
+        self.id = row
+
+    def __getitem__(self, field: str) -> int:
+        return self._basket.scalar(PRODUCT_FIELD[field], (self.id,))
+
+    def __setitem__(self, field: str, value: int) -> None:
+        self._basket.execute(PRODUCT_SET[field], (value, self.id))
+
+    def __delitem__(self, field: str) -> None:
+        raise TypeError('Database rows have fixed fields.')
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self) -> int:
+        return len(FIELDS)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class SQLiteGroup(MutableMapping):
+    """Dict-like view of one group: product name -> `SQLiteRow`."""
+
+    __slots__ = ('_basket', 'id')
+
+    def __init__(self, basket: 'SQLiteBasket', group_id: int) -> None:
+        self._basket = basket
+        self.id = group_id
+
+    def __getitem__(self, product: str) -> SQLiteRow:
+        row = self._basket.scalar(PRODUCT_ID, (self.id, product))
+        if row is None:
+            raise KeyError(product)
+        return SQLiteRow(self._basket, row)
+
+    def __setitem__(self, product: str, details) -> None:
+        self._basket.execute(PRODUCT_UPSERT, (
+            self.id, product,
+            details.get('price', 0),
+            details.get('number', 0),
+            details.get('discount', 0),
+        ))
+
+    def __delitem__(self, product: str) -> None:
+        if not self._basket.execute(PRODUCT_DELETE, (self.id, product)):
+            raise KeyError(product)
+
+    def __contains__(self, product) -> bool:
+        return self._basket.scalar(PRODUCT_ID, (self.id, product)) is not None
+
+    def __iter__(self):
+        rows = self._basket.fetch(PRODUCT_NAMES, (self.id,))
+        return (name for name, in rows)
+
+    def __len__(self) -> int:
+        return self._basket.scalar(PRODUCT_COUNT, (self.id,))
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+    def clear(self) -> None:
+        self._basket.execute(GROUP_CLEAR, (self.id,))
+
+    def update(self, items=(), **kwargs) -> None:
+        """Insert or update many products in one transaction."""
+        if hasattr(items, 'items'):
+            items = items.items()
+        rows = [
+            (
+                self.id, product,
+                details.get('price', 0),
+                details.get('number', 0),
+                details.get('discount', 0),
+            )
+            for product, details in [*items, *kwargs.items()]
+        ]
+        with self._basket.transaction() as connection:
+            connection.executemany(PRODUCT_UPSERT, rows)
+
+    def select(self, number: int) -> str | None:
+        """Return the product at 1-based position `number`, or None."""
+        if number < 1:
+            return None
+        return self._basket.scalar(PRODUCT_AT, (self.id, number - 1))
+
+    def position(self, product: str) -> int:
+        """Return the 1-based position of `product`, or 0 if it is missing."""
+        if product not in self:
+            return 0
+        return self._basket.scalar(PRODUCT_POSITION, (self.id, product))
+
+    def rename(self, product: str, new_product: str) -> None:
+        """Rename a product in place; an existing `new_product` is replaced."""
+        with self._basket.transaction():
+            if new_product != product:
+                self._basket.execute(PRODUCT_DELETE, (self.id, new_product))
+            self._basket.execute(
+                PRODUCT_RENAME, (new_product, self.id, product)
+            )
+
+
+class SQLiteBasket(MutableMapping):
+    """
+    Basket stored in a local SQLite database: group name -> `SQLiteGroup`.
+
+    Groups and products survive restarts and the catalog does not have to fit in memory. Lookups by name, group and price use the table indexes, and writes made inside `transaction()` are committed together. # noqa E501
+    """
+
+    def __init__(self, path: str, pool_size: int = POOL_SIZE) -> None:
+        self.pool = ConnectionPool(path, pool_size)
+        with self.transaction() as connection:
+            for statement in SCHEMA:
+                connection.execute(statement)
+        logger.info('SQLite basket opened at %s.', path)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """
+        Run the enclosed writes in one transaction.
+
+        Nested calls on the same thread join the outer transaction.
+
+        Yields:
+            sqlite3.Connection: The connection of the transaction.
+        """
+        with self.pool.connection() as connection:
+            if connection.in_transaction:
+                yield connection
+                return
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield connection
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            connection.execute('COMMIT')
+
+    def execute(self, statement: str, parameters: tuple = ()) -> int:
+        """Run a write statement and return the number of changed rows."""
+        with self.pool.connection() as connection:
+            return connection.execute(statement, parameters).rowcount
+
+    def fetch(self, statement: str, parameters: tuple = ()) -> list:
+        """Run a query and return all rows."""
+        with self.pool.connection() as connection:
+            return connection.execute(statement, parameters).fetchall()
+
+    def scalar(self, statement: str, parameters: tuple = ()):
+        """Run a query and return the first column of the first row."""
+        with self.pool.connection() as connection:
+            row = connection.execute(statement, parameters).fetchone()
+        return None if row is None else row[0]
+
+    def close(self) -> None:
+        self.pool.close()
+
+    def _group_id(self, group: str) -> int | None:
+        return self.scalar(GROUP_ID, (group,))
+
+    def __getitem__(self, group: str) -> SQLiteGroup:
+        group_id = self._group_id(group)
+        if group_id is None:
+            raise KeyError(group)
+        return SQLiteGroup(self, group_id)
+
+    def __setitem__(self, group: str, items) -> None:
+        with self.transaction():
+            group_id = self._group_id(group)
+            if group_id is None:
+                self.execute(GROUP_INSERT, (group,))
+                group_id = self._group_id(group)
+            elif isinstance(items, SQLiteGroup) and items.id == group_id:
+                return
+            else:
+                self.execute(GROUP_CLEAR, (group_id,))
+            SQLiteGroup(self, group_id).update(dict(items))
+
+    def __delitem__(self, group: str) -> None:
+        group_id = self._group_id(group)
+        if group_id is None:
+            raise KeyError(group)
+        self.execute(GROUP_DELETE, (group_id,))
+
+    def __contains__(self, group) -> bool:
+        return self._group_id(group) is not None
+
+    def __iter__(self):
+        return (name for name, in self.fetch(GROUP_NAMES))
+
+    def __len__(self) -> int:
+        return self.scalar(GROUP_COUNT)
+
+    def __repr__(self) -> str:
+        return f'SQLiteBasket({self.pool.path!r})'
+
+    def rename(self, group: str, new_group: str) -> None:
+        """Rename a group in place; an existing `new_group` is replaced."""
+        if new_group == group:
+            return
+        with self.transaction():
+            if new_group in self:
+                del self[new_group]
+            self.execute(GROUP_RENAME, (new_group, self._group_id(group)))
+
+    def group_of(self, product: str) -> str | None:
+        """Return the first group, in basket order, holding `product`."""
+        return self.scalar(GROUP_OF, (product,))
+
+    def adjust_stock(self, group: str, product: str, delta: int) -> bool:
+        """
+        Add `delta` to the stock of a product in one statement.
+
+        The update only applies when the stock stays at or above zero, so concurrent buyers can never take it negative. # noqa E501
+
+        Args:
+            group (str): The group holding the product.
+            product (str): The product name.
+            delta (int): The change; negative to take stock out.
+
+        Returns:
+            bool: True if the stock was changed.
+        """
+        group_id = self._group_id(group)
+        return self.execute(PRODUCT_STOCK, (delta, group_id, product)) == 1
@@ -1,9 +1,14 @@
 from shop.helper.type_hint import Invoice
+from shop.utils.invoice import InvoiceBook
 from shop.helper.const import (
     BACK_COMMANDS,
+    STORE_COMMANDS,
     WRONG_COMMANDS,
 )
+from shop.utils.pager import browse
+from shop.utils.metrics import time_command
 from shop.utils.help_funcs import (
+    ask,
     keep,
     title,
     help_store,
@@ -13,9 +18,11 @@ from shop.utils.help_funcs import (
 from shop.utils.funcs import (
     show_list,
     add_to_list,
+    expire_holds,
     total_counter,
     final_invoice,
     search_in_list,
+    search_in_basket,
     delete_from_list,
 )
 
@@ -32,51 +39,60 @@ def store_menu(basket: dict, shopping_list: dict, total: int):
     Returns:
         None
     """
-    message = 'Enter your command "Add" or "show" or "Total": '
-    message1 = 'Enter your command "Add" or "show" or "Delete" or "Search" or "Total": '  # noqa E501
+    message = 'Enter your command "Add" or "show" or "Find" or "Total": '
+    message1 = 'Enter your command "Add" or "show" or "Delete" or "Search" or "Find" or "Total": '  # noqa E501
     while True:
-        invoice: Invoice = list()
+        invoice: Invoice = InvoiceBook()
         clear_screen()
         print(title('Store Menu'))
+        expire_holds(basket, shopping_list)
         if shopping_list:
             help_store()
-            command = input(message1).casefold()
-            if command in BACK_COMMANDS:
-                break
-            elif command in WRONG_COMMANDS:
-                print('This is a mistake. try again')
-                keep()
-                continue
-            elif command == 'add':
-                add_to_list(basket, shopping_list)
-            elif command == 'show':
-                show_list(shopping_list)
-                keep()
-            elif command == 'delete':
-                delete_from_list(shopping_list, basket)
-            elif command == 'total':
-                total_counter(shopping_list, basket, invoice)
-                clear_screen()
-                print(title('Total Invoice'))
-                final_invoice(invoice, total)
-                keep()
-            elif command == 'search':
-                command = input('Enter your word for search: ')
-                search_in_list(shopping_list, command)
-                keep()
+            command = ask(message1).casefold()
+            with time_command('store', command, STORE_COMMANDS):
+                if command in BACK_COMMANDS:
+                    break
+                elif command in WRONG_COMMANDS:
+                    print('This is a mistake. try again')
+                    keep()
+                    continue
+                elif command == 'add':
+                    add_to_list(basket, shopping_list)
+                elif command == 'show':
+                    browse(lambda pager: show_list(shopping_list, pager))
+                elif command == 'delete':
+                    delete_from_list(shopping_list, basket)
+                elif command == 'total':
+                    total_counter(shopping_list, basket, invoice)
+                    clear_screen()
+                    print(title('Total Invoice'))
+                    final_invoice(invoice, total)
+                    keep()
+                elif command == 'search':
+                    command = ask('Enter your word for search: ')
+                    search_in_list(shopping_list, command)
+                    keep()
+                elif command == 'find':
+                    command = ask('Enter your word for search: ')
+                    search_in_basket(basket, command)
+                    keep()
         else:
             help_store_empty()
-            command = input(message).casefold()
-            if command in BACK_COMMANDS:
-                break
-            elif command == 'add':
-                add_to_list(basket, shopping_list)
-            elif command == 'show':
-                show_list(shopping_list)
-                keep()
-            elif command == 'total':
-                total_counter(shopping_list, basket, invoice)
-                clear_screen()
-                print(title('Total Invoice'))
-                final_invoice(invoice, total)
-                keep()
+            command = ask(message).casefold()
+            with time_command('store', command, STORE_COMMANDS):
+                if command in BACK_COMMANDS:
+                    break
+                elif command == 'add':
+                    add_to_list(basket, shopping_list)
+                elif command == 'show':
+                    browse(lambda pager: show_list(shopping_list, pager))
+                elif command == 'find':
+                    command = ask('Enter your word for search: ')
+                    search_in_basket(basket, command)
+                    keep()
+                elif command == 'total':
+                    total_counter(shopping_list, basket, invoice)
+                    clear_screen()
+                    print(title('Total Invoice'))
+                    final_invoice(invoice, total)
+                    keep()
@@ -0,0 +1,376 @@
+import logging
+import bisect
+import threading
+from collections import Counter
+from shop.utils.pricing import unit_price
+from shop.models.basket import (
+    observe,
+    unobserve,
+)
+
+logger = logging.getLogger(__name__)
+
+# Fields that price a checkout; stock changes are not versioned.
+PRICED = ('price', 'discount')
+
+# id(basket) -> (basket, CatalogVersions, observer), same scheme as
+# shop.models.index
+_versions: dict[int, tuple[dict, 'CatalogVersions', object]] = dict()
+
+
+class Snapshot:
+    """
+    A pinned version of the catalog.
+
+    Lookups go straight to the immutable version chains and take no lock. Names are resolved at the pinned version too, so a product or group renamed after `pin` is still found under the name it had. Close the snapshot (or leave its `with` block) so older versions can be dropped. # noqa E501
+    """
+
+    __slots__ = ('version', '_versions', '_closed')
+
+    def __init__(self, versions: 'CatalogVersions', version: int) -> None:
+        self.version = version
+        self._versions = versions
+        self._closed = False
+
+    def __enter__(self) -> 'Snapshot':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def get(self, group: str, product: str) -> tuple[str, int, int, int] | None:  # noqa E501
+        """
+        Return the `(group, price, discount, net)` of a product at this version. # noqa E501
+
+        Args:
+            group (str): The group holding the product at this version.
+            product (str): The product name at this version.
+
+        Returns:
+            tuple[str, int, int, int] | None: The record, or None if the product did not exist. # noqa E501
+        """
+        return self._versions.find(product, self.version, group)
+
+    def find(self, product: str) -> tuple[str, int, int, int] | None:
+        """
+        Return the record of a product in the first group holding it at this version. # noqa E501
+
+        Args:
+            product (str): The product name at this version.
+
+        Returns:
+            tuple[str, int, int, int] | None: The record, or None if no group held the product. # noqa E501
+        """
+        return self._versions.find(product, self.version)
+
+    def record(self, key: int) -> tuple[str, int, int, int] | None:
+        """
+        Return the record of the product with id `key` at this version.
+
+        Args:
+            key (int): The id from `CatalogVersions.id_of`; it survives renames. # noqa E501
+
+        Returns:
+            tuple[str, int, int, int] | None: The record, or None if the product did not exist. # noqa E501
+        """
+        record = self._versions.read(key, self.version)
+        return None if record is None else record[:1] + record[2:]
+
+    def close(self) -> None:
+        """Release the pin."""
+        if not self._closed:
+            self._closed = True
+            self._versions.unpin(self.version)
+
+
+class CatalogVersions:
+    """
+    Copy-on-write version chains of the priced fields of every product.
+
+    Every product of a group gets an integer id that it keeps through product and group renames. Each id maps to one `(version, group, product, price, discount, net)` record, or a tuple of records oldest first when older versions are still pinned; a record with group None marks a removed product. Each product name maps the same way to `(version, ids)`, the ids holding that name in group order, so names are resolved at any pinned version. `net` is the effective unit price, worked out only when a product is added or its price or discount is set, so pricing a cart is one multiply per line. A writer builds new tuples next to the old ones and then publishes the new version number, so a reader pinned to an older version never sees a half-applied edit. Chains are trimmed when they are next written: a record is kept only while some pin can see it. # noqa E501
+    """
+
+    def __init__(self, basket: dict) -> None:
+        self.version = 0
+        # id -> price records and product name -> id records.
+        self._chains: dict[int | str, tuple] = dict()
+        # group -> {product: id} and id -> (group, product), as they are now.
+        self._members: dict[str, dict[str, int]] = dict()
+        self._where: dict[int, tuple[str, str]] = dict()
+        self._next_id = 0
+        self._pins: Counter = Counter()
+        self._lock = threading.Lock()
+        chains = self._chains
+        for group in basket:
+            items = basket[group]
+            members = self._members[group] = dict()
+            for product in items:
+                details = items[product]
+                price, discount = details['price'], details['discount']
+                key = members[product] = self._next_id
+                self._next_id += 1
+                self._where[key] = (group, product)
+                chains[key] = (
+                    0, group, product, price, discount,
+                    unit_price(price, discount)
+                )
+                names = chains.get(product)
+                chains[product] = (0, names[1] + (key,) if names else (key,))
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def read(self, key: int | str, version: int) -> tuple | None:
+        """Return the record of an id or a product name visible at `version`."""  # noqa E501
+        chain = self._chains.get(key)
+        if chain is None:
+            return None
+        if type(chain[0]) is int:
+            chain = (chain,)
+        for record in reversed(chain):
+            if record[0] <= version:
+                if record[1] is None:
+                    return None
+                return record[1:]
+        return None
+
+    def find(self, product: str, version: int, group: str | None = None) -> tuple[str, int, int, int] | None:  # noqa E501
+        """Return the `(group, price, discount, net)` of `product` at `version`, in `group` or the first group holding it."""  # noqa E501
+        names = self.read(product, version)
+        if names is None:
+            return None
+        for key in names[0]:
+            record = self.read(key, version)
+            if record is not None and (group is None or record[0] == group):
+                return record[:1] + record[2:]
+        return None
+
+    def id_of(self, group: str, product: str) -> int | None:
+        """Return the id of `product` of `group` as the basket is now."""
+        return self._members.get(group, {}).get(product)
+
+    def groups_of(self, product: str) -> list[str]:
+        """Return every group holding `product` now, oldest entry first."""
+        current = self._current(product)
+        if current is None:
+            return []
+        return [self._where[key][0] for key in current[0]]
+
+    def where(self, key: int) -> tuple[str, str] | None:
+        """Return the `(group, product)` an id has now, or None once it is removed."""  # noqa E501
+        return self._where.get(key)
+
+    def net(self, group: str, product: str) -> tuple[int, int, int] | None:
+        """Return the current `(price, discount, net)` of `product` of `group`."""  # noqa E501
+        key = self.id_of(group, product)
+        record = None if key is None else self._current(key)
+        return None if record is None else record[2:]
+
+    def pin(self) -> Snapshot:
+        """Pin the newest published version."""
+        with self._lock:
+            version = self.version
+            self._pins[version] += 1
+        return Snapshot(self, version)
+
+    def unpin(self, version: int) -> None:
+        """Release a pin taken by `pin`."""
+        with self._lock:
+            self._pins[version] -= 1
+            if not self._pins[version]:
+                del self._pins[version]
+
+    def _write(self, version: int, key: int | str, record: tuple, pins: list[int]) -> None:  # noqa E501
+        # Keep the old records some pin still sees, drop the rest. A pin
+        # sees the newest record at or below its version, so a record is
+        # seen when a pin falls between its version and the next one's.
+        chain = self._chains.get(key, ())
+        if chain and type(chain[0]) is int:
+            chain = (chain,)
+        kept = tuple(
+            old for old, following in zip(chain, chain[1:] + ((version,),))
+            if (at := bisect.bisect_left(pins, old[0])) < len(pins)
+            and pins[at] < following[0]
+        )
+        chain = kept + ((version,) + record,)
+        if len(chain) == 1:
+            if record[0] is None:
+                self._chains.pop(key, None)
+            else:
+                self._chains[key] = chain[0]
+        else:
+            self._chains[key] = chain
+
+    def _current(self, key: int | str) -> tuple | None:
+        chain = self._chains.get(key)
+        if chain is None:
+            return None
+        record = chain if type(chain[0]) is int else chain[-1]
+        return None if record[1] is None else record[1:]
+
+    def _name(self, version: int, pins: list[int], product: str, add: int | None = None, drop: int | None = None) -> None:  # noqa E501
+        current = self._current(product)
+        ids = current[0] if current is not None else ()
+        if drop is not None:
+            ids = tuple(key for key in ids if key != drop)
+        if add is not None:
+            ids += (add,)
+        self._write(version, product, (ids or None,), pins)
+
+    def _drop(self, version: int, pins: list[int], product: str, key: int) -> None:  # noqa E501
+        self._write(version, key, (None, None, 0, 0, 0), pins)
+        self._where.pop(key, None)
+        self._name(version, pins, product, drop=key)
+
+    def apply(self, event: str, *args) -> None:
+        """Publish the change described by a `shop.models.basket` event."""
+        if event == 'stock' or (event == 'field' and args[2] not in PRICED):
+            return
+        with self._lock:
+            version = self.version + 1
+            pins = sorted(self._pins)
+            members = self._members
+            if event == 'group':
+                group, = args
+                for product, key in members.pop(group, {}).items():
+                    self._drop(version, pins, product, key)
+                members[group] = dict()
+            elif event == 'product':
+                group, product, details = args
+                items = members.setdefault(group, dict())
+                key = items.get(product)
+                if key is None:
+                    key = items[product] = self._next_id
+                    self._next_id += 1
+                    self._where[key] = (group, product)
+                    self._name(version, pins, product, add=key)
+                price, discount = details['price'], details['discount']
+                self._write(version, key, (
+                    group, product, price, discount,
+                    unit_price(price, discount)
+                ), pins)
+            elif event == 'rename_product':
+                group, product, new_product = args
+                items = members.get(group, {})
+                key = items.get(product)
+                if key is None or new_product == product:
+                    return
+                replaced = items.pop(new_product, None)
+                if replaced is not None:
+                    self._drop(version, pins, new_product, replaced)
+                del items[product]
+                items[new_product] = key
+                self._where[key] = (group, new_product)
+                self._name(version, pins, product, drop=key)
+                self._name(version, pins, new_product, add=key)
+                record = self._current(key)
+                self._write(version, key, (group, new_product) + record[2:], pins)  # noqa E501
+            elif event == 'rename_group':
+                group, new_group = args
+                if new_group == group:
+                    return
+                for product, key in members.pop(new_group, {}).items():
+                    self._drop(version, pins, product, key)
+                moved = members.pop(group, {})
+                for product, key in moved.items():
+                    self._where[key] = (new_group, product)
+                    record = self._current(key)
+                    self._write(version, key, (new_group,) + record[1:], pins)
+                members[new_group] = moved
+            elif event == 'remove_group':
+                group, = args
+                for product, key in members.pop(group, {}).items():
+                    self._drop(version, pins, product, key)
+            elif event == 'field':
+                group, product, field, value = args
+                key = members.get(group, {}).get(product)
+                if key is None:
+                    return
+                _, _, price, discount, _ = self._current(key)
+                if field == 'price':
+                    price = value
+                else:
+                    discount = value
+                self._write(version, key, (
+                    group, product, price, discount,
+                    unit_price(price, discount)
+                ), pins)
+            else:
+                return
+            self.version = version
+        logger.debug('Catalog version %s published by "%s".', version, event)
+
+
+def catalog_versions(basket: dict) -> CatalogVersions:
+    """
+    Return the version chains of a basket, building them on first use.
+
+    The chains follow every change made through `shop.models.basket`.
+
+    Args:
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+
+    Returns:
+        CatalogVersions: The versions kept for this basket.
+    """
+    entry = _versions.get(id(basket))
+    if entry is None or entry[0] is not basket:
+        versions = CatalogVersions(basket)
+        observe(basket, versions.apply)
+        entry = (basket, versions, versions.apply)
+        _versions[id(basket)] = entry
+        logger.debug('Catalog versions built for %d products.', len(versions))
+    return entry[1]
+
+
+def forget_versions(basket: dict) -> None:
+    """
+    Drop the version chains kept for a basket that is no longer used.
+
+    Args:
+        basket (dict): The basket whose versions should be released.
+
+    Returns:
+        None
+    """
+    entry = _versions.pop(id(basket), None)
+    if entry is not None and entry[0] is basket:
+        unobserve(basket, entry[2])
+
+
+def net_price(basket: dict, group: str, product: str) -> int | None:
+    """
+    Return the cached effective unit price of a product, for listings.
+
+    The cached net is only used while its price and discount match the basket row; a product the cache has no entry for, or whose row was changed without `shop.models.basket` (e.g. by a journal replay), is priced with `unit_price` from its basket details. # noqa E501
+
+    Args:
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+        group (str): The group holding the product.
+        product (str): The product name.
+
+    Returns:
+        int | None: The price after the discount, or None if the product is not in the basket. # noqa E501
+    """
+    items = basket.get(group)
+    if items is None or product not in items:
+        return None
+    details = items[product]
+    price, discount = details['price'], details['discount']
+    cached = catalog_versions(basket).net(group, product)
+    if cached is not None and cached[0] == price and cached[1] == discount:
+        return cached[2]
+    return unit_price(price, discount)
+
+
+def pin(basket: dict) -> Snapshot:
+    """
+    Pin the current catalog version of a basket, e.g. for one checkout.
+
+    Args:
+        basket (dict): A dictionary representing the basket with group information. # noqa E501
+
+    Returns:
+        Snapshot: The pinned version; use it in a `with` block.
+    """
+    return catalog_versions(basket).pin()
@@ -1,27 +1,78 @@
-from .help_funcs import (
-    keep,
-    title,
-    show_help,
-    help_admin,
-    help_group,
-    help_store,
-    show_error,
-    clear_screen,
-    help_product,
-    help_group_add,
-    help_store_empty,
-    help_admin_group,
-    help_product_empty,
-    decortor_exceptions,
-)
-from .funcs import (
-    show_list,
-    final_list,
-    similarity,
-    add_to_list,
-    final_invoice,
-    total_counter,
-    search_in_list,
-    delete_from_list,
-    get_product_shopping_list,
-)
+from shop.helper.lazy import lazy_exports
+
+# Submodule -> the names it exports, imported on first use.
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    'help_funcs': (
+        'ask',
+        'keep',
+        'title',
+        'show_help',
+        'help_admin',
+        'help_group',
+        'help_store',
+        'show_error',
+        'set_screen',
+        'set_headless',
+        'set_recorder',
+        'clear_screen',
+        'help_product',
+        'help_group_add',
+        'help_store_empty',
+        'help_admin_group',
+        'help_product_empty',
+        'decortor_exceptions',
+    ),
+    'funcs': (
+        'show_list',
+        'final_list',
+        'similarity',
+        'add_to_list',
+        'expire_holds',
+        'final_invoice',
+        'total_counter',
+        'search_in_list',
+        'search_in_basket',
+        'delete_from_list',
+        'get_product_shopping_list',
+    ),
+    'pricing': (
+        'net_lines',
+        'unit_price',
+        'price_lines',
+        'format_invoice',
+    ),
+    'invoice': (
+        'InvoiceBook',
+    ),
+    'headless': (
+        'Headless',
+        'EndOfScript',
+        'run_headless',
+    ),
+    'profiling': (
+        'arm',
+        'ARMED',
+        'profiled',
+        'parse_profiles',
+    ),
+    'recorder': (
+        'Recorder',
+        'read_session',
+        'record_session',
+    ),
+    'screen': (
+        'Screen',
+        'run_screen',
+    ),
+    'pager': (
+        'Pager',
+        'browse',
+        'show_footer',
+    ),
+    'metrics': (
+        'Timer',
+        'REGISTRY',
+        'time_command',
+        'write_metrics',
+    ),
+})
@@ -1,6 +1,15 @@
 import logging
 from difflib import SequenceMatcher
-from shop.models.group import get_group_by_product_name
+from shop.models.search import search_products
+from shop.models.holds import holds
+from shop.models.versions import pin
+from shop.models.inventory import stock
+from shop.utils.invoice import InvoiceBook
+from shop.utils.pricing import (
+    net_lines,
+    format_invoice,
+)
+from shop.models.position import item_at
 from shop.helper.exception import (
     ProductNameError,
     GroupDoesNotExist,
@@ -14,7 +23,12 @@ from shop.models.product import (
     get_group,
     get_product_choices,
 )
+from shop.utils.pager import (
+    Pager,
+    show_footer,
+)
 from shop.utils.help_funcs import (
+    ask,
     keep,
     title,
     clear_screen,
@@ -42,7 +56,7 @@ def add_to_list(basket: dict, shopping_list: dict) -> None:
             break
         elif cart_group == 'Not':
             logger.error(
-                f'The "{cart_group}" is not in groups. Please try again.'
+                'The "%s" is not in groups. Please try again.', cart_group
             )
             raise GroupDoesNotExist(
                 f'The `{cart_group}` is not in groups. Please try again'
@@ -53,29 +67,29 @@ def add_to_list(basket: dict, shopping_list: dict) -> None:
         if product_name == 'back':
             break
         if product_name == 'wrong':
-            logger.error(f'Cannot use {WRONG_COMMANDS}.')
+            logger.error('Cannot use %s.', WRONG_COMMANDS)
             raise ProductNameError(f'Cannot use {WRONG_COMMANDS}')
-        numbers = input('How many of product: ').casefold()
+        numbers = ask('How many of product: ').casefold()
         if numbers.isnumeric():
             numbers = int(numbers)
-            number = basket[cart_group][product_name]['number']
-            if number > 0 and numbers <= number:
-                if product_name not in shopping_list:
-                    logger.info(f'The "{product_name}" added to shopping list with "{numbers}" quantity.')  # noqa E501
-                    shopping_list.update({product_name: numbers})
-                elif product_name in shopping_list:
-                    logger.info(f'The shopping list "{product_name}" is updated with quantity -> "{numbers}".')  # noqa E501
-                    shopping_list[product_name] += numbers
-                number -= numbers
-                logger.info(f'There are "{number}" "{product_name}" left in the basket.')  # noqa E501
-                basket[cart_group][product_name]["number"] = number
+            number = stock(basket, cart_group, product_name)
+            if (
+                number > 0
+                and numbers <= number
+                and holds(basket).hold(
+                    shopping_list, cart_group, product_name, numbers
+                )
+            ):
+                logger.info('The shopping list "%s" is updated with quantity -> "%s".', product_name, numbers)  # noqa E501
+                number = stock(basket, cart_group, product_name)
+                logger.info('There are "%s" "%s" left in the basket.', number, product_name)  # noqa E501
                 print(f"There are '{number}' '{product_name}' left in the warehouse.")  # noqa E501
                 keep()
                 continue
             else:
                 logger.warning(
-                    f'Sorry, the "{product_name}" \
-                        product has only "{number}" items in stock.'
+                    'Sorry, the "%s" product has only "%s" items in stock.',
+                    product_name, number
                 )
                 raise ProductDoesNotExist(
                     f'Sorry, the "{product_name}" \
@@ -84,16 +98,33 @@ def add_to_list(basket: dict, shopping_list: dict) -> None:
         elif numbers in BACK_COMMANDS:
             break
         elif numbers in WRONG_COMMANDS or numbers.isspace():
-            logger.error(f'Cannot use {WRONG_COMMANDS}.')
+            logger.error('Cannot use %s.', WRONG_COMMANDS)
             raise ProductNameError(f'Cannot use {WRONG_COMMANDS}')
 
 
-def show_list(shopping_list: dict) -> None:
+def expire_holds(basket: dict, shopping_list: dict) -> None:
+    """
+    Put back the stock of cart lines whose hold has expired.
+
+    Args:
+        basket (dict): The basket dictionary containing product groups and their details. # noqa E501
+        shopping_list (dict): The shopping list dictionary containing product names and quantities. # noqa E501
+
+    Returns:
+        None
+    """
+    for line in holds(basket).expire():
+        if line.cart is shopping_list:
+            print(f"The hold on '{line.number}' '{line.product}' expired; they went back to the warehouse.")  # noqa E501
+
+
+def show_list(shopping_list: dict, pager: Pager | None = None) -> None:
     """
     Display the products in the shopping list.
 
     Args:
         shopping_list (dict): The shopping list dictionary containing product names and quantities. # noqa E501
+        pager (Pager | None): The page to show; the first page by default.
 
     Returns:
         None
@@ -101,8 +132,10 @@ def show_list(shopping_list: dict) -> None:
     clear_screen()
     print(title('Show Products In Shopping List'))
     if shopping_list:
-        for index, item in enumerate(shopping_list, start=1):
+        pager = pager or Pager()
+        for index, item in pager.entries(shopping_list):
             print(f"{index}: {item} {shopping_list[item]}")
+        show_footer(pager, len(shopping_list))
     else:
         print('Shopping list is Empty.')
 
@@ -118,10 +151,10 @@ def get_product_shopping_list(shopping_list: list, number: int) -> str | bool:
     Returns:
         str: The name of the product at the specified index, or False if the index is out of range. # noqa E501
     """
-    for index, product in enumerate(shopping_list, start=1):
-        if number == index:
-            return product
-    return False
+    product = item_at(shopping_list, number)
+    if product is None:
+        return False
+    return product
 
 
 def delete_from_list(shopping_list: list, basket: dict) -> None:
@@ -136,18 +169,21 @@ def delete_from_list(shopping_list: list, basket: dict) -> None:
         None
     """
     message = 'Choice and use name or number product: '
+    pager = Pager()
     while True:
         clear_screen()
         if not shopping_list:
             show_list(shopping_list)
             keep()
             break
-        show_list(shopping_list)
-        product_choice = input(message).casefold()
+        show_list(shopping_list, pager)
+        product_choice = ask(message).casefold()
         if product_choice in BACK_COMMANDS:
             break
+        elif pager.command(product_choice, shopping_list):
+            continue
         elif product_choice in WRONG_COMMANDS or product_choice.isspace():
-            logger.error(f'Cannot use {WRONG_COMMANDS}.')
+            logger.error('Cannot use %s.', WRONG_COMMANDS)
             raise ProductDoesNotExist(f'Cannot use {WRONG_COMMANDS}')
         elif product_choice.isnumeric():
             product_choice = int(product_choice)
@@ -155,33 +191,26 @@ def delete_from_list(shopping_list: list, basket: dict) -> None:
                 shopping_list, product_choice
             )
             if not product_choice:
-                logger.warning(f'The "{product_choice}" not exist in basket.')
+                logger.warning('The "%s" not exist in basket.', product_choice)
                 raise ProductDoesNotExist(
                     f'The {product_choice} not exist in basket.'
                 )
-            cart_group = get_group_by_product_name(product_choice, basket)
-        else:
-            if product_choice in shopping_list:
-                cart_group = get_group_by_product_name(product_choice, basket)
-            else:
-                logger.warning(
-                    f'The "{product_choice}" is not in shopping list.'
-                )
-                raise ProductDoesNotExist(
-                    f'The {product_choice} is not in shopping list.\
-                        Please try again'
-                )
-        numbers = input('How many of product to delete: ').casefold()
+        elif product_choice not in shopping_list:
+            logger.warning(
+                'The "%s" is not in shopping list.', product_choice
+            )
+            raise ProductDoesNotExist(
+                f'The {product_choice} is not in shopping list.\
+                    Please try again'
+            )
+        numbers = ask('How many of product to delete: ').casefold()
         if numbers.isnumeric():
             numbers = int(numbers)
             if (shopping_list[product_choice] - numbers) < 0:
                 logger.warning('The number of requests to delete is greater than the number available. Please try again...')  # noqa E501
                 raise ProductDoesNotExist('The number of requests to delete is greater than the number available. Please try again...')  # noqa E501
-            elif (shopping_list[product_choice] - numbers) == 0:
-                shopping_list.pop(product_choice)
-            elif shopping_list[product_choice] > numbers:
-                shopping_list[product_choice] -= numbers
-                basket[cart_group][product_choice]["number"] += numbers
+            elif shopping_list[product_choice] >= numbers:
+                holds(basket).drop(shopping_list, product_choice, numbers)
             else:
                 logger.warning(
                     "I'm sorry. Enter just the number."
@@ -192,11 +221,15 @@ def delete_from_list(shopping_list: list, basket: dict) -> None:
         elif numbers in BACK_COMMANDS:
             break
         elif numbers in WRONG_COMMANDS or numbers.isspace():
-            logger.error(f'Cannot use {WRONG_COMMANDS}.')
+            logger.error('Cannot use %s.', WRONG_COMMANDS)
             raise ProductDoesNotExist(f'Cannot use {WRONG_COMMANDS}')
 
 
-def total_counter(shopping_list: list, basket: dict, invoice: list) -> None:
+def total_counter(
+        shopping_list: list,
+        basket: dict,
+        invoice: InvoiceBook
+) -> None:
     """
     Calculates the total count and price of items in the shopping list based on the basket dictionary, # noqa E501
     and adds the product details to the invoice.
@@ -204,83 +237,80 @@ def total_counter(shopping_list: list, basket: dict, invoice: list) -> None:
     Args:
         shopping_list (list): The list of products to be counted.
         basket (dict): The dictionary containing the groupings of products and their prices. # noqa E501
-        invoice (list): The invoice list to which the product details will be added. # noqa E501
+        invoice (InvoiceBook): The invoice to which the product details will be added. # noqa E501
 
     Returns:
         None
 
-    Modifies the invoice list by adding the product details (product name, number, and price) for each item # noqa E501
-    in the shopping list. The price is obtained from the basket dictionary based on the product's group. # noqa E501
-
-    Note:
-    The function assumes the existence of a helper function 'get_group_by_product_name' that takes the product name and the basket dictionary as inputs # noqa E501
-    and returns the group of the product.
+    Modifies the invoice by adding the product details (product name, number, and price) for each item # noqa E501
+    in the shopping list. Prices and product names are read from one pinned catalog version, so an admin edit or rename made meanwhile never mixes old and new prices; # noqa E501
+    a held line is priced from the group it was taken from, named with its group when the same product is held from several groups; # noqa E501
+    a product that no longer exists is left out.
 
     """
-    for product in shopping_list:
-        product_name = product
-        number = shopping_list[product]
-        cart_group = get_group_by_product_name(product_name, basket)
-        price = basket[cart_group][product_name]['price']
-        discount = basket[cart_group][product_name]['discount']
-        final_list(product_name, number, price, invoice, discount)
+    with pin(basket) as snapshot:
+        priced = list()
+        groups = dict()
+        for product_name, key, number in holds(basket).lines(shopping_list):
+            if key is None:
+                record = snapshot.find(product_name)
+            else:
+                record = snapshot.record(key)
+            if record is None:
+                logger.warning('The "%s" is not in the basket any more.', product_name)  # noqa E501
+                continue
+            priced.append((product_name, number, record))
+            groups.setdefault(product_name, set()).add(record[0])
+    for product_name, number, (group, price, discount, net) in priced:
+        if len(groups[product_name]) > 1:
+            product_name = f'{product_name} ({group})'
+        final_list(product_name, number, price, invoice, discount, net)
 
 
 def final_list(
         product_name: str,
         number: int,
         price: int,
-        invoice: list,
-        discount: int | bool
+        invoice: InvoiceBook,
+        discount: int | bool,
+        net: int | None = None
 ) -> None:
     """
-    Adds the product details (product name, number, and price) to the invoice list. # noqa E501
+    Adds the product details (product name, number, and price) to the invoice. # noqa E501
 
     Args:
         product_name (str): The name of the product.
         number (int): The number of products.
         price (int): The price per product.
-        invoice (list): The invoice list containing the product details.
+        invoice (InvoiceBook): The invoice containing the product details.
+        discount (int | bool): The discount percentage.
+        net (int | None): The cached effective unit price, if known.
 
     Returns:
         None
 
-    Modifies the invoice list by adding the new product details if it does not already exist in the invoice. # noqa E501
+    The invoice is keyed by product, so an existing line is found in O(1) instead of searching every line. # noqa E501
     """
-    invoice_list = [product_name, number, price, discount]
-    if invoice_list not in invoice:
-        invoice.append(invoice_list)
+    invoice.add(product_name, number, price, int(discount), net)
 
 
-def final_invoice(invoice: list, total: int) -> None:
+def final_invoice(invoice: InvoiceBook, total: int) -> None:
     """
     Calculates the final invoice based on the provided invoice items and updates the total. # noqa E501
 
     Args:
-        invoice (list): The list of invoice items. Each item is a tuple containing the product name, # noqa E501
-            number of products, and price per product.
+        invoice (InvoiceBook): The invoice items, one line per product with its number, price and discount. # noqa E501
         total (int): The current total amount of the invoice.
 
     Returns:
         None
 
-    Prints the detailed breakdown of each item in the invoice and the final invoice summary. # noqa E501
+    Prices all items with one multiply-and-sum over their cached net prices (`net_lines`), then prints the detailed breakdown of each item and the final invoice summary in a single write. # noqa E501
     """
-
-    numbs = 0
-    for item in invoice:
-        product_name, number, price, discount = item
-        numbs += number
-        if not discount:
-            final_invoice = number * price
-            print(f'{product_name} -> {number} x {price:,} = {final_invoice:,}')  # noqa E501
-        else:
-            final_invoice = (price - ((price * discount) // 100)) * number
-            print(f'{product_name} -> {number} x {price:,} - {discount}% = {final_invoice:,}')  # noqa E501
-        total += final_invoice
-
-    print('----------------------------------------------------')
-    print(f'Products -> {numbs} Final Invoice -> {total:,}T')
+    names, numbers, prices, discounts, nets = invoice.columns()
+    lines, grand_total = net_lines(nets, numbers)
+    total += grand_total
+    print(format_invoice(names, numbers, prices, discounts, lines, total))
 
 
 def similarity(actual: str, expected: str) -> float:
@@ -320,3 +350,24 @@ def search_in_list(shopping_list: dict, word: str) -> str:
             print(f'Product: {product}, Similarity Score: {score:.2f}')
     else:
         print('No result Found.')
+
+
+def search_in_basket(basket: dict, word: str) -> None:
+    """
+    Searches every product of the basket for a word and displays the best matches. # noqa E501
+
+    Args:
+        basket (dict): The dictionary representing the basket.
+        word (str): The word to search for.
+
+    Returns:
+        None
+    """
+    print(f'Search for {word}...')
+    results = search_products(basket, word)
+    if results:
+        print(f'Found ({len(results)}) results:')
+        for product, group, score in results:
+            print(f'Product: {product}, Group: {group}, Similarity Score: {score:.2f}')  # noqa E501
+    else:
+        print('No result Found.')
@@ -0,0 +1,108 @@
+import io
+import sys
+import json
+import time
+import logging
+import contextlib
+from shop.utils.help_funcs import set_headless
+
+logger = logging.getLogger(__name__)
+
+
+class EndOfScript(BaseException):
+    """
+    Raised by `Headless.ask` when the script has no more commands.
+
+    It derives from BaseException so `decortor_exceptions` does not report it as an error and the menus unwind up to `run_headless`. # noqa E501
+    """
+
+
+class Headless:
+    """
+    A scripted session: answers come from `commands`, one per line.
+
+    Everything the flows print between two answers is collected and written to `output` as one JSON line: `{"step", "prompt", "input", "output", "error"}`. Menu titles and help texts are left out. # noqa E501
+    """
+
+    def __init__(self, commands, output) -> None:
+        self._commands = iter(commands)
+        self._output = output
+        self.screen = io.StringIO()
+        self.step = 0
+        self.errors = 0
+        self._prompt = None
+        self._command = None
+
+    def ask(self, message: str) -> str:
+        """Answer a prompt with the next command of the script."""
+        self.flush()
+        try:
+            command = next(self._commands)
+        except StopIteration:
+            raise EndOfScript from None
+        self.step += 1
+        self._prompt = message
+        self._command = command.rstrip('\r\n')
+        return self._command
+
+    def flush(self) -> None:
+        """Write the record of the last answered prompt."""
+        text = self.screen.getvalue()
+        self.screen.seek(0)
+        self.screen.truncate()
+        if self._command is None:
+            return
+        lines = [
+            line.strip()
+            for line in text.splitlines()
+            if line.strip() and not line.startswith('---')
+        ]
+        error = any(line.startswith('Error:') for line in lines)
+        self.errors += error
+        record = {
+            'step': self.step,
+            'prompt': self._prompt,
+            'input': self._command,
+            'output': lines,
+            'error': error,
+        }
+        self._output.write(json.dumps(record) + '\n')
+        self._command = None
+
+
+def run_headless(main, commands, output=None) -> Headless:
+    """
+    Run the interactive `main` against a script, without a terminal.
+
+    The screen is never cleared and `keep` does not wait, so the flows run at CPU speed. The run stops when the script is used up or `main` returns. # noqa E501
+
+    Args:
+        main: The entry point to drive, usually `core.app.main`.
+        commands: The answers, e.g. an open file or `sys.stdin`.
+        output: Where the JSON lines go; standard output by default.
+
+    Returns:
+        Headless: The finished session.
+    """
+    if output is None:
+        output = sys.stdout
+    session = Headless(commands, output)
+    start = time.perf_counter()
+    set_headless(session)
+    try:
+        with contextlib.redirect_stdout(session.screen):
+            main()
+    except EndOfScript:
+        pass
+    finally:
+        set_headless(None)
+        session.flush()
+    seconds = time.perf_counter() - start
+    output.write(json.dumps({
+        'steps': session.step,
+        'errors': session.errors,
+        'seconds': round(seconds, 3),
+    }) + '\n')
+    output.flush()
+    logger.info('Headless run of %s steps in %.3f s.', session.step, seconds)
+    return session
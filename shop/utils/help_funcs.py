@@ -1,7 +1,14 @@
 import os
+import time
 import logging
 import functools
 from getpass import getpass
+from shop.utils.metrics import (
+    CALLS,
+    ERRORS,
+    WAITED,
+    waiting,
+)
 from shop.helper.exception import (
     NotNumber,
     GroupNameError,
@@ -13,39 +20,146 @@ from shop.helper.exception import (
 
 logger = logging.getLogger(__name__)
 
+# The running `shop.utils.headless.Headless` session, if any. While it is
+# set, answers come from its script and nothing touches the terminal.
+_headless = None
+# The running `shop.utils.screen.Screen`, if any. While it is set, frames
+# are drawn by the screen instead of a `clear` subprocess.
+_screen = None
+# The running `shop.utils.recorder.Recorder`, if any. Every answer `ask`
+# returns is handed to it.
+_recorder = None
+
+
+def set_headless(session) -> None:
+    """
+    Route `ask` to a headless session, or back to the keyboard with None.
+
+    Args:
+        session: A `shop.utils.headless.Headless`, or None.
+
+    Returns:
+        None
+    """
+    global _headless
+    _headless = session
+
+
+def set_screen(screen) -> None:
+    """
+    Draw frames with a `shop.utils.screen.Screen`, or directly with None.
+
+    Args:
+        screen: A `shop.utils.screen.Screen`, or None.
+
+    Returns:
+        None
+    """
+    global _screen
+    _screen = screen
+
+
+def set_recorder(recorder) -> None:
+    """
+    Hand every answer to a `shop.utils.recorder.Recorder`, or stop with None.
+
+    Args:
+        recorder: A `shop.utils.recorder.Recorder`, or None.
+
+    Returns:
+        None
+    """
+    global _recorder
+    _recorder = recorder
+
+
+def ask(message: str) -> str:
+    """
+    Read one answer from the user, or from the script in headless mode.
+
+    Args:
+        message (str): The prompt.
+
+    Returns:
+        str: The answer without the line break.
+    """
+    if _headless is not None:
+        answer = _headless.ask(message)
+    elif _screen is not None:
+        _screen.present(message)
+        start = time.perf_counter_ns()
+        answer = input()
+        waiting(time.perf_counter_ns() - start)
+        _screen.answered(answer)
+    else:
+        start = time.perf_counter_ns()
+        answer = input(message)
+        waiting(time.perf_counter_ns() - start)
+    if _recorder is not None:
+        _recorder.record(message, answer)
+    return answer
+
+
+def _help(text: str) -> None:
+    if _headless is None:
+        print(text)
+
 
 def title(title: str = '-') -> str:
     return f'---{title}---------------------------------------------------------------------'  # noqa E501
 
 
 def clear_screen() -> None:
+    if _headless is not None:
+        return
+    if _screen is not None:
+        _screen.clear()
+        return
     os.system('cls' if os.name == 'nt' else 'clear')
 
 
 def decortor_exceptions(func):
+    # Timed inline rather than with `Timer`: this wraps every flow.
+    calls = CALLS.labels(func.__name__)
+    clock = time.perf_counter_ns
+
     @functools.wraps(func)
     def exception(*args, **kwargs):
+        waited = WAITED[0]
+        start = clock()
         try:
             func(*args, **kwargs)
-        except GroupNameError as e:
-            show_error(e)
-        except GroupDoesNotExist as e:
-            show_error(e)
-        except ProductDoesExist as e:
-            show_error(e)
-        except ProductNameError as e:
-            show_error(e)
-        except NotNumber as e:
-            show_error(e)
-        except ProductDoesNotExist as e:
+        except (
+            GroupNameError,
+            GroupDoesNotExist,
+            ProductDoesExist,
+            ProductNameError,
+            NotNumber,
+            ProductDoesNotExist,
+        ) as e:
+            ERRORS.labels(func.__name__, type(e).__name__).inc()
             show_error(e)
         except Exception as e:
+            ERRORS.labels(func.__name__, type(e).__name__).inc()
             show_error('500! please contact administrator')
+        finally:
+            calls.observe((clock() - start - (WAITED[0] - waited)) / 1e9)
     return exception
 
 
 def keep() -> None:
+    if _headless is not None:
+        return
+    if _screen is not None:
+        _screen.present('\nPress ENTER to continue...')
+        start = time.perf_counter_ns()
+        getpass('')
+        waiting(time.perf_counter_ns() - start)
+        _screen.answered()
+        return
+    start = time.perf_counter_ns()
     getpass('\nPress ENTER to continue...')
+    waiting(time.perf_counter_ns() - start)
 
 
 def show_error(message):
@@ -54,38 +168,41 @@ def show_error(message):
 
 
 def show_help() -> str:
-    print('''
+    _help('''
     1. Use "Admin" to add groups and products to the warehouse.
     2. Use the "Store" to buy products from the warehouse.
     ''')
 
 
 def help_admin() -> None:
-    print('''
+    _help('''
     By default, there is no group in the application, and as you can see, you cannot add a product until you have a group. # noqa E501
     You must first add grouping to the application.
 
-    Use "Group" to add and "Back" to return to main menu.
+    Use "Group" to add, "Import" to load groups and products from a CSV
+    or JSONL file and "Back" to return to main menu.
     ''')
 
 
 def help_admin_group() -> None:
-    print('''
+    _help('''
     1. If you want to go to the groups menu, use "Group".
     2. If you want to go to the product menu, use the "Product".
-    3. If you want to go to the main menu, use "Back".
+    3. If you want to add many products from a CSV or JSONL file, use "Import".
+    4. If you want to save the basket for the next start, use "Save".
+    5. If you want to go to the main menu, use "Back".
     ''')
 
 
 def help_group_add() -> None:
-    print('''
+    _help('''
     1. If you want to add grouping, use "Add".
     2. If you want to go to the previous menu, use "Back".
     ''')
 
 
 def help_group() -> None:
-    print('''
+    _help('''
     1. If you want to add grouping, use "Add".
     2. If you want to modify the grouping, use "Edit".
     3. If you want to deleted the grouping, use "Delete".
@@ -95,7 +212,7 @@ def help_group() -> None:
 
 
 def help_product() -> None:
-    print('''
+    _help('''
     1. If you want to add products to the warehouse, use "Add".
     2. If you want to modify warehouse products, use "Edit".
     3. If you want to see the list of products along with the grouping, use the "Show". # noqa E501
@@ -104,7 +221,7 @@ def help_product() -> None:
 
 
 def help_product_empty() -> None:
-    print('''
+    _help('''
     1. If you want to add products to the warehouse, use "Add".
     3. If you want to see the list of products along with the grouping, use the "Show". # noqa E501
     4. If you want to go to the previous menu, use "Back".
@@ -112,24 +229,26 @@ def help_product_empty() -> None:
 
 
 def help_store() -> None:
-    print('''
+    _help('''
                 <<< Welcome to the Store >>>
 
     1. Use "Add" to make a shopping list from the warehouse.
     2. Use "Show" to view the shopping list.
     3. Use "Delete" to remove the product from the shopping list.
     4. Use "Search" to check if a product is in the shopping list or not.
-    5. Use "Total" to view the payable amount.
-    6. Use "Back" to return to the main menu.
+    5. Use "Find" to search every product of the warehouse.
+    6. Use "Total" to view the payable amount.
+    7. Use "Back" to return to the main menu.
     ''')
 
 
 def help_store_empty() -> None:
-    print('''
+    _help('''
                 <<< Welcome to the Store >>>
 
     1. Use "Add" to make a shopping list from the warehouse.
     2. Use "Show" to view the shopping list.
-    3. Use "Total" to view the payable amount.
-    4. Use "Back" to return to the main menu.
+    3. Use "Find" to search every product of the warehouse.
+    4. Use "Total" to view the payable amount.
+    5. Use "Back" to return to the main menu.
     ''')
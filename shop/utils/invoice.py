@@ -0,0 +1,83 @@
+import logging
+from shop.utils.pricing import unit_price
+
+logger = logging.getLogger(__name__)
+
+
+class InvoiceBook:
+    """
+    Invoice lines keyed by product name.
+
+    Adding a line is O(1): the same product is never listed twice, lines are printed in the order they were first added, and the line count, item count and total are kept up to date as lines come in. # noqa E501
+    """
+
+    __slots__ = ('_lines', 'items', 'total')
+
+    def __init__(self) -> None:
+        self._lines: dict[str, tuple[int, int, int, int]] = dict()
+        self.items = 0
+        self.total = 0
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def __contains__(self, product) -> bool:
+        return product in self._lines
+
+    def __iter__(self):
+        for product, (number, price, discount, _) in self._lines.items():
+            yield product, number, price, discount
+
+    def __repr__(self) -> str:
+        return (
+            f'InvoiceBook({len(self._lines)} lines, '
+            f'{self.items} items, total {self.total:,})'
+        )
+
+    def add(
+            self,
+            product_name: str,
+            number: int,
+            price: int,
+            discount: int,
+            net: int | None = None,
+    ) -> None:
+        """
+        Add a product line; adding a product already listed adds to its number. # noqa E501
+
+        The line keeps the latest price, discount and net price.
+
+        Args:
+            product_name (str): The name of the product.
+            number (int): The number of products.
+            price (int): The price per product.
+            discount (int): The discount percentage.
+            net (int | None): The effective unit price, as cached by `shop.models.versions`; worked out from `price` and `discount` when missing. # noqa E501
+
+        Returns:
+            None
+        """
+        if net is None:
+            net = unit_price(price, discount)
+        previous = self._lines.get(product_name)
+        if previous is not None:
+            self.total -= previous[3] * previous[0]
+            total_number = previous[0] + number
+        else:
+            total_number = number
+        self._lines[product_name] = (total_number, price, discount, net)
+        self.items += number
+        self.total += net * total_number
+
+    def columns(self) -> tuple[tuple, tuple, tuple, tuple, tuple]:
+        """
+        Return the invoice as name, number, price, discount and net price columns. # noqa E501
+
+        Returns:
+            tuple: Five tuples, one per column, in line order.
+        """
+        if not self._lines:
+            return (), (), (), (), ()
+        names = tuple(self._lines)
+        numbers, prices, discounts, nets = zip(*self._lines.values())
+        return names, numbers, prices, discounts, nets
@@ -0,0 +1,289 @@
+import os
+import math
+import time
+import logging
+from bisect import bisect_left
+from shop.utils.profiling import (
+    ARMED,
+    profiled,
+)
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency buckets, in seconds.
+BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf,
+)
+
+# Nanoseconds spent waiting for the user, see `waiting`. Timers subtract
+# it so a command is not charged for the time its prompts were open. A
+# one-item list so hot paths can read it without a call.
+WAITED = [0]
+
+
+class CounterValue:
+    __slots__ = ('value',)
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        self.value += amount
+
+
+class GaugeValue:
+    __slots__ = ('value',)
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+
+class HistogramValue:
+    __slots__ = ('bounds', 'counts', 'sum')
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Metric:
+    """
+    A metric family: one value per combination of label values.
+
+    Look a value up once with `labels` and keep it; updating it is then a plain attribute change. Updates take no lock, so two threads updating the same value at the same moment can lose one update. # noqa E501
+    """
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, help: str, labelnames=()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, object] = dict()
+
+    def _value(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """Return the value of one combination of label values."""
+        value = self._values.get(values)
+        if value is None:
+            value = self._values[values] = self._value()
+        return value
+
+    def _name(self, values: tuple, suffix: str = '', extra: str = '') -> str:
+        pairs = [
+            f'{name}="{_escape(value)}"'
+            for name, value in zip(self.labelnames, values)
+        ]
+        if extra:
+            pairs.append(extra)
+        labels = '{' + ','.join(pairs) + '}' if pairs else ''
+        return f'{self.name}{suffix}{labels}'
+
+    def lines(self) -> list[str]:
+        """Render the family in the Prometheus text format."""
+        lines = [
+            f'# HELP {self.name} {self.help}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        for values, value in sorted(self._values.items()):
+            lines.append(f'{self._name(values)} {value.value}')
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def _value(self) -> CounterValue:
+        return CounterValue()
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def _value(self) -> GaugeValue:
+        return GaugeValue()
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(
+            self,
+            name: str,
+            help: str,
+            labelnames=(),
+            buckets: tuple[float, ...] = BUCKETS
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def _value(self) -> HistogramValue:
+        return HistogramValue(self.buckets)
+
+    def lines(self) -> list[str]:
+        lines = [
+            f'# HELP {self.name} {self.help}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        for values, value in sorted(self._values.items()):
+            total = 0
+            for bound, count in zip(self.buckets, value.counts):
+                total += count
+                edge = '+Inf' if bound == math.inf else repr(bound)
+                name = self._name(values, '_bucket', f'le="{edge}"')
+                lines.append(f'{name} {total}')
+            lines.append(f'{self._name(values, "_sum")} {value.sum}')
+            lines.append(f'{self._name(values, "_count")} {total}')
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')  # noqa E501
+
+
+class Registry:
+    """The metric families of the process, by name."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = dict()
+
+    def _get(self, kind: type[Metric], name: str, *args) -> Metric:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = kind(name, *args)
+        elif type(metric) is not kind:
+            raise ValueError(f'{name} is already a {metric.kind}.')
+        return metric
+
+    def counter(self, name: str, help: str, labelnames=()) -> Counter:
+        return self._get(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames=()) -> Gauge:
+        return self._get(Gauge, name, help, labelnames)
+
+    def histogram(
+            self,
+            name: str,
+            help: str,
+            labelnames=(),
+            buckets: tuple[float, ...] = BUCKETS
+    ) -> Histogram:
+        return self._get(Histogram, name, help, labelnames, buckets)
+
+    def export(self) -> str:
+        """Render every family in the Prometheus text format."""
+        lines = list()
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].lines())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+
+COMMANDS = histogram(
+    'shop_command_seconds',
+    'Time spent running a menu command, without the time prompts were open.',
+    ('menu', 'command'),
+)
+CALLS = histogram(
+    'shop_call_seconds',
+    'Time spent in a flow wrapped by decortor_exceptions, without the time prompts were open.',  # noqa E501
+    ('function',),
+)
+ERRORS = counter(
+    'shop_errors_total',
+    'Errors reported to the user, by flow and exception class.',
+    ('function', 'error'),
+)
+
+
+def waiting(nanoseconds: int) -> None:
+    """
+    Record time spent waiting for the user.
+
+    Args:
+        nanoseconds (int): How long the prompt was open.
+
+    Returns:
+        None
+    """
+    WAITED[0] += nanoseconds
+
+
+class Timer:
+    """
+    Time a block into a histogram value, leaving out the time spent in prompts. # noqa E501
+    """
+
+    __slots__ = ('_value', '_start', '_waited')
+
+    def __init__(self, value: HistogramValue) -> None:
+        self._value = value
+
+    def __enter__(self) -> 'Timer':
+        self._waited = WAITED[0]
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        elapsed = time.perf_counter_ns() - self._start - (WAITED[0] - self._waited)  # noqa E501
+        self._value.observe(elapsed / 1e9)
+
+
+def time_command(menu: str, command: str, known) -> Timer:
+    """
+    Return a timer for one command of a menu.
+
+    When `menu:command` is armed in `shop.utils.profiling`, the timer is wrapped in a profile of the invocation. # noqa E501
+
+    Args:
+        menu (str): The menu name, with its parents, e.g. `admin:product`.
+        command (str): The command typed by the user.
+        known: The commands of the menu; anything else is counted as `other`. # noqa E501
+
+    Returns:
+        Timer: Use it in a `with` block around the command.
+    """
+    timer = Timer(COMMANDS.labels(menu, command if command in known else 'other'))  # noqa E501
+    if ARMED:
+        return profiled(f'{menu}:{command}', timer)
+    return timer
+
+
+def write_metrics(path: str) -> None:
+    """
+    Write a snapshot of every metric to a file in the Prometheus text format. # noqa E501
+
+    The file is replaced in one step, so a scraper never reads half of it.
+
+    Args:
+        path (str): The file to write.
+
+    Returns:
+        None
+    """
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w') as file:
+        file.write(REGISTRY.export())
+    os.replace(temporary, path)
+    logger.info('Metrics written to %s.', path)
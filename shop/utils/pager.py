@@ -0,0 +1,172 @@
+import logging
+from itertools import islice
+from shop.models.position import item_at
+from shop.helper.const import (
+    PAGE_SIZE,
+    NEXT_COMMANDS,
+    PREVIOUS_COMMANDS,
+)
+from shop.utils.help_funcs import (
+    ask,
+    clear_screen,
+)
+
+logger = logging.getLogger(__name__)
+
+PAGE_HELP = '">" next, "<" previous, "page N" jump, "size N" rows per page, "/word" filter, "/" clear filter'  # noqa E501
+
+
+class Pager:
+    """
+    Cursor over a listing: which page is shown, how long pages are and an optional filter word. # noqa E501
+
+    Only the rows of the current page are produced, so a listing of 100k entries costs the same to show as one of 20. # noqa E501
+    """
+
+    __slots__ = ('size', 'start', 'word')
+
+    def __init__(self, size: int = PAGE_SIZE) -> None:
+        self.size = size
+        self.start = 0
+        self.word = ''
+
+    @property
+    def number(self) -> int:
+        """The 1-based number of the current page."""
+        return self.start // self.size + 1
+
+    def command(self, text: str, names=()) -> bool:
+        """
+        Apply a paging command.
+
+        An answer that is the exact name of an entry is never a paging command, so a group or product called "next", ">" or "page 2" can still be chosen by name. # noqa E501
+
+        Args:
+            text (str): The user's answer.
+            names: The entries that can be chosen by name, such as the basket or a group. # noqa E501
+
+        Returns:
+            bool: True if `text` was a paging command, False if the caller should handle it. # noqa E501
+        """
+        text = text.strip()
+        argument = text.partition(' ')[2].strip()
+        if text in names:
+            return False
+        if text in NEXT_COMMANDS:
+            self.start += self.size
+        elif text in PREVIOUS_COMMANDS:
+            self.start = max(0, self.start - self.size)
+        elif text.startswith('page ') and argument.isnumeric():
+            self.start = max(0, int(argument) - 1) * self.size
+        elif text.startswith('size ') and argument.isnumeric():
+            self.size = max(1, int(argument))
+            self.start -= self.start % self.size
+        elif text.startswith('/'):
+            self.word = text[1:].strip().casefold()
+            self.start = 0
+        else:
+            return False
+        logger.debug('Page %s of size %s shown.', self.number, self.size)
+        return True
+
+    def entries(self, items):
+        """
+        Yield the `(position, key)` pairs of the current page of a dictionary.
+
+        Without a filter each key is fetched by position with `item_at`, so nothing before the page is visited. With a filter the keys are scanned and only the matching ones on the page are kept; a page past the last match moves back to the last filtered page. Positions are always the 1-based positions in `items`, so they can be used to choose an entry. # noqa E501
+
+        Args:
+            items (dict): The dictionary to list.
+
+        Yields:
+            tuple[int, str]: The position and the key.
+        """
+        if self.word:
+            word = self.word
+
+            def matches():
+                return (
+                    (position, key)
+                    for position, key in enumerate(items, start=1)
+                    if word in key.casefold()
+                )
+            page = list(islice(matches(), self.start, self.start + self.size))
+            if not page and self.start:
+                # Past the last match: go back to the last filtered page.
+                total = sum(1 for _ in matches())
+                self.start = max(0, (total - 1) // self.size * self.size)
+                page = list(islice(matches(), self.start, self.start + self.size))  # noqa E501
+            yield from page
+            return
+        total = len(items)
+        if total and self.start >= total:
+            self.start = (total - 1) // self.size * self.size
+        for position in range(self.start + 1, min(self.start + self.size, total) + 1):  # noqa E501
+            yield position, item_at(items, position)
+
+    def rows(self, rows):
+        """
+        Yield the current page of any stream of rows.
+
+        Args:
+            rows: An iterable of rows; only the rows up to the end of the page are consumed. # noqa E501
+
+        Yields:
+            The rows of the page.
+        """
+        yield from islice(rows, self.start, self.start + self.size)
+
+    def footer(self, total: int | None = None) -> str | None:
+        """
+        Describe the current page, or None when everything fits on one page.
+
+        Args:
+            total (int | None): The number of rows without the filter, when it is known. # noqa E501
+
+        Returns:
+            str | None: The footer line.
+        """
+        if self.word:
+            return f'Page {self.number}, filtered by "{self.word}". {PAGE_HELP}'  # noqa E501
+        if total is None:
+            return f'Page {self.number}. {PAGE_HELP}'
+        if total <= self.size and not self.start:
+            return None
+        pages = max(1, -(-total // self.size))
+        return f'Page {self.number} of {pages} ({total:,} rows). {PAGE_HELP}'  # noqa E501
+
+
+def show_footer(pager: Pager, total: int | None = None) -> None:
+    """
+    Print the footer of a page when there is more than one page.
+
+    Args:
+        pager (Pager): The pager of the listing.
+        total (int | None): The number of rows, when it is known.
+
+    Returns:
+        None
+    """
+    footer = pager.footer(total)
+    if footer is not None:
+        print(f'\n{footer}')
+
+
+def browse(show, pager: Pager | None = None) -> None:
+    """
+    Show a listing page by page until an answer that is not a paging command. # noqa E501
+
+    Args:
+        show: Called with the pager to print the current page.
+        pager (Pager | None): The pager to start from.
+
+    Returns:
+        None
+    """
+    pager = pager or Pager()
+    message = 'Page command, or Enter to go back: '
+    while True:
+        clear_screen()
+        show(pager)
+        if not pager.command(ask(message).casefold()):
+            break
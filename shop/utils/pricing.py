@@ -0,0 +1,125 @@
+import logging
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+logger = logging.getLogger(__name__)
+
+# Below this many lines building NumPy arrays costs more than it saves.
+NUMPY_MIN_LINES = 256
+
+
+def unit_price(price: int, discount: int) -> int:
+    """
+    Return the effective unit price after the discount.
+
+    Args:
+        price (int): The unit price.
+        discount (int): The discount percentage.
+
+    Returns:
+        int: `price - price * discount // 100`.
+    """
+    return price - price * discount // 100
+
+
+def line_total(price: int, number: int, discount: int) -> int:
+    """
+    Price a single cart line.
+
+    Args:
+        price (int): The unit price.
+        number (int): The quantity.
+        discount (int): The discount percentage.
+
+    Returns:
+        int: `(price - price * discount // 100) * number`.
+    """
+    return unit_price(price, discount) * number
+
+
+def price_lines(
+        prices,
+        numbers,
+        discounts,
+) -> tuple[list[int], int]:
+    """
+    Price a whole cart in one pass.
+
+    Each line costs `(price - price * discount // 100) * number`, the same integer rounding as the original per-item loop. NumPy is used for large carts when it is installed; otherwise, or for small carts, a pure Python pass gives identical results. # noqa E501
+
+    Args:
+        prices: The unit price of every line.
+        numbers: The quantity of every line.
+        discounts: The discount percentage of every line.
+
+    Returns:
+        tuple: The list of line totals and the grand total.
+    """
+    if numpy is not None and len(prices) >= NUMPY_MIN_LINES:
+        price = numpy.asarray(prices, dtype=numpy.int64)
+        number = numpy.asarray(numbers, dtype=numpy.int64)
+        discount = numpy.asarray(discounts, dtype=numpy.int64)
+        lines = (price - price * discount // 100) * number
+        return lines.tolist(), int(lines.sum())
+    lines = [
+        (price - price * discount // 100) * number
+        for price, number, discount in zip(prices, numbers, discounts)
+    ]
+    return lines, sum(lines)
+
+
+def net_lines(nets, numbers) -> tuple[list[int], int]:
+    """
+    Price a cart whose effective unit prices are already known.
+
+    Each line is one multiply, `net * number`; the discount was applied when the net price was cached, see `shop.models.versions`. # noqa E501
+
+    Args:
+        nets: The effective unit price of every line.
+        numbers: The quantity of every line.
+
+    Returns:
+        tuple: The list of line totals and the grand total.
+    """
+    if numpy is not None and len(nets) >= NUMPY_MIN_LINES:
+        lines = numpy.asarray(nets, dtype=numpy.int64) * numpy.asarray(numbers, dtype=numpy.int64)  # noqa E501
+        return lines.tolist(), int(lines.sum())
+    lines = [net * number for net, number in zip(nets, numbers)]
+    return lines, sum(lines)
+
+
+def format_invoice(
+        names,
+        numbers,
+        prices,
+        discounts,
+        lines,
+        total: int,
+) -> str:
+    """
+    Format a priced cart as the invoice text shown to the customer.
+
+    Args:
+        names: The product name of every line.
+        numbers: The quantity of every line.
+        prices: The unit price of every line.
+        discounts: The discount percentage of every line.
+        lines: The line totals returned by `price_lines`.
+        total (int): The grand total.
+
+    Returns:
+        str: The invoice, one line per product followed by the summary.
+    """
+    rows = [
+        f'{name} -> {number} x {price:,} - {discount}% = {line:,}'
+        if discount else
+        f'{name} -> {number} x {price:,} = {line:,}'
+        for name, number, price, discount, line
+        in zip(names, numbers, prices, discounts, lines)
+    ]
+    rows.append('----------------------------------------------------')
+    rows.append(f'Products -> {sum(numbers)} Final Invoice -> {total:,}T')
+    return '\n'.join(rows)
@@ -0,0 +1,139 @@
+import os
+import time
+import logging
+import cProfile
+import tracemalloc
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = 'profiles'
+# Allocation sites written per profiled invocation.
+TOP_ALLOCATIONS = 25
+
+# Command name such as `store:total` -> invocations still to profile. The
+# dispatch points only look further when it is not empty.
+ARMED: dict[str, int] = dict()
+_directory = PROFILE_DIR
+# The `Profiled` running now. Only one profiler can be active: a second
+# `cProfile.Profile` turns the first off on 3.11 and raises on 3.12+.
+_running: 'Profiled | None' = None
+
+
+def parse_profiles(text: str) -> dict[str, int]:
+    """
+    Read commands to profile such as `store:total=3,admin:product:add`.
+
+    Args:
+        text (str): Comma separated `menu:command[=count]` items; the count is 1 by default. # noqa E501
+
+    Returns:
+        dict[str, int]: The number of invocations to profile per command.
+    """
+    profiles = dict()
+    for item in text.split(','):
+        name, _, count = item.partition('=')
+        name = name.strip().casefold()
+        if name:
+            profiles[name] = int(count) if count.strip() else 1
+    return profiles
+
+
+def arm(name: str, count: int = 1, directory: str | None = None) -> None:
+    """
+    Profile the next `count` invocations of a command.
+
+    Args:
+        name (str): The command, `menu:command`, e.g. `store:total` or `admin:product:add`. # noqa E501
+        count (int): How many invocations to profile; 0 disarms it.
+        directory (str | None): Where the profiles go; `PROFILE_DIR` unless set before. # noqa E501
+
+    Returns:
+        None
+    """
+    global _directory
+    if directory is not None:
+        _directory = directory
+    name = name.casefold()
+    if count > 0:
+        ARMED[name] = count
+        logger.info('Profiling the next %d runs of "%s".', count, name)
+    else:
+        ARMED.pop(name, None)
+
+
+class Profiled:
+    """
+    Runs one command invocation under cProfile and tracemalloc.
+
+    On exit it writes `<name>-<timestamp>.prof`, loadable with `pstats`, and `<name>-<timestamp>.alloc.txt`, the `TOP_ALLOCATIONS` sites that allocated most during the invocation. The wrapped context manager (the command's metrics timer) is entered and left inside the profile. # noqa E501
+    """
+
+    def __init__(self, name: str, inner) -> None:
+        self.name = name
+        self.inner = inner
+        self._profile = cProfile.Profile()
+        self._tracing = False
+        self._before = None
+
+    def __enter__(self) -> 'Profiled':
+        global _running
+        _running = self
+        self._tracing = not tracemalloc.is_tracing()
+        if self._tracing:
+            tracemalloc.start()
+        self._before = tracemalloc.take_snapshot()
+        self._profile.enable()
+        self.inner.__enter__()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        global _running
+        try:
+            self.inner.__exit__(*exc)
+        finally:
+            self._profile.disable()
+            _running = None
+            after = tracemalloc.take_snapshot()
+            if self._tracing:
+                tracemalloc.stop()
+            self._write(after.compare_to(self._before, 'lineno'))
+
+    def _write(self, allocations) -> None:
+        os.makedirs(_directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S') + f'-{time.time_ns() % 10**9:09d}'  # noqa E501
+        path = os.path.join(_directory, f'{self.name.replace(":", "-")}-{stamp}')  # noqa E501
+        self._profile.dump_stats(f'{path}.prof')
+        with open(f'{path}.alloc.txt', 'w') as file:
+            file.write(f'Top {TOP_ALLOCATIONS} allocation sites of {self.name}\n')  # noqa E501
+            for stat in allocations[:TOP_ALLOCATIONS]:
+                file.write(f'{stat}\n')
+        logger.info('Profile of "%s" written to %s.prof.', self.name, path)
+
+
+def profiled(name: str, inner):
+    """
+    Wrap a command's context manager in a profile if the command is armed.
+
+    A command run while another is being profiled (`admin:product:add` inside `admin:product`) is left unwrapped and keeps its armed count; it is already part of the outer profile. # noqa E501
+
+    Args:
+        name (str): The command, `menu:command`.
+        inner: The context manager the command runs in.
+
+    Returns:
+        `inner` itself, or a `Profiled` around it that uses up one armed invocation. # noqa E501
+    """
+    count = ARMED.get(name)
+    if count is None:
+        return inner
+    if _running is not None:
+        logger.info(
+            'Not profiling "%s": it runs inside the profile of "%s".',
+            name, _running.name
+        )
+        return inner
+    if count > 1:
+        ARMED[name] = count - 1
+    else:
+        del ARMED[name]
+    return Profiled(name, inner)
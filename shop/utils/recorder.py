@@ -0,0 +1,77 @@
+import json
+import time
+import logging
+from shop.utils.help_funcs import set_recorder
+
+logger = logging.getLogger(__name__)
+
+
+class Recorder:
+    """
+    Writes every answer given to `ask` to a session file, one JSON line each.
+
+    A line is `{"time", "at", "prompt", "input"}`: seconds since the recording started, the wall-clock time, the prompt and the answer. The file is flushed after every line, so a session cut short by a crash is kept up to its last answer. # noqa E501
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.answers = 0
+        self._start = time.monotonic()
+        self._file = open(path, 'w')
+
+    def record(self, prompt: str, answer: str) -> None:
+        """Write one answered prompt."""
+        self._file.write(json.dumps({
+            'time': round(time.monotonic() - self._start, 3),
+            'at': round(time.time(), 3),
+            'prompt': prompt,
+            'input': answer,
+        }) + '\n')
+        self._file.flush()
+        self.answers += 1
+
+    def close(self) -> None:
+        """Close the session file."""
+        self._file.close()
+        logger.info('Recorded %d answers to %s.', self.answers, self.path)
+
+
+def read_session(path: str) -> list[dict]:
+    """
+    Read a session file written by `Recorder`.
+
+    Args:
+        path (str): The session file.
+
+    Returns:
+        list[dict]: The answered prompts, in order. A torn last line is ignored. # noqa E501
+    """
+    records = list()
+    with open(path) as file:
+        for line in file:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                break
+    return records
+
+
+def record_session(main, path: str) -> Recorder:
+    """
+    Run the interactive `main` as usual while recording every answer to `path`. # noqa E501
+
+    Args:
+        main: The entry point to drive, usually `core.app.main`.
+        path (str): The session file to write.
+
+    Returns:
+        Recorder: The closed recorder.
+    """
+    recorder = Recorder(path)
+    set_recorder(recorder)
+    try:
+        main()
+    finally:
+        set_recorder(None)
+        recorder.close()
+    return recorder
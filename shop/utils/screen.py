@@ -0,0 +1,177 @@
+import io
+import sys
+import shutil
+import logging
+import contextlib
+import unicodedata
+from shop.utils.help_funcs import set_screen
+
+logger = logging.getLogger(__name__)
+
+HOME_CLEAR = '\x1b[H\x1b[2J'
+CLEAR_LINE = '\x1b[K'
+CLEAR_BELOW = '\x1b[J'
+
+
+def _move(row: int, column: int = 0) -> str:
+    return f'\x1b[{row + 1};{column + 1}H'
+
+
+def _width(char: str) -> int:
+    if unicodedata.combining(char):
+        return 0
+    return 2 if unicodedata.east_asian_width(char) in 'WF' else 1
+
+
+def _display_width(text: str) -> int:
+    if text.isascii():
+        return len(text)
+    return sum(_width(char) for char in text)
+
+
+def _wrap(line: str, columns: int):
+    # Cut a line by display width: wide characters take two columns and
+    # combining marks none.
+    start = width = 0
+    for at, char in enumerate(line):
+        size = _width(char)
+        if width + size > columns and at > start:
+            yield line[start:at]
+            start, width = at, 0
+        width += size
+    yield line[start:]
+
+
+def _rows(frame: list[str], columns: int) -> list[str]:
+    # Split the lines of a frame into terminal rows, the way the terminal
+    # wraps them. Tabs are expanded first; listings start with one.
+    rows = list()
+    for line in frame:
+        line = line.expandtabs()
+        if not line:
+            rows.append(line)
+        elif line.isascii():
+            rows.extend(
+                line[at:at + columns] for at in range(0, len(line), columns)
+            )
+        else:
+            rows.extend(_wrap(line, columns))
+    return rows
+
+
+class Screen:
+    """
+    Compose each frame in memory and repaint only the lines that changed.
+
+    While a screen is running, everything the flows print lands in `buffer`. `clear_screen` starts a new frame and every prompt shows the frame with a single write: changed lines are rewritten in place with ANSI cursor moves, unchanged lines are not sent at all. Long lines are split into rows the way the terminal wraps them, and a frame taller than the terminal is drawn in full because the terminal scrolls it. # noqa E501
+    """
+
+    def __init__(self, output) -> None:
+        self._output = output
+        self.buffer = io.StringIO()
+        self._frame: list[str] = ['']
+        self._shown: list[str] | None = None
+        self.frames = 0
+        self.written = 0
+
+    def clear(self) -> None:
+        """Start a new, empty frame."""
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        self._frame = ['']
+
+    def _collect(self, text: str) -> None:
+        parts = text.split('\n')
+        self._frame[-1] += parts[0]
+        self._frame.extend(parts[1:])
+
+    def _paint(self) -> str:
+        size = shutil.get_terminal_size()
+        rows = _rows(self._frame, size.columns)
+        shown = self._shown
+        if shown is None or len(rows) >= size.lines:
+            # A frame taller than the terminal scrolls it, so the rows on
+            # screen no longer match `_shown`; draw it whole next time too.
+            self._shown = rows if len(rows) < size.lines else None
+            return HOME_CLEAR + ''.join(
+                row if len(row) == size.columns else row + '\n'
+                for row in rows[:-1]
+            ) + rows[-1]
+        parts = list()
+        for number, row in enumerate(rows):
+            if number >= len(shown) or shown[number] != row:
+                parts.append(_move(number) + row)
+                if len(row) < size.columns:
+                    parts.append(CLEAR_LINE)
+        if len(shown) > len(rows):
+            parts.append(_move(len(rows)) + CLEAR_BELOW)
+        last = min(_display_width(rows[-1]), size.columns - 1)
+        parts.append(_move(len(rows) - 1, last))
+        self._shown = rows
+        return ''.join(parts)
+
+    def present(self, prompt: str = '') -> None:
+        """
+        Show what was printed since the last prompt, followed by `prompt`.
+
+        Args:
+            prompt (str): The text left in front of the cursor.
+
+        Returns:
+            None
+        """
+        self._collect(self.buffer.getvalue() + prompt)
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        data = self._paint()
+        self._output.write(data)
+        self._output.flush()
+        self.frames += 1
+        self.written += len(data)
+
+    def answered(self, answer: str = '') -> None:
+        """
+        Record what the terminal did while reading: it echoed `answer` and moved to the next line. # noqa E501
+
+        Args:
+            answer (str): The echoed text; empty for hidden input.
+
+        Returns:
+            None
+        """
+        self._frame[-1] += answer
+        self._frame.append('')
+        if self._shown is not None:
+            size = shutil.get_terminal_size()
+            rows = _rows(self._frame, size.columns)
+            self._shown = rows if len(rows) < size.lines else None
+
+    def close(self) -> None:
+        """Show what is left and put the cursor below the last frame."""
+        self.present()
+        self._output.write('\n')
+        self._output.flush()
+
+
+def run_screen(main) -> Screen:
+    """
+    Run the interactive `main` with the diffing renderer on standard output.
+
+    Args:
+        main: The entry point to drive, usually `core.app.main`.
+
+    Returns:
+        Screen: The finished screen.
+    """
+    screen = Screen(sys.stdout)
+    set_screen(screen)
+    try:
+        with contextlib.redirect_stdout(screen.buffer):
+            main()
+    finally:
+        set_screen(None)
+        screen.close()
+        logger.info(
+            '%s frames shown with %s bytes.', screen.frames, screen.written
+        )
+    return screen